@@ -1,5 +1,22 @@
-from .classifier import classify_human_activities
+from .classifier import classify_human_activities, classify_human_activities_days, reapply_postprocessing
 from .synchonise_predictions import classify_and_synchronise_predictions
+from .feature_cache import get_feature_cache_dir
+from .flat_forest import compile_random_forest
+from .model_variants import create_model_variants, save_model_variants, evaluate_model_variants
+from .probability_cache import load_probabilities, get_probability_dir
+from .postprocessing_tuning import tune_postprocessing
+from .postprocessing import expand_classification
 
 __all__ = ['classify_human_activities',
-           'classify_and_synchronise_predictions']
\ No newline at end of file
+           'classify_human_activities_days',
+           'classify_and_synchronise_predictions',
+           'get_feature_cache_dir',
+           'compile_random_forest',
+           'create_model_variants',
+           'save_model_variants',
+           'evaluate_model_variants',
+           'reapply_postprocessing',
+           'load_probabilities',
+           'get_probability_dir',
+           'tune_postprocessing',
+           'expand_classification']
\ No newline at end of file
@@ -5,31 +5,31 @@ Available Functions
 -------------------
 [Public]
 classify_human_activities(...): Classifies human activities from smartphone sensor data.
+classify_human_activities_days(...): Classifies human activities from the smartphone sensor data of several days at once.
+predict_activities(...): Classifies the windows of several acquisitions with a single call to the model.
+reapply_postprocessing(...): Re-applies the post-processing with other settings to stored class probabilities.
 -------------------
-[Private]
-_apply_classification_pipeline(...): Applies the full classification pipeline, including threshold tuning and heuristics-based label correction.
-_threshold_tuning(...): Adjusts model predictions to reduce confusion between 'stand' and 'sit' based on a probability threshold.
-_heuristics_correction(...): Post-processes predicted labels to correct short-duration segments.
-_expand_classification(...): Expands windowed predictions to match the original signal length.
-_correct_short_segments(...): Replaces short segments of a specific class with the most frequent neighboring class.
-_find_class_segments(...): Finds contiguous segments of a target class in a prediction array.
 """
 # ------------------------------------------------------------------------------------------------------------------- #
 # imports
 # ------------------------------------------------------------------------------------------------------------------- #
+import copy
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from typing import Tuple, List, Dict, Union
-from collections import Counter
+from typing import Tuple, List, Dict, Optional
 import pandas as pd
-import copy
 from pathlib import Path
 import os
 
 # internal imports
 from .feature_extractor import extract_features, trim_data
-from .load import load_production_model
+from .feature_cache import extract_features_cached, get_feature_cache_dir
+from .load import get_har_model
+from .model_variants import get_model_variant_path
+from .probability_cache import save_probabilities, PROBABILITIES, WINDOW_MASK, CLASSES, W_SIZE
+from .postprocessing import postprocess_worn_windows, expand_classification, NON_WEAR_LABEL
 from constants import ACC, GYR, MAG
+from signal_processing.wear_detection import get_window_mask
 
 # ------------------------------------------------------------------------------------------------------------------- #
 # constants
@@ -38,6 +38,7 @@ SENSORS_TO_LOAD = [ACC, GYR, MAG] # sensors to extract features from
 
 HAR_MODEL = "HAR_model_500.joblib"
 ACTIVITY_COLUMN_NAME = 'activity'
+SINGLE_DAY = 'day' # key of the day when classifying the acquisitions of a single day
 
 PROB_THRESHOLD = 0.85 # threshold for probability thresholding
 MIN_DURATIONS = {0: 20, 1: 30, 2: 5} # durations for 0 (sitting), 1 (standing), 2 (walking)
@@ -45,241 +46,268 @@ MIN_DURATIONS = {0: 20, 1: 30, 2: 5} # durations for 0 (sitting), 1 (standing),
 # ------------------------------------------------------------------------------------------------------------------- #
 # public functions
 # ------------------------------------------------------------------------------------------------------------------- #
-def classify_human_activities(phone_data_dict: Dict[str, pd.DataFrame], w_size: float = 5.0,
-                              fs: int = 100) -> Dict[str, pd.DataFrame]:
+def classify_human_activities(phone_data_dict: Dict[str, pd.DataFrame], w_size: float = 5.0, fs: int = 100,
+                              wear_mask_dict: Optional[Dict[str, np.ndarray]] = None,
+                              feature_cache_dir: Optional[str] = None, n_jobs: Optional[int] = None,
+                              model_variant: Optional[str] = None,
+                              probability_dir: Optional[str] = None,
+                              use_feature_cache: bool = True) -> Dict[str, pd.DataFrame]:
     """
     Classifies human activities from smartphone sensor data.
 
-    This function iterates over a dictionary of daily acquisitions, extracts features
-    from each dataframe using TSFEL, and classifies the data. Classes are: 0 (sitting), 1 (standing), 2 (walking).
+    This function iterates over a dictionary of daily acquisitions, extracts the features used by the model
+    from each dataframe, and classifies the data. Classes are: 0 (sitting), 1 (standing), 2 (walking).
     After classification, a column with the prediction is added to the original dataframe with the smartphone signals.
 
+    The windows of all acquisitions are classified at once (see classify_human_activities_days(...)).
+
+    If wear masks are provided (see signal_processing.get_wear_masks(...)), the features are only extracted and
+    classified for the windows in which the phone was worn. The other windows are labeled with NON_WEAR_LABEL (-1).
+
+    The features of each acquisition are cached, thus they are only extracted once and read from the cache in the
+    following calls (e.g., after changing the model or the thresholds). The features are cached in the given folder
+    (see get_feature_cache_dir(folder_path)) or in the default folder (see get_feature_cache_dir()). As the acquisitions
+    are identified by their time in the folder, the default folder only keeps the features of the last subject (the
+    features of a different subject replace the ones with the same acquisition time). The cache can be disabled with
+    use_feature_cache=False.
+
+    If a probability folder is provided (see get_probability_dir(...)), the class probabilities of the windows are
+    stored, so that the post-processing can be re-applied with other settings (PROB_THRESHOLD, MIN_DURATIONS) without
+    the data and the model (see reapply_postprocessing(...)).
+
     :param phone_data_dict: Dictionary with the acquisition time as keys and the sensor dataframes as values
     :param w_size: the window size in seconds that should be used for windowing the data. Default: 5.0
     :param fs: the sampling rate (in Hz) of the data
+    :param wear_mask_dict: optional dictionary with the acquisition time as keys and the sample validity masks
+                           (True: worn) as values. Default: None
+    :param feature_cache_dir: optional folder in which the features are cached. Default: None (default folder)
+    :param n_jobs: the number of jobs used by the model for inference. Default: None (the setting of the model)
+    :param model_variant: optional name of a smaller variant of the model (e.g., 'trees_100', see
+                          HAR.model_variants). Default: None (production model)
+    :param probability_dir: optional folder in which the class probabilities are stored. Default: None (not stored)
+    :param use_feature_cache: whether the features are cached. Default: True
     :return: Dictionary with the acquisition times as keys and the sensor dataframes with the added prediction column
             as values.
     """
-    # create copy of the dictionary to avoid overwriting any results
-    classified_dict = copy.deepcopy(phone_data_dict)
-
-    # cycle over the dictionary with the daily acquisitions for the phone
-    for acquisition_time, df in phone_data_dict.items():
-
-        # extract features using TSFEL
-        features_df = extract_features(df, sensors_to_load=SENSORS_TO_LOAD,w_size=w_size, fs=fs)
-
-        # load_signals the model
-        model, model_features = load_production_model(os.path.join(Path(__file__).parent, HAR_MODEL))
-
-        # check if there are any missing features required for the classifier
-        missing_features = [f for f in model_features if f not in features_df.columns]
-        if missing_features:
-            raise ValueError(f"Missing required features for the model: {missing_features}. ")
-
-        # classify activities
-        _, y_pred_exp = _apply_classification_pipeline(features_df[model_features], model, w_size=w_size, fs=fs,
-                                                       threshold=PROB_THRESHOLD, min_durations=MIN_DURATIONS)
-
-        # trim df with the phone signals to add the prediction column
-        sensor_data, _ = trim_data(df.to_numpy(), w_size=w_size, fs=fs)
-
-        # convert back to pandas dataframe
-        df = pd.DataFrame(sensor_data, columns=df.columns)
-
-         # add column to dataframe
-        df[ACTIVITY_COLUMN_NAME] = y_pred_exp
-
-        # add to dict
-        classified_dict[acquisition_time] = df
-
-    return classified_dict
-
-
-# ------------------------------------------------------------------------------------------------------------------- #
-# private functions
-# ------------------------------------------------------------------------------------------------------------------- #
-def _apply_classification_pipeline(features: np.ndarray, har_model: RandomForestClassifier, w_size: float,
-                                   fs: int, threshold: float, min_durations: Dict[int, int]) -> Tuple[np.ndarray, List[int]]:
+    # classify the acquisitions of the day (as a single day)
+    classified_days_dict = classify_human_activities_days(
+        {SINGLE_DAY: phone_data_dict}, w_size=w_size, fs=fs,
+        wear_mask_days_dict=None if wear_mask_dict is None else {SINGLE_DAY: wear_mask_dict},
+        feature_cache_dirs=None if feature_cache_dir is None else {SINGLE_DAY: feature_cache_dir},
+        n_jobs=n_jobs, model_variant=model_variant,
+        probability_dirs=None if probability_dir is None else {SINGLE_DAY: probability_dir},
+        use_feature_cache=use_feature_cache)
+
+    return classified_days_dict[SINGLE_DAY]
+
+
+def classify_human_activities_days(phone_days_dict: Dict[str, Dict[str, pd.DataFrame]], w_size: float = 5.0,
+                                   fs: int = 100, wear_mask_days_dict: Optional[Dict[str, Dict[str, np.ndarray]]] = None,
+                                   feature_cache_dirs: Optional[Dict[str, str]] = None,
+                                   n_jobs: Optional[int] = None,
+                                   model_variant: Optional[str] = None,
+                                   probability_dirs: Optional[Dict[str, str]] = None,
+                                   use_feature_cache: bool = True) -> Dict[str, Dict[str, pd.DataFrame]]:
     """
-    Applies classification pipeline. The classification pipeline consists of:
+    Classifies human activities from the smartphone sensor data of several days.
 
-    1. Perform classification using a Random Forest
-    2. Apply threshold tuning label correction
-    3. Apply heuristics-based label correction
+    The features of all acquisitions (of all days) are extracted first and stacked into a single feature matrix, which
+    is classified with a single call to the model (predict_proba(...), the labels are the classes with the highest
+    probability). The predictions are then split back per acquisition, and the threshold tuning and the heuristics-based
+    label correction are applied to each acquisition separately (see classify_human_activities(...)).
 
-    :param features: numpy.array of shape (n_samples, n_features) containing the features
-    :param har_model: object from RandomForestClassifier
-    :param w_size: window size in seconds
-    :param fs: the sampling frequency
-    :param threshold: The probability margin threshold for adjusting predictions. Default is 0.1.
-    :param min_durations: Dictionary mapping each class label to its minimum segment duration in seconds.
-    :return: A tuple containing:
-        - List[int]: Labels for each window.
-        - List[int]: Labels expanded to the original sampling frequency
+    :param phone_days_dict: Dictionary with the days as keys and the dictionaries with the daily acquisitions
+                            ({acquisition_time: pd.DataFrame}) as values
+    :param w_size: the window size in seconds that should be used for windowing the data. Default: 5.0
+    :param fs: the sampling rate (in Hz) of the data
+    :param wear_mask_days_dict: optional dictionary with the days as keys and the dictionaries with the sample validity
+                                masks ({acquisition_time: np.ndarray}) as values. Default: None
+    :param feature_cache_dirs: optional dictionary with the days as keys and the folders in which the features are
+                               cached as values. The features of the other days are cached in a sub-folder (named
+                               after the day) of the default folder. Default: None (default folder)
+    :param n_jobs: the number of jobs used by the model for inference. Default: None (the setting of the model)
+    :param model_variant: optional name of a smaller variant of the model (see classify_human_activities(...)).
+                          Default: None (production model)
+    :param probability_dirs: optional dictionary with the days as keys and the folders in which the class
+                             probabilities are stored as values. Default: None (not stored)
+    :param use_feature_cache: whether the features are cached. Default: True
+    :return: Dictionary with the days as keys and the dictionaries with the classified acquisitions as values
+             (see classify_human_activities(...))
     """
+    # create copy of the dictionary to avoid overwriting any results
+    classified_days_dict = {day: dict(phone_data_dict) for day, phone_data_dict in phone_days_dict.items()}
 
-    # classify the data - vanilla model
-    y_pred = har_model.predict(features)
+    # lists for holding the acquisitions that have to be classified
+    acquisitions = []
+    features_list = []
 
-    # get class probabilities
-    y_pred_proba = har_model.predict_proba(features)
+    # model (only loaded if there is an acquisition to classify)
+    model = None
+    model_path = get_model_variant_path(os.path.join(Path(__file__).parent, HAR_MODEL), model_variant)
 
-    # apply threshold tuning
-    y_pred_tt = _threshold_tuning(y_pred_proba, y_pred, 0, 1, threshold)
+    # cycle over the days and the acquisitions of each day
+    for day, phone_data_dict in phone_days_dict.items():
 
-    # combine tt with heuristics
-    y_pred_tt_heur = _heuristics_correction(y_pred_tt, w_size, min_durations)
+        # get the wear masks, the cache folder, and the probability folder of the day
+        wear_mask_dict = {} if wear_mask_days_dict is None else wear_mask_days_dict.get(day, {})
+        probability_dir = None if probability_dirs is None else probability_dirs.get(day)
 
-    # expand the predictions to the size of the original signal
-    y_pred_tt_heur_expanded = _expand_classification(y_pred_tt_heur, w_size=w_size, fs=fs)
+        # (the features of the days without a cache folder are cached in a sub-folder of the default folder)
+        feature_cache_dir = None
+        if use_feature_cache:
+            feature_cache_dir = (feature_cache_dirs or {}).get(day, os.path.join(get_feature_cache_dir(), day))
 
-    return y_pred_tt_heur, y_pred_tt_heur_expanded
+        for acquisition_time, df in phone_data_dict.items():
 
+            # get the windows in which the phone was worn (all windows if no mask was provided)
+            window_mask = np.ones(len(df) // int(w_size * fs), dtype=bool)
+            if acquisition_time in wear_mask_dict:
+                window_mask = get_window_mask(wear_mask_dict[acquisition_time], w_size=w_size, fs=fs)
 
-def _threshold_tuning(probabilities: np.ndarray, y_pred: Union[np.ndarray, list],
-                     sit_label: int = 0, stand_label: int = 1, threshold: float = 0.1) -> np.ndarray:
-    """
-    Adjusts predictions for a classifier by reducing confusion between 'stand' and 'sit'.
-
-    If the model predicts 'stand' (class 1) and the difference in predicted probability
-    between 'stand' and 'sit' (class 0) is less than the given threshold, the prediction
-    is changed to 'sit'.
-
-    :param probabilities: numpy.array of shape (n_samples, n_classes) containing the predicted probabilities
-    :param y_pred: array containing the predicted class labels (as integers)
-    :param sit_label: Class label for 'sit'. Default is 0.
-    :param stand_label: Class label for 'stand'. Default is 1.
-    :param threshold: The probability margin threshold for adjusting predictions. Default is 0.1.
-    :return: numpy.ndarray containing the adjusted class label predictions
-    """
-    adjusted = []
-    for i, probs in enumerate(probabilities):
-        pred = y_pred[i]
+            # trim df with the phone signals to add the prediction column
+            sensor_data, _ = trim_data(df.to_numpy(), w_size=w_size, fs=fs)
 
-        # Apply adjustment only if model predicted 'stand'
-        if pred == stand_label:
-            p_stand = probs[stand_label]
-            p_sit = probs[sit_label]
-            if (p_stand - p_sit) < threshold:
-                pred = sit_label  # Change prediction to 'sit'
+            # convert back to pandas dataframe
+            df_trimmed = pd.DataFrame(sensor_data, columns=df.columns)
+            classified_days_dict[day][acquisition_time] = df_trimmed
 
-        adjusted.append(pred)
+            # the phone was not worn during the acquisition
+            if not window_mask.any():
+                df_trimmed[ACTIVITY_COLUMN_NAME] = NON_WEAR_LABEL
 
-    return np.array(adjusted)
+                # store an empty probability matrix (no window was classified)
+                if probability_dir is not None:
+                    save_probabilities(probability_dir, acquisition_time, np.zeros((0, 0)), window_mask,
+                                       classes=np.zeros(0, dtype=int), model_name=os.path.basename(model_path),
+                                       w_size=w_size)
+                continue
 
+            # get the model (only loaded for the first acquisition)
+            if model is None:
+                model, model_features = get_har_model(model_path)
 
-def _heuristics_correction(predictions: np.ndarray, window_size: float, min_durations: Dict[int, float]) -> np.ndarray:
-    """
-    Apply post-processing to correct short activity segments for each class.
+            # extract only the features used by the model (only from the worn windows)
+            # (raises a ValueError if the model requires features that cannot be extracted)
+            if feature_cache_dir is None:
+                features_df = extract_features(df, sensors_to_load=SENSORS_TO_LOAD, w_size=w_size, fs=fs,
+                                               window_mask=None if window_mask.all() else window_mask,
+                                               feature_names=model_features)
 
-    :param predictions: 1D array of predicted class labels.
-    :param window_size: Duration of each prediction window in seconds.
-    :param min_durations: Dictionary mapping each class label to its minimum segment duration in seconds.
-    :return: Post-processed prediction array with short segments corrected.
-    """
-    corrected = predictions.copy()
+            # read the features from the cache (extracted and cached the first time)
+            else:
+                features_df = extract_features_cached(df, sensors_to_load=SENSORS_TO_LOAD, w_size=w_size, fs=fs,
+                                                      cache_dir=feature_cache_dir, cache_name=acquisition_time,
+                                                      window_mask=None if window_mask.all() else window_mask,
+                                                      feature_names=model_features)
 
-    # Apply correction for each class using the specified minimum duration
-    for class_id, min_duration in min_durations.items():
-        corrected = _correct_short_segments(corrected, class_id, min_duration, window_size)
+            acquisitions.append((day, acquisition_time, window_mask, probability_dir))
+            features_list.append(features_df)
 
-    return corrected
+    # classify the windows of all acquisitions at once
+    if features_list:
+        predictions = predict_activities(features_list, model, n_jobs=n_jobs)
 
+    else:
+        predictions = []
 
-def _expand_classification(clf_result: np.ndarray, w_size: float, fs: int) -> List[int]:
-    """
-    Converts the time column from the android timestamp which is in nanoseconds to seconds.
-    Parameters.
-    :param clf_result: list with the classifier prediction where each entry is the prediction made for a window.
-    :param w_size: the window size in samples that was used to make the classification.
-    :param fs: the sampling frequency of the signal that was classified.
-    :return: the expanded classification results.
-    """
+    # cycle over the predictions of each acquisition
+    for (day, acquisition_time, window_mask, probability_dir), (y_pred, y_pred_proba) in zip(acquisitions, predictions):
 
-    expanded_clf_result = []
+        # store the class probabilities
+        if probability_dir is not None:
+            save_probabilities(probability_dir, acquisition_time, y_pred_proba, window_mask, classes=model.classes_,
+                               model_name=os.path.basename(model_path), w_size=w_size)
 
-    # cycle over the classification results list
-    for i, p in enumerate(clf_result):
-        expanded_clf_result += [p] * int(w_size * fs)
+        # apply the threshold tuning and the heuristics-based label correction to each worn period
+        # (the remaining windows are labeled as non-wear)
+        y_pred_all = postprocess_worn_windows(y_pred, y_pred_proba, window_mask, w_size=w_size,
+                                               threshold=PROB_THRESHOLD, min_durations=MIN_DURATIONS)
 
-    return expanded_clf_result
+        # add column to dataframe (predictions expanded to the size of the original signal)
+        df_trimmed = classified_days_dict[day][acquisition_time]
+        df_trimmed[ACTIVITY_COLUMN_NAME] = expand_classification(y_pred_all, w_size=w_size, fs=fs)
 
+    return classified_days_dict
 
-def _correct_short_segments(predictions: np.ndarray, class_id: int, min_duration: float, window_size: float) -> np.ndarray:
+
+def predict_activities(features_list: List[pd.DataFrame], har_model: RandomForestClassifier,
+                       n_jobs: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
     """
-    Replace segments of a specific class that are shorter than a given duration.
+    Classifies the windows of several acquisitions with a single call to the model.
 
-    The replacement class is chosen as the most frequent class from neighboring values.
+    The feature matrices are stacked, the class probabilities are computed once (predict_proba(...)), and the labels
+    are obtained as the classes with the highest probability (which is what predict(...) does for a Random Forest,
+    thus the trees are only traversed once). The results are split back per acquisition.
 
-    :param predictions: 1D array of predicted class labels.
-    :param class_id: Class to check for short-duration segments.
-    :param min_duration: Minimum acceptable duration for a segment in seconds.
-    :param window_size: Duration of each prediction window in seconds.
-    :return: Updated prediction array with short segments replaced.
+    :param features_list: list with the feature dataframes (one per acquisition, with the features used by the model)
+    :param har_model: object from RandomForestClassifier
+    :param n_jobs: the number of jobs used by the model for inference. The model itself is not modified, thus it can be
+                   shared by concurrent callers. Default: None (the setting of the model)
+    :return: list with one tuple per acquisition containing:
+        - np.ndarray: the predicted labels of each window
+        - np.ndarray: the class probabilities of each window (n_windows, n_classes)
     """
 
-    # get the segments for the class
-    segments = _find_class_segments(predictions, class_id)
-    corrected = predictions.copy()
+    # stack the features of all acquisitions
+    features = pd.concat(features_list, axis=0, ignore_index=True)
 
-    # cycle over the segments
-    for start, end in segments:
+    # set the number of jobs on a shallow copy of the model (the model is shared between callers, and the copy shares
+    # the fitted trees with it)
+    if n_jobs is not None:
+        har_model = copy.copy(har_model)
+        har_model.n_jobs = n_jobs
 
-        # calculate the segment lengths in seconds
-        duration = (end - start + 1) * window_size
-
-        # check whether the segment needs to be corrected (too short)
-        if duration < min_duration:
-            # Get neighbor classes
-            left = predictions[start - 1] if start > 0 else None
-            right = predictions[end + 1] if end < len(predictions) - 1 else None
+    # get class probabilities
+    y_pred_proba = har_model.predict_proba(features)
 
-            neighbors = [c for c in (left, right) if c is not None]
-            if neighbors:
+    # get the labels
+    y_pred = har_model.classes_.take(np.argmax(y_pred_proba, axis=1), axis=0)
 
-                # in case the left and the right neighbor are from different
-                # classes then the left neighbor (i.e., the previous activity - chronologically) is chosen
-                replacement = Counter(neighbors).most_common(1)[0][0]
-                corrected[start:end + 1] = replacement
+    # split the results per acquisition
+    split_indices = np.cumsum([len(features_df) for features_df in features_list])[:-1]
 
-    return corrected
+    return list(zip(np.split(y_pred, split_indices), np.split(y_pred_proba, split_indices)))
 
 
-def _find_class_segments(predictions: np.ndarray, target_class: int) -> List[Tuple[int, int]]:
+def reapply_postprocessing(probas: Dict[str, Dict[str, np.ndarray]], threshold: float = PROB_THRESHOLD,
+                           min_durations: Dict[int, float] = MIN_DURATIONS) -> Dict[str, np.ndarray]:
     """
-    Find start and end indices of contiguous segments belonging to the target class.
+    Re-applies the post-processing (threshold tuning and heuristics-based label correction) to stored class
+    probabilities, e.g., to evaluate other settings for the whole cohort without loading the data or the model.
+    The labels are the same as the ones obtained by classify_human_activities(...) with the same settings.
 
-    :param predictions: 1D array of predicted class labels.
-    :param target_class: Class label to find segments for.
-    :return: List of tuples, where each tuple is (start_idx, end_idx) of a segment.
+    Example:
+        probas = load_probabilities(os.path.join('HAR', 'probabilities'))
+        labels = reapply_postprocessing(probas, threshold=0.8, min_durations={0: 30, 1: 30, 2: 10})
+
+    :param probas: dictionary with the acquisitions as keys and the stored probabilities as values
+                   (see load_probabilities(...))
+    :param threshold: The probability margin threshold for adjusting predictions. Default: PROB_THRESHOLD
+    :param min_durations: Dictionary mapping each class label to its minimum segment duration in seconds.
+                          Default: MIN_DURATIONS
+    :return: dictionary with the acquisitions as keys and the label of each window as values (non-worn windows are
+             labeled with NON_WEAR_LABEL). Use HAR.expand_classification(...) to get the labels of each sample.
     """
 
-    # list for holding the segments
-    segments = []
+    # dictionary for holding the labels
+    labels_dict = {}
 
-    # init variables
-    in_segment = False
-    start = 0
+    for acquisition, stored in probas.items():
 
-    # cycle over the predictions
-    for i, pred in enumerate(predictions):
+        window_mask = stored[WINDOW_MASK]
+        y_pred_proba = stored[PROBABILITIES]
 
-        # check whether current prediction corresponds to the target class
-        if pred == target_class:
+        # no window was classified
+        if not window_mask.any():
+            labels_dict[acquisition] = np.full(window_mask.shape[0], NON_WEAR_LABEL)
+            continue
 
-            # start counting the segment
-            if not in_segment:
-                in_segment = True
-                start = i
-        else:
-            # end the segment
-            if in_segment:
-                segments.append((start, i - 1))
-                in_segment = False
+        # get the labels of the model (classes with the highest probability)
+        y_pred = stored[CLASSES].take(np.argmax(y_pred_proba, axis=1), axis=0)
 
-    # when reaching the end, assign the end of the prediction array as the stop
-    if in_segment:
-        segments.append((start, len(predictions) - 1))
+        # apply the threshold tuning and the heuristics-based label correction to each worn period
+        labels_dict[acquisition] = postprocess_worn_windows(y_pred, y_pred_proba, window_mask,
+                                                             w_size=float(stored[W_SIZE]), threshold=threshold,
+                                                             min_durations=min_durations)
 
-    return segments
\ No newline at end of file
+    return labels_dict
@@ -0,0 +1,190 @@
+"""
+Functions to persist the HAR window features, so that they are only extracted once per subject, day, and acquisition
+(e.g., when the model or the post-processing thresholds change). The features are stored in parquet files (columnar),
+thus only the features that are needed by the model are read.
+
+Available Functions
+-------------------
+[Public]
+extract_features_cached(...): Extracts the window features or reads them from the cache if they were already extracted.
+get_feature_cache_key(...): Gets the cache key of the features of an acquisition.
+get_feature_cache_dir(...): Gets the cache folder of the features of a subject on a given day (or the default folder).
+------------------
+[Private]
+_remove_stale_cache_files(...): Removes the cached features of an acquisition that were stored with other keys.
+_hash_file(...): Computes the hash of the content of a file.
+------------------
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import glob
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from functools import lru_cache
+from typing import List, Optional
+
+# internal imports
+from utils import get_group_from_path
+from .feature_extractor import extract_features, TSFEL_CONFIG_FILE, NATIVE
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+FEATURE_CACHE_FOLDER_NAME = 'feature_cache'
+DEFAULT_FOLDER_NAME = 'default' # folder used when the subject and the day are unknown
+PARQUET = '.parquet'
+
+# number of hexadecimal characters of the cache key that are used in the file names
+CACHE_KEY_LENGTH = 16
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def extract_features_cached(sensor_df: pd.DataFrame, sensors_to_load: List[str], w_size: float, fs: int,
+                            cache_dir: str, cache_name: str, window_mask: Optional[np.ndarray] = None,
+                            engine: str = NATIVE, feature_names: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Extracts the window features of an acquisition (see extract_features(...)) or reads them from the cache if they
+    were already extracted from the same data with the same settings. The features are stored in
+    '<cache_dir>/<cache_name>_<key>.parquet', where the key covers the data, the TSFEL configuration, the window size,
+    the sampling rate, and the window mask (see get_feature_cache_key(...)).
+
+    All features enabled in the TSFEL configuration are extracted and stored when the cache is created, so that other
+    models (feature_names) can reuse the same file. Only the requested columns are read from the cache. The files of the
+    acquisition that were stored with other keys (e.g., before the data or the configuration changed) are removed.
+
+    :param sensor_df: pandas dataframe with the (pre-processed) signals to extract the features from
+    :param sensors_to_load: list with the sensors to extract features from
+    :param w_size: the window size in seconds that should be used for windowing the data
+    :param fs: the sampling rate (in Hz) of the data
+    :param cache_dir: the folder in which the features are stored (e.g., get_feature_cache_dir(...))
+    :param cache_name: the name of the acquisition (e.g., the acquisition time)
+    :param window_mask: optional boolean array with one entry per (full) window (see extract_features(...)).
+                        Default: None
+    :param engine: the feature extraction engine ('native' or 'tsfel'). Default: 'native'
+    :param feature_names: optional list with the names of the features that are returned. Default: None (all features)
+    :return: a dataframe containing the extracted features
+    """
+
+    # get the path of the cached features
+    cache_key = get_feature_cache_key(sensor_df, sensors_to_load, w_size, fs, window_mask)
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, f"{cache_name}_{cache_key}{PARQUET}")
+
+    # read the (requested) features from the cache
+    if os.path.isfile(cache_path):
+
+        return pd.read_parquet(cache_path, columns=None if feature_names is None else list(feature_names))
+
+    # extract all features
+    features_df = extract_features(sensor_df, sensors_to_load=sensors_to_load, w_size=w_size, fs=fs,
+                                   window_mask=window_mask, engine=engine)
+
+    # store the features (written to a temporary file first, so that no partial files are left behind)
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    features_df.to_parquet(temporary_path, index=False)
+    os.replace(temporary_path, cache_path)
+
+    # remove the features that were cached with other keys (replaced by the new file)
+    _remove_stale_cache_files(cache_dir, cache_name, cache_key)
+
+    if feature_names is not None:
+        return features_df[list(feature_names)]
+
+    return features_df
+
+
+def get_feature_cache_key(sensor_df: pd.DataFrame, sensors_to_load: List[str], w_size: float, fs: int,
+                          window_mask: Optional[np.ndarray] = None) -> str:
+    """
+    Gets the cache key of the features of an acquisition. The key is a hash of the signals that are used for the feature
+    extraction (names and values), the content of the TSFEL configuration file, the window size, the sampling rate, and
+    the window mask. A change of any of these results in a different key.
+
+    :param sensor_df: pandas dataframe with the (pre-processed) signals to extract the features from
+    :param sensors_to_load: list with the sensors to extract features from
+    :param w_size: the window size in seconds
+    :param fs: the sampling rate (in Hz) of the data
+    :param window_mask: optional boolean array with one entry per (full) window. Default: None
+    :return: the key (hexadecimal string of CACHE_KEY_LENGTH characters)
+    """
+
+    # get the signals that are used
+    sensor_cols = [col for col in sensor_df.columns if any(word in col for word in sensors_to_load)]
+    sensor_data = np.ascontiguousarray(sensor_df[sensor_cols].to_numpy())
+
+    # hash the signals and the settings
+    key_hash = hashlib.sha256()
+    key_hash.update(repr((sensor_cols, str(sensor_data.dtype), sensor_data.shape, float(w_size), fs)).encode())
+    key_hash.update(sensor_data.tobytes())
+    key_hash.update(_hash_file(os.path.join(Path(__file__).parent, TSFEL_CONFIG_FILE)).encode())
+
+    if window_mask is not None:
+        key_hash.update(np.asarray(window_mask, dtype=bool).tobytes())
+
+    return key_hash.hexdigest()[:CACHE_KEY_LENGTH]
+
+
+def get_feature_cache_dir(folder_path: Optional[str] = None) -> str:
+    """
+    Gets the cache folder of the features of a subject on a given day: HAR/feature_cache/<group>/<subject>/<day>.
+    Without a folder path, the default folder HAR/feature_cache/default is returned (used by the classifier when no
+    cache folder is given).
+
+    :param folder_path: path to the folder containing the data of the day (e.g., '.../group1/sensors/LIBPhys #001/2025-09-23').
+                        Default: None (default folder)
+    :return: the path to the cache folder
+    """
+
+    if folder_path is None:
+        return os.path.join(Path(__file__).parent, FEATURE_CACHE_FOLDER_NAME, DEFAULT_FOLDER_NAME)
+
+    # get the subject and the day from the path
+    folder_path = Path(folder_path)
+
+    return os.path.join(Path(__file__).parent, FEATURE_CACHE_FOLDER_NAME, get_group_from_path(str(folder_path)),
+                        folder_path.parent.name, folder_path.name)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _remove_stale_cache_files(cache_dir: str, cache_name: str, cache_key: str) -> None:
+    """
+    Removes the cached features of an acquisition that were stored with other keys ('<cache_name>_<other key>.parquet').
+    :param cache_dir: the folder in which the features are stored
+    :param cache_name: the name of the acquisition
+    :param cache_key: the key of the current file (kept)
+    :return: None
+    """
+
+    # get the files of the acquisition (name followed by a key of CACHE_KEY_LENGTH characters)
+    pattern = os.path.join(glob.escape(cache_dir), f"{glob.escape(cache_name)}_{'?' * CACHE_KEY_LENGTH}{PARQUET}")
+    current_file = f"{cache_name}_{cache_key}{PARQUET}"
+
+    for cache_path in glob.glob(pattern):
+        if os.path.basename(cache_path) != current_file:
+
+            # the file may have been removed by another process in the meantime
+            try:
+                os.remove(cache_path)
+
+            except FileNotFoundError:
+                pass
+
+
+@lru_cache(maxsize=None)
+def _hash_file(file_path: str) -> str:
+    """
+    Computes the hash of the content of a file (memoized, as the configuration file does not change while running).
+    :param file_path: the path to the file
+    :return: the hash (hexadecimal string)
+    """
+
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
@@ -1,14 +1,15 @@
 """
-Functions to extract and preprocess features from smartphone sensor data using the TSFEL library.
+Functions to extract and preprocess features from smartphone sensor data using the TSFEL library (or its native
+vectorized implementation of the production features, see native_features.py).
 
 Available Functions
 -------------------
 [Public]
-extract_features(...): Extracts time-series features from smartphone sensor data using TSFEL.
+extract_features(...): Extracts time-series features from smartphone sensor data using TSFEL (or the native engine).
 trim_data(...): Trims sensor data so that the length is compatible with full windowing.
 ------------------
 [Private]
-None
+_select_features(...): Disables the features of a TSFEL configuration that are not needed.
 ------------------
 """
 # ------------------------------------------------------------------------------------------------------------------- #
@@ -17,23 +18,32 @@ None
 import pandas as pd
 import tsfel
 import numpy as np
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 import os
+import copy
 from pathlib import Path
 
 # internal imports
 from utils import load_json_file
+from .native_features import extract_native_features, has_native_features, get_required_features
 
 # ------------------------------------------------------------------------------------------------------------------- #
 # constants
 # ------------------------------------------------------------------------------------------------------------------- #
 TSFEL_CONFIG_FILE = 'cfg_file_production_model.json'
 
+# feature extraction engines
+NATIVE = 'native'
+TSFEL = 'tsfel'
+FEATURE_ENGINES = [NATIVE, TSFEL]
+
 
 # ------------------------------------------------------------------------------------------------------------------- #
 # public functions
 # ------------------------------------------------------------------------------------------------------------------- #
-def extract_features(sensor_df: pd.DataFrame, sensors_to_load: List[str], w_size: float, fs: int) -> pd.DataFrame:
+def extract_features(sensor_df: pd.DataFrame, sensors_to_load: List[str], w_size: float, fs: int,
+                     window_mask: Optional[np.ndarray] = None, engine: str = NATIVE,
+                     feature_names: Optional[List[str]] = None) -> pd.DataFrame:
     """
     Extracts features from smartphone sensors.
 
@@ -41,12 +51,30 @@ def extract_features(sensor_df: pd.DataFrame, sensors_to_load: List[str], w_size
     requires that sensor_df has sensor data from the sensors defined in SENSORS_TO_LOAD.
     Other sensors besides SENSORS_TO_LOAD are ignored.
 
+    By default, the features are computed by the native engine, which computes the features of all windows and channels
+    at once and gives the same results and column names as TSFEL. If the configuration enables features that are not
+    implemented natively, TSFEL is used.
+
+    If feature_names is provided (e.g., the feature_names_in_ of the model), only the (feature, channel) pairs needed
+    for these features are computed, and the features are returned in the same order.
+
     :param sensor_df: pandas dataframe with the signals to extract the features from
     :param sensors_to_load: list with the sensors to extract features from
     :param w_size: the window size in seconds that should be used for windowing the data
     :param fs: the sampling rate (in Hz) of the data
+    :param window_mask: optional boolean array with one entry per (full) window. If provided, the features are only
+                        extracted from the windows marked as True (e.g., worn periods, see get_window_mask(...)).
+                        Default: None
+    :param engine: the feature extraction engine ('native' or 'tsfel'). Default: 'native'
+    :param feature_names: optional list with the names of the features that are needed. Default: None (all features
+                          enabled in the TSFEL configuration of all channels of sensors_to_load)
     :return: a dataframe containing the extracted features
     """
+    # check the engine
+    if engine not in FEATURE_ENGINES:
+        raise ValueError(f"The feature extraction engine '{engine}' is not supported. "
+                         f"Supported engines: {FEATURE_ENGINES}")
+
     # get the features to be extracted TSFEL
     features_dict = load_json_file(os.path.join(Path(__file__).parent, TSFEL_CONFIG_FILE))
 
@@ -62,6 +90,14 @@ def extract_features(sensor_df: pd.DataFrame, sensors_to_load: List[str], w_size
             f"Expected sensors: {sensors_to_load}, got dataframe columns: {list(sensor_df.columns)}"
         )
 
+    # get the (feature, channel) pairs that are needed and drop the features and channels that are not
+    required_features = None
+    if feature_names is not None:
+        required_features = get_required_features(feature_names, sensor_cols, features_dict)
+        features_dict = _select_features(features_dict, list(required_features.keys()))
+        sensor_df = sensor_df[[col for col in sensor_cols
+                               if any(col in channels for channels in required_features.values())]]
+
     # convert data to numpy array
     sensor_data = sensor_df.to_numpy()
 
@@ -71,9 +107,24 @@ def extract_features(sensor_df: pd.DataFrame, sensors_to_load: List[str], w_size
     # trim data to accommodate full windowing of the signals
     sensor_data, _ = trim_data(sensor_data, w_size=w_size, fs=fs)
 
+    # keep only the selected windows (the windows do not overlap, thus they can be concatenated)
+    if window_mask is not None:
+        n_channels = sensor_data.shape[1]
+        sensor_data = sensor_data.reshape(-1, int(w_size * fs), n_channels)[window_mask].reshape(-1, n_channels)
+
+    # window the signals and extract features using the native engine
+    if engine == NATIVE and has_native_features(features_dict):
+        features_df = extract_native_features(sensor_data, sensor_names, features_dict, w_size=w_size, fs=fs,
+                                              required_features=required_features)
+
     # window the signals and extract features using TSFEL
-    features_df = tsfel.time_series_features_extractor(features_dict, sensor_data, window_size=int(w_size * fs), fs=fs,
-                                                    header_names=sensor_names)
+    else:
+        features_df = tsfel.time_series_features_extractor(features_dict, sensor_data, window_size=int(w_size * fs),
+                                                           fs=fs, header_names=sensor_names)
+
+    # return only the requested features (in the requested order)
+    if feature_names is not None:
+        return features_df[list(feature_names)]
 
     return features_df
 
@@ -91,4 +142,25 @@ def trim_data(data: np.ndarray, w_size: float, fs: int) -> Tuple[np.ndarray, int
     # calculate the amount that has to be trimmed of the signal
     to_trim = int(data.shape[0] % (w_size * fs))
 
-    return data[:-to_trim, :], to_trim
+    return data[:data.shape[0] - to_trim, :], to_trim
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _select_features(features_dict: dict, features: List[str]) -> dict:
+    """
+    Disables the features of a TSFEL configuration that are not needed.
+    :param features_dict: the TSFEL configuration
+    :param features: the names of the features that are needed
+    :return: a copy of the TSFEL configuration in which only the needed features are enabled
+    """
+
+    # copy the configuration (the original is not changed)
+    selected_dict = copy.deepcopy(features_dict)
+
+    for domain_features in selected_dict.values():
+        for feature, settings in domain_features.items():
+            if feature not in features:
+                settings['use'] = 'no'
+
+    return selected_dict
@@ -0,0 +1,224 @@
+"""
+Flattened (array-based) evaluation of the trained Random Forest model.
+
+The trees of a RandomForestClassifier are compiled into contiguous node arrays (feature, threshold, children, and leaf
+class probabilities) that are shared by all trees. A batch of windows is then classified by moving all (window, tree)
+pairs one level down the trees at a time with NumPy, instead of evaluating each tree separately. The probabilities are
+identical to the ones of RandomForestClassifier.predict_proba(...).
+
+Available Classes
+-------------------
+[Public]
+FlatRandomForest: Random Forest whose trees are stored in flattened node arrays.
+------------------
+
+Available Functions
+-------------------
+[Public]
+compile_random_forest(...): Compiles a trained RandomForestClassifier into a FlatRandomForest.
+------------------
+"""
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree._tree import TREE_LEAF
+from typing import Union
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+# number of windows that are classified at once (bounds the memory used by the (window, tree) pairs)
+SAMPLES_PER_BATCH = 1024
+
+# number of levels after which the (window, tree) pairs that reached a leaf are removed
+LEVELS_PER_COMPACTION = 4
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public classes
+# ------------------------------------------------------------------------------------------------------------------- #
+class FlatRandomForest:
+    """
+    Random Forest whose trees are stored in flattened node arrays. The nodes of all trees are concatenated (the children
+    indices point into the concatenated arrays) and the leaves store the class probabilities of the tree.
+
+    The evaluator starts all (window, tree) pairs at the roots of the trees and moves the pairs that did not reach a leaf
+    yet one level down per iteration. The leaf probabilities are then summed tree by tree and divided by the number of
+    trees, which is the same (floating point) computation as RandomForestClassifier.predict_proba(...).
+
+    Since the object has the same prediction interface (predict(...), predict_proba(...), classes_, feature_names_in_,
+    and n_jobs), it can be used in place of the RandomForestClassifier it was compiled from (n_jobs is only kept for
+    compatibility, the evaluation runs in the calling thread). The evaluator has a lower latency than sklearn for small
+    batches (e.g., a few windows), whereas sklearn has a higher throughput for large batches (see main_benchmarks.py).
+
+    Example:
+        flat_model = compile_random_forest(har_model)
+        y_pred_proba = flat_model.predict_proba(features_df)
+    """
+
+    def __init__(self, model: RandomForestClassifier):
+        """
+        :param model: the trained RandomForestClassifier (single output)
+        """
+
+        # check the model
+        if model.n_outputs_ != 1:
+            raise ValueError(f"Only single output models can be compiled. The model has {model.n_outputs_} outputs.")
+
+        self.classes_ = model.classes_
+        self.n_classes_ = model.n_classes_
+        self.n_features_in_ = model.n_features_in_
+        self.feature_names_in_ = getattr(model, 'feature_names_in_', None)
+        self.n_jobs = model.n_jobs
+        self.n_trees = len(model.estimators_)
+
+        # get the node arrays of each tree
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        node_counts = np.array([tree.node_count for tree in trees])
+
+        # index of the first node of each tree in the concatenated arrays (root of the tree)
+        self.roots = np.concatenate(([0], np.cumsum(node_counts)[:-1])).astype(np.intp)
+
+        # split feature of each node (-1 for the leaves)
+        self.feature = np.concatenate([np.where(tree.children_left == TREE_LEAF, -1, tree.feature)
+                                       for tree in trees]).astype(np.intp)
+
+        # thresholds rounded down to float32 (for a float32 value x and a double threshold t, x <= t is the same as
+        # x <= float32(t) rounded down, thus the comparison gives the same result as in the sklearn trees)
+        threshold = np.concatenate([tree.threshold for tree in trees])
+        self.threshold = threshold.astype(np.float32)
+        rounded_up = self.threshold.astype(np.float64) > threshold
+        self.threshold[rounded_up] = np.nextafter(self.threshold[rounded_up], np.float32(-np.inf))
+
+        # left and right child of each node next to each other (index 2 * node for the left and 2 * node + 1 for the
+        # right child), shifted to the indices of the concatenated arrays. The children of a leaf are the leaf itself,
+        # thus the pairs that reached a leaf stay there until they are removed.
+        self.children = np.concatenate([np.column_stack((np.where(tree.children_left == TREE_LEAF,
+                                                                  np.arange(tree.node_count), tree.children_left),
+                                                         np.where(tree.children_right == TREE_LEAF,
+                                                                  np.arange(tree.node_count), tree.children_right)))
+                                        + root for tree, root in zip(trees, self.roots)]).ravel().astype(np.intp)
+
+        # side to which the missing values (NaN) are sent (only models trained with missing values send them left)
+        self.missing_go_to_left = np.concatenate([np.asarray(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count)),
+                                                             dtype=bool) for tree in trees])
+        self._has_missing_go_to_left = bool(self.missing_go_to_left.any())
+
+        # class probabilities of each node (same values as DecisionTreeClassifier.predict_proba(...))
+        self.value = np.ascontiguousarray(np.concatenate([tree.value[:, 0, :self.n_classes_] for tree in trees]))
+
+        # deepest level of all trees (upper bound on the number of iterations)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+    def predict_proba(self, features: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Gets the class probabilities of each window (see RandomForestClassifier.predict_proba(...)).
+
+        :param features: pandas dataframe or numpy.array of shape (n_samples, n_features) containing the features. The
+                         columns of a dataframe are selected by name (feature_names_in_).
+        :return: numpy.array of shape (n_samples, n_classes) containing the class probabilities
+        """
+
+        # get the features in the order used by the model (the trees compare float32 values)
+        if isinstance(features, pd.DataFrame) and self.feature_names_in_ is not None:
+            features = features[self.feature_names_in_]
+        features = np.ascontiguousarray(features, dtype=np.float32)
+
+        if features.ndim != 2 or features.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected features of shape (n_samples, {self.n_features_in_}), got {features.shape}.")
+
+        # classify the windows in batches
+        probabilities = [self._predict_batch_proba(features[start:start + SAMPLES_PER_BATCH])
+                         for start in range(0, features.shape[0], SAMPLES_PER_BATCH)]
+
+        if not probabilities:
+            return np.zeros((0, self.n_classes_))
+
+        return np.concatenate(probabilities, axis=0)
+
+    def predict(self, features: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Gets the class of each window (class with the highest probability, see RandomForestClassifier.predict(...)).
+
+        :param features: pandas dataframe or numpy.array of shape (n_samples, n_features) containing the features
+        :return: numpy.array containing the predicted classes
+        """
+
+        return self.classes_.take(np.argmax(self.predict_proba(features), axis=1), axis=0)
+
+    def _predict_batch_proba(self, features: np.ndarray) -> np.ndarray:
+        """
+        Gets the class probabilities of a batch of windows by traversing all trees level by level.
+        :param features: numpy.array of shape (n_samples, n_features) (float32, C-contiguous) containing the features
+        :return: numpy.array of shape (n_samples, n_classes) containing the class probabilities
+        """
+
+        n_samples = features.shape[0]
+
+        # start all (tree, window) pairs at the roots (tree-major order)
+        nodes = np.repeat(self.roots, n_samples)
+        pair_indices = np.arange(nodes.shape[0])
+
+        # position of the features of the window of each pair in the flattened feature matrix
+        feature_offsets = np.tile(np.arange(n_samples, dtype=np.intp) * self.n_features_in_, self.n_trees)
+        features = features.ravel()
+
+        # leaf reached by each pair
+        leaves = nodes.copy()
+
+        # split features of the current nodes (-1 for the leaves)
+        node_features = self.feature[nodes]
+
+        # move the pairs one level down the trees
+        level = 0
+        while nodes.size:
+
+            # get the value of the split feature (the value read for the pairs in a leaf is not used)
+            values = features[feature_offsets + node_features]
+
+            # go to the right child if the value is above the threshold (missing values go to the trained side)
+            go_right = ~(values <= self.threshold[nodes])
+            if self._has_missing_go_to_left:
+                go_right &= ~(np.isnan(values) & self.missing_go_to_left[nodes])
+
+            nodes = self.children[2 * nodes + go_right]
+
+            # get the split features of the children
+            node_features = self.feature[nodes]
+            level += 1
+
+            # store the pairs that reached a leaf and keep only the remaining pairs (every few levels, as most pairs
+            # reach a leaf in the deeper levels)
+            if level % LEVELS_PER_COMPACTION == 0 or level >= self.max_depth:
+                in_leaf = node_features < 0
+                leaves[pair_indices[in_leaf]] = nodes[in_leaf]
+                in_tree = ~in_leaf
+                nodes, pair_indices = nodes[in_tree], pair_indices[in_tree]
+                feature_offsets, node_features = feature_offsets[in_tree], node_features[in_tree]
+
+        # sum the leaf probabilities tree by tree (same summation order as RandomForestClassifier)
+        leaves = leaves.reshape(self.n_trees, n_samples)
+        probabilities = np.zeros((n_samples, self.n_classes_))
+        for tree_leaves in leaves:
+            probabilities += self.value[tree_leaves]
+
+        probabilities /= self.n_trees
+
+        return probabilities
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def compile_random_forest(model: RandomForestClassifier) -> FlatRandomForest:
+    """
+    Compiles a trained RandomForestClassifier into flattened node arrays (see FlatRandomForest).
+    :param model: the trained RandomForestClassifier
+    :return: the compiled model
+    """
+
+    return FlatRandomForest(model)
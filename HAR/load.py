@@ -6,30 +6,42 @@ Available Functions
 [Public]
 load_json_file(...): Loads a JSON file from into a dictionary.
 load_production_model(...): Loads a trained Random Forest model and returns the model object and the list of features it was trained on.
+get_har_model(...): Gets a model from the process-wide registry (each model is only loaded once per process).
+clear_model_registry(...): Removes all models from the registry.
 -------------------
 [Private]
-None
+_load_registered_model(...): Loads a model and keeps it in the registry (memoized).
 ------------------
 """
 # ------------------------------------------------------------------------------------------------------------------- #
 # imports
 # ------------------------------------------------------------------------------------------------------------------- #
-from typing import Tuple, List
+from typing import Tuple, List, Optional
+from functools import lru_cache
+import os
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+# memory-map the arrays of the model (read-only) instead of reading them into memory
+MODEL_MMAP_MODE = 'r'
+
 # ------------------------------------------------------------------------------------------------------------------- #
 # public functions
 # ------------------------------------------------------------------------------------------------------------------- #
 
-def load_production_model(model_path: str) -> Tuple[RandomForestClassifier, List[str]]:
+def load_production_model(model_path: str, mmap_mode: Optional[str] = None) -> Tuple[RandomForestClassifier, List[str]]:
     """
-    Loads the production model
+    Loads the production model. Use get_har_model(...) to avoid loading the same model more than once.
     :param model_path: path o the model
+    :param mmap_mode: optional memory-map mode passed to joblib.load(...) (e.g., 'r'). Only applies to models that were
+                      saved without compression. Default: None
     :return: a tuple containing the model and the list of features used
     """
     # load_signals the classifier
-    har_model = joblib.load(model_path)
+    har_model = joblib.load(model_path, mmap_mode=mmap_mode)
 
     # print model name
     print(f"model: {type(har_model).__name__}")
@@ -43,4 +55,46 @@ def load_production_model(model_path: str) -> Tuple[RandomForestClassifier, List
     print(f"\nnumber of features: {len(feature_names)}")
     print(f"features: {feature_names}")
 
-    return har_model, feature_names
\ No newline at end of file
+    return har_model, feature_names
+
+
+def get_har_model(model_path: str,
+                  mmap_mode: Optional[str] = MODEL_MMAP_MODE) -> Tuple[RandomForestClassifier, List[str]]:
+    """
+    Gets a model from the process-wide registry. The model is loaded (and its information printed) the first time it is
+    requested, and the same model object and feature names are returned by all following calls with the same path.
+    Loading the model before starting worker processes (fork) lets the workers share the model memory copy-on-write.
+    The returned model is shared, thus it must not be modified (e.g., re-fitted).
+
+    :param model_path: path to the model
+    :param mmap_mode: the memory-map mode passed to joblib.load(...). Default: 'r'
+    :return: a tuple containing the model and the list of features used (feature_names_in_)
+    """
+
+    # the same file is registered only once, independently of how the path is written
+    return _load_registered_model(os.path.realpath(model_path), mmap_mode)
+
+
+def clear_model_registry() -> None:
+    """
+    Removes all models from the registry (e.g., after a model file was replaced). The next call to get_har_model(...)
+    loads the model again.
+    :return: None
+    """
+
+    _load_registered_model.cache_clear()
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+
+@lru_cache(maxsize=None)
+def _load_registered_model(model_path: str, mmap_mode: Optional[str]) -> Tuple[RandomForestClassifier, List[str]]:
+    """
+    Loads a model and keeps it in the registry (memoized).
+    :param model_path: the resolved path to the model
+    :param mmap_mode: the memory-map mode passed to joblib.load(...)
+    :return: a tuple containing the model and the list of features used
+    """
+
+    return load_production_model(model_path, mmap_mode=mmap_mode)
@@ -0,0 +1,327 @@
+"""
+Functions to derive smaller variants of the production HAR model and to measure the trade-off between their accuracy and
+their size, load time, and inference latency.
+
+The variants are derived from the trained production forest: (1) the first n trees, (2) the trees capped at a maximum
+depth (the nodes at the maximum depth become leaves, which already store the class fractions of their samples), or
+(3) the same forest re-trained on the most important features only (requires the training data). The variants are
+saved next to the production model and can be selected by name (e.g., classify_human_activities(...,
+model_variant='trees_100')).
+
+Available Functions
+-------------------
+[Public]
+create_model_variants(...): Derives the smaller variants from the production model.
+get_tree_subset_model(...): Gets a model with the first n trees of a Random Forest.
+get_depth_capped_model(...): Gets a model in which the trees of a Random Forest are capped at a maximum depth.
+get_feature_pruned_model(...): Re-trains a Random Forest on its most important features.
+save_model_variants(...): Saves the variants next to the production model.
+get_model_variant_path(...): Gets the path of a model variant.
+evaluate_model_variants(...): Reports the accuracy, load time, memory footprint, and inference latency of model variants.
+------------------
+[Private]
+_cap_tree_depth(...): Caps a decision tree at a maximum depth.
+_get_model_memory(...): Gets the memory used by the node arrays of the trees of a Random Forest.
+------------------
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import copy
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.tree._tree import Tree, TREE_LEAF, TREE_UNDEFINED
+from typing import Dict, List, Optional, Sequence
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+# default variants
+TREE_COUNTS = (50, 100, 200)
+MAX_DEPTHS = (10, 15, 20)
+FEATURE_COUNTS = (10, 20)
+
+# variant names
+TREES_VARIANT = 'trees_{}'
+DEPTH_VARIANT = 'depth_{}'
+FEATURES_VARIANT = 'features_{}'
+
+# number of runs used for timing (the best run is reported)
+N_TIMING_REPEATS = 3
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def create_model_variants(model: RandomForestClassifier, tree_counts: Sequence[int] = TREE_COUNTS,
+                          max_depths: Sequence[int] = MAX_DEPTHS, feature_counts: Sequence[int] = FEATURE_COUNTS,
+                          train_features: Optional[pd.DataFrame] = None,
+                          train_labels: Optional[np.ndarray] = None) -> Dict[str, RandomForestClassifier]:
+    """
+    Derives smaller variants from the production model: one variant per number of trees ('trees_<n>'), per maximum
+    depth ('depth_<d>'), and per number of features ('features_<k>'). The feature-pruned variants are only created if
+    the training data is provided, as they have to be re-trained.
+
+    :param model: the production model
+    :param tree_counts: the numbers of trees of the tree subset variants. Default: (50, 100, 200)
+    :param max_depths: the maximum depths of the depth-capped variants. Default: (10, 15, 20)
+    :param feature_counts: the numbers of features of the feature-pruned variants. Default: (10, 20)
+    :param train_features: optional dataframe with the features of the training windows (columns named as the model
+                           features). Default: None (no feature-pruned variants)
+    :param train_labels: optional array with the labels of the training windows. Default: None
+    :return: dictionary with the variant names as keys and the models as values
+    """
+
+    # dictionary for holding the variants
+    variants = {}
+
+    # models with fewer trees
+    for n_trees in tree_counts:
+        if n_trees < len(model.estimators_):
+            variants[TREES_VARIANT.format(n_trees)] = get_tree_subset_model(model, n_trees)
+
+    # models with shallower trees
+    for max_depth in max_depths:
+        variants[DEPTH_VARIANT.format(max_depth)] = get_depth_capped_model(model, max_depth)
+
+    # models with fewer features (re-trained)
+    if train_features is not None and train_labels is not None:
+        for n_features in feature_counts:
+            if n_features < model.n_features_in_:
+                variants[FEATURES_VARIANT.format(n_features)] = get_feature_pruned_model(model, n_features,
+                                                                                         train_features, train_labels)
+
+    return variants
+
+
+def get_tree_subset_model(model: RandomForestClassifier, n_trees: int) -> RandomForestClassifier:
+    """
+    Gets a model with the first n trees of a Random Forest. Since each tree is trained on an independent bootstrap
+    sample, the first n trees are a random subset of the forest. The trees are shared with the original model.
+
+    :param model: the trained Random Forest
+    :param n_trees: the number of trees that are kept
+    :return: the model with n trees
+    """
+
+    # copy the model (the original model is not changed)
+    subset_model = copy.copy(model)
+    subset_model.estimators_ = model.estimators_[:n_trees]
+    subset_model.n_estimators = len(subset_model.estimators_)
+
+    return subset_model
+
+
+def get_depth_capped_model(model: RandomForestClassifier, max_depth: int) -> RandomForestClassifier:
+    """
+    Gets a model in which the trees of a Random Forest are capped at a maximum depth. The nodes at the maximum depth
+    become leaves that predict the class fractions of the training samples that reached them (no re-training needed).
+
+    :param model: the trained Random Forest
+    :param max_depth: the maximum depth of the trees
+    :return: the model with the capped trees
+    """
+
+    # copy the model (the original model is not changed)
+    capped_model = copy.copy(model)
+    capped_model.estimators_ = [_cap_tree_depth(estimator, max_depth) for estimator in model.estimators_]
+    capped_model.max_depth = max_depth
+
+    return capped_model
+
+
+def get_feature_pruned_model(model: RandomForestClassifier, n_features: int, train_features: pd.DataFrame,
+                             train_labels: np.ndarray) -> RandomForestClassifier:
+    """
+    Re-trains a Random Forest (same hyperparameters) on its n most important features (feature_importances_). Besides
+    the smaller model, fewer features have to be extracted for the classification.
+
+    :param model: the trained Random Forest
+    :param n_features: the number of features that are kept
+    :param train_features: dataframe with the features of the training windows (columns named as the model features)
+    :param train_labels: array with the labels of the training windows
+    :return: the re-trained model
+    """
+
+    # get the most important features (kept in the order of the model)
+    important = np.sort(np.argsort(model.feature_importances_)[::-1][:n_features])
+    feature_names = list(model.feature_names_in_[important])
+
+    return clone(model).fit(train_features[feature_names], train_labels)
+
+
+def save_model_variants(variants: Dict[str, RandomForestClassifier], model_path: str) -> List[str]:
+    """
+    Saves the variants next to the production model (see get_model_variant_path(...)). The models are saved without
+    compression, so that they can be memory-mapped when loaded (see get_har_model(...)).
+
+    :param variants: dictionary with the variant names as keys and the models as values (see create_model_variants(...))
+    :param model_path: the path to the production model
+    :return: list with the paths of the saved models
+    """
+
+    # list for holding the paths
+    variant_paths = []
+
+    for variant, variant_model in variants.items():
+
+        variant_path = get_model_variant_path(model_path, variant)
+        joblib.dump(variant_model, variant_path)
+        variant_paths.append(variant_path)
+
+    return variant_paths
+
+
+def get_model_variant_path(model_path: str, model_variant: Optional[str] = None) -> str:
+    """
+    Gets the path of a model variant: '<model name>_<variant>.joblib' in the folder of the production model
+    (e.g., 'HAR_model_500_trees_100.joblib').
+
+    :param model_path: the path to the production model
+    :param model_variant: the name of the variant. Default: None (production model)
+    :return: the path of the variant
+    """
+
+    if model_variant is None:
+        return model_path
+
+    model_path = Path(model_path)
+
+    return str(model_path.with_name(f"{model_path.stem}_{model_variant}{model_path.suffix}"))
+
+
+def evaluate_model_variants(model_paths: Dict[str, str], features_df: pd.DataFrame, labels: np.ndarray,
+                            latency_batch_size: int = 1) -> pd.DataFrame:
+    """
+    Reports the accuracy of each model (on a labelled evaluation set) against its load time, file size, memory
+    footprint (node arrays of the trees), latency (time to classify latency_batch_size windows), and throughput
+    (windows per second when classifying the whole evaluation set).
+
+    :param model_paths: dictionary with the names of the models as keys and their paths as values
+                        (e.g., {'production': path, 'trees_100': get_model_variant_path(path, 'trees_100')})
+    :param features_df: dataframe with the features of the evaluation windows (containing the features of all models)
+    :param labels: array with the labels of the evaluation windows
+    :param latency_batch_size: the number of windows used for measuring the latency. Default: 1
+    :return: dataframe with one row per model
+    """
+
+    # list for holding the results of each model
+    results = []
+
+    for name, model_path in model_paths.items():
+
+        # load the model
+        start = time.perf_counter()
+        model = joblib.load(model_path)
+        load_time = time.perf_counter() - start
+
+        # get the features used by the model
+        model_features = features_df[model.feature_names_in_]
+
+        # time the classification of a few windows and of all windows
+        latencies, run_times = [], []
+        for _ in range(N_TIMING_REPEATS):
+
+            start = time.perf_counter()
+            model.predict_proba(model_features.iloc[:latency_batch_size])
+            latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            y_pred = model.predict(model_features)
+            run_times.append(time.perf_counter() - start)
+
+        results.append({'model': name,
+                        'n_trees': len(model.estimators_),
+                        'n_nodes': sum(estimator.tree_.node_count for estimator in model.estimators_),
+                        'n_features': model.n_features_in_,
+                        'accuracy': accuracy_score(labels, y_pred),
+                        'f1_macro': f1_score(labels, y_pred, average='macro'),
+                        'load_time_s': load_time,
+                        'file_size_mb': os.path.getsize(model_path) / 1e6,
+                        'memory_mb': _get_model_memory(model) / 1e6,
+                        'latency_ms': min(latencies) * 1e3,
+                        'throughput_windows_s': len(model_features) / min(run_times)})
+
+    return pd.DataFrame(results).set_index('model')
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _cap_tree_depth(estimator: DecisionTreeClassifier, max_depth: int) -> DecisionTreeClassifier:
+    """
+    Caps a decision tree at a maximum depth. The nodes deeper than max_depth are removed and the nodes at max_depth
+    become leaves.
+    :param estimator: the trained decision tree
+    :param max_depth: the maximum depth
+    :return: a copy of the decision tree with the capped tree
+    """
+
+    # get the node arrays of the tree
+    tree = estimator.tree_
+    state = tree.__getstate__()
+    nodes = state['nodes']
+
+    # the tree is not deeper than max_depth
+    if state['max_depth'] <= max_depth:
+        return estimator
+
+    # get the depth of each node (level by level, starting at the root)
+    depth = np.full(state['node_count'], -1)
+    level_nodes = np.array([0])
+    level = 0
+    while level_nodes.size:
+        depth[level_nodes] = level
+        level_nodes = level_nodes[nodes['left_child'][level_nodes] != TREE_LEAF]
+        level_nodes = np.concatenate((nodes['left_child'][level_nodes], nodes['right_child'][level_nodes]))
+        level += 1
+
+    # keep the nodes up to max_depth (in the same order) and get their new indices
+    keep = (depth >= 0) & (depth <= max_depth)
+    new_indices = np.cumsum(keep) - 1
+    capped_nodes = nodes[keep].copy()
+    capped_depth = depth[keep]
+
+    # turn the nodes at max_depth into leaves
+    new_leaves = (capped_depth == max_depth) & (capped_nodes['left_child'] != TREE_LEAF)
+    capped_nodes['left_child'][new_leaves] = TREE_LEAF
+    capped_nodes['right_child'][new_leaves] = TREE_LEAF
+    capped_nodes['feature'][new_leaves] = TREE_UNDEFINED
+    capped_nodes['threshold'][new_leaves] = TREE_UNDEFINED
+    capped_nodes['missing_go_to_left'][new_leaves] = 0
+
+    # point the children to the new indices
+    is_split = capped_nodes['left_child'] != TREE_LEAF
+    capped_nodes['left_child'][is_split] = new_indices[capped_nodes['left_child'][is_split]]
+    capped_nodes['right_child'][is_split] = new_indices[capped_nodes['right_child'][is_split]]
+
+    # create the capped tree
+    capped_tree = Tree(*tree.__reduce__()[1])
+    capped_tree.__setstate__({'max_depth': max_depth,
+                              'node_count': int(keep.sum()),
+                              'nodes': capped_nodes,
+                              'values': np.ascontiguousarray(state['values'][keep])})
+
+    # copy the estimator (the original estimator is not changed)
+    capped_estimator = copy.copy(estimator)
+    capped_estimator.tree_ = capped_tree
+    capped_estimator.max_depth = max_depth
+
+    return capped_estimator
+
+
+def _get_model_memory(model: RandomForestClassifier) -> int:
+    """
+    Gets the memory used by the node arrays (nodes and values) of the trees of a Random Forest.
+    :param model: the Random Forest
+    :return: the memory in bytes
+    """
+
+    return sum(estimator.tree_.__getstate__()['nodes'].nbytes + estimator.tree_.value.nbytes
+               for estimator in model.estimators_)
@@ -0,0 +1,320 @@
+"""
+Vectorized implementation of the TSFEL features used by the production HAR model. The features of all windows and
+channels are computed at once and give the same results (and column names) as tsfel.time_series_features_extractor(...).
+
+Available Functions
+-------------------
+[Public]
+extract_native_features(...): Extracts the features enabled in a TSFEL configuration from non-overlapping windows.
+get_required_features(...): Resolves the (feature, channel) pairs that are needed for a list of feature names.
+has_native_features(...): Checks whether all features enabled in a TSFEL configuration have a native implementation.
+------------------
+[Private]
+_get_enabled_features(...): Gets the enabled features of a TSFEL configuration.
+_compute_batch_features(...): Computes the features of a batch of windows.
+_select_channels(...): Selects channels of a batch of windows.
+_get_welch_psd(...): Computes the PSD of the standardized windows as done by the TSFEL spectral features.
+_get_median_frequency(...): Computes the median frequency of the windows (tsfel.median_frequency).
+_get_power_bandwidth(...): Computes the power bandwidth of the windows (tsfel.power_bandwidth).
+------------------
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+from typing import Dict, List, Tuple, Optional
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+# TSFEL functions that are implemented natively
+MAX_POWER_SPECTRUM = 'max_power_spectrum'
+MEDIAN_FREQUENCY = 'median_frequency'
+POWER_BANDWIDTH = 'power_bandwidth'
+INTERQUARTILE_RANGE = 'interq_range'
+MAX = 'calc_max'
+MIN = 'calc_min'
+VARIANCE = 'calc_var'
+NATIVE_FEATURES = [MAX_POWER_SPECTRUM, MEDIAN_FREQUENCY, POWER_BANDWIDTH, INTERQUARTILE_RANGE, MAX, MIN, VARIANCE]
+
+# features that are computed from the welch PSD of the standardized windows
+WELCH_FEATURES = [MAX_POWER_SPECTRUM, POWER_BANDWIDTH]
+
+# fraction of the power inside the power bandwidth and of the magnitude below the median frequency
+BANDWIDTH_POWER_FRACTION = 0.95
+MEDIAN_FRACTION = 0.5
+
+# number of windows that are processed at once (bounds the memory of the spectra)
+WINDOWS_PER_BATCH = 2 ** 10
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def extract_native_features(sensor_data: np.ndarray, sensor_names: List[str], features_dict: Dict, w_size: float,
+                            fs: int, required_features: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+    """
+    Extracts the features enabled in a TSFEL configuration from non-overlapping windows of all channels. The windows are
+    taken as strided views of the signals, and each feature is computed for a batch of windows of all channels in a
+    single vectorized call. Max power spectrum and Power bandwidth share the same (batched) welch PSD. The result is
+    the same as the one of tsfel.time_series_features_extractor(features_dict, sensor_data, window_size=w_size * fs,
+    fs=fs, header_names=sensor_names). Only full windows are used.
+
+    If required_features is provided (see get_required_features(...)), only the listed (feature, channel) pairs are
+    computed.
+
+    :param sensor_data: (MxN) array, where M is the signal length in samples and N is the number of channels
+    :param sensor_names: the names of the N channels (used as prefix of the feature names)
+    :param features_dict: the TSFEL configuration (only features listed in NATIVE_FEATURES can be enabled)
+    :param w_size: the window size in seconds
+    :param fs: the sampling rate (in Hz) of the data
+    :param required_features: optional dictionary {feature: [channel, ...]} with the channels of each feature that
+                              should be computed. Default: None (all enabled features of all channels)
+    :return: a dataframe containing the features (one row per window and one column per channel and feature)
+    """
+
+    # get the enabled features
+    enabled_features = _get_enabled_features(features_dict)
+
+    missing_features = [function for _, function in enabled_features if function not in NATIVE_FEATURES]
+    if missing_features:
+        raise ValueError(f"The following features have no native implementation: {missing_features}. "
+                         f"Supported features: {NATIVE_FEATURES}")
+
+    # get the channels of each feature
+    sensor_names = list(sensor_names)
+    if required_features is None:
+        required_features = {feature: sensor_names for feature, _ in enabled_features}
+
+    feature_channels = {function: [sensor_names.index(channel) for channel in required_features[feature]]
+                        for feature, function in enabled_features if required_features.get(feature)}
+
+    # get the channels that are needed by at least one feature
+    used_channels = sorted(set().union(*feature_channels.values()))
+
+    # position of the channels of each feature among the used channels
+    feature_positions = {function: [used_channels.index(channel) for channel in channels]
+                         for function, channels in feature_channels.items()}
+
+    # get the windows (windows x channels x window length)
+    sensor_data = np.asarray(sensor_data, dtype=np.float64)
+    window_length = int(w_size * fs)
+    windows = sliding_window_view(sensor_data, window_length, axis=0)[::window_length]
+
+    # dictionary for holding the features of each function (windows x channels of the feature)
+    features = {function: np.empty((windows.shape[0], len(channels)))
+                for function, channels in feature_channels.items()}
+
+    # cycle over the batches of windows
+    for start in range(0, windows.shape[0], WINDOWS_PER_BATCH):
+
+        # copy the used channels of the batch (contiguous windows are reduced in the same order as by TSFEL)
+        batch_windows = np.ascontiguousarray(windows[start:start + WINDOWS_PER_BATCH][:, used_channels])
+        batch_features = _compute_batch_features(batch_windows, fs, feature_positions)
+
+        for function, values in batch_features.items():
+            features[function][start:start + WINDOWS_PER_BATCH] = values
+
+    # create the dataframe ('<channel>_<feature>' columns)
+    features_df = pd.DataFrame({f"{sensor_names[channel]}_{feature}": features[function][:, position]
+                                for feature, function in enabled_features if function in feature_channels
+                                for position, channel in enumerate(feature_channels[function])},
+                               index=pd.RangeIndex(windows.shape[0]))
+
+    # same column order as TSFEL (sorted by name)
+    return features_df.reindex(sorted(features_df.columns), axis=1)
+
+
+def get_required_features(feature_names: List[str], sensor_names: List[str],
+                          features_dict: Dict) -> Dict[str, List[str]]:
+    """
+    Resolves the (feature, channel) pairs that are needed to obtain a list of feature names (e.g., the
+    feature_names_in_ of a model). The feature names have the format '<channel>_<feature>' (or '<channel>_<feature>_<i>'
+    for TSFEL features with more than one output), where the feature is enabled in the TSFEL configuration.
+
+    :param feature_names: the names of the features that are needed
+    :param sensor_names: the names of the available channels
+    :param features_dict: the TSFEL configuration
+    :return: dictionary {feature: [channel, ...]} with the channels (in the order of sensor_names) of each feature
+    """
+
+    # try the longest names first (e.g., 'Max power spectrum' before 'Max')
+    features = sorted((feature for feature, _ in _get_enabled_features(features_dict)), key=len, reverse=True)
+    channels = sorted(sensor_names, key=len, reverse=True)
+
+    # dictionary for holding the channels of each feature
+    required_features = {}
+    unresolved_names = []
+
+    for feature_name in feature_names:
+
+        # find the channel and the feature of the name
+        match = next(((channel, feature) for channel in channels if feature_name.startswith(f"{channel}_")
+                      for feature in features
+                      if feature_name[len(channel) + 1:] == feature
+                      or feature_name[len(channel) + 1:].startswith(f"{feature}_")), None)
+
+        if match is None:
+            unresolved_names.append(feature_name)
+        else:
+            required_features.setdefault(match[1], set()).add(match[0])
+
+    if unresolved_names:
+        raise ValueError(f"The following features cannot be extracted from the available channels and the TSFEL "
+                         f"configuration: {unresolved_names}")
+
+    return {feature: [channel for channel in sensor_names if channel in feature_channels]
+            for feature, feature_channels in required_features.items()}
+
+
+def has_native_features(features_dict: Dict) -> bool:
+    """
+    Checks whether all features enabled in a TSFEL configuration have a native implementation.
+    :param features_dict: the TSFEL configuration
+    :return: True if all enabled features can be extracted by extract_native_features(...)
+    """
+
+    return all(function in NATIVE_FEATURES for _, function in _get_enabled_features(features_dict))
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_enabled_features(features_dict: Dict) -> List[Tuple[str, str]]:
+    """
+    Gets the enabled features of a TSFEL configuration.
+    :param features_dict: the TSFEL configuration
+    :return: list of tuples containing the feature name and the TSFEL function name (without the 'tsfel.' prefix)
+    """
+
+    return [(feature, settings['function'].replace('tsfel.', '', 1))
+            for domain_features in features_dict.values()
+            for feature, settings in domain_features.items() if settings['use'] == 'yes']
+
+
+def _compute_batch_features(windows: np.ndarray, fs: int,
+                            feature_channels: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    """
+    Computes the features of a batch of windows.
+    :param windows: array of shape (windows x channels x window length)
+    :param fs: the sampling rate (in Hz) of the data
+    :param feature_channels: dictionary {function: [channel, ...]} with the TSFEL function names of the features to be
+                             computed and the positions of their channels in windows
+    :return: dictionary {function: array of shape (windows x channels of the feature)}
+    """
+
+    # dictionary for holding the features
+    batch_features = {}
+
+    # statistical features
+    if VARIANCE in feature_channels:
+        batch_features[VARIANCE] = np.var(_select_channels(windows, feature_channels[VARIANCE]), axis=-1)
+
+    if MAX in feature_channels:
+        batch_features[MAX] = np.max(_select_channels(windows, feature_channels[MAX]), axis=-1)
+
+    if MIN in feature_channels:
+        batch_features[MIN] = np.min(_select_channels(windows, feature_channels[MIN]), axis=-1)
+
+    if INTERQUARTILE_RANGE in feature_channels:
+        upper_quartile, lower_quartile = np.percentile(_select_channels(windows, feature_channels[INTERQUARTILE_RANGE]),
+                                                       [75, 25], axis=-1)
+        batch_features[INTERQUARTILE_RANGE] = upper_quartile - lower_quartile
+
+    # spectral features
+    if MEDIAN_FREQUENCY in feature_channels:
+        batch_features[MEDIAN_FREQUENCY] = _get_median_frequency(
+            _select_channels(windows, feature_channels[MEDIAN_FREQUENCY]), fs)
+
+    welch_features = [function for function in WELCH_FEATURES if function in feature_channels]
+
+    if welch_features:
+
+        # compute the PSD once for both features (on the channels needed by at least one of them)
+        welch_channels = sorted(set().union(*(feature_channels[function] for function in welch_features)))
+        frequencies, psd = _get_welch_psd(_select_channels(windows, welch_channels), fs)
+
+        for function in welch_features:
+
+            # get the PSD of the channels of the feature
+            function_psd = psd[:, [welch_channels.index(channel) for channel in feature_channels[function]]]
+
+            if function == MAX_POWER_SPECTRUM:
+                batch_features[function] = np.max(function_psd, axis=-1)
+            else:
+                batch_features[function] = _get_power_bandwidth(frequencies, function_psd)
+
+    return batch_features
+
+
+def _select_channels(windows: np.ndarray, channels: List[int]) -> np.ndarray:
+    """
+    Selects channels of a batch of windows (without copy if all channels are selected in order).
+    :param windows: array of shape (windows x channels x window length)
+    :param channels: the positions of the channels
+    :return: array of shape (windows x len(channels) x window length)
+    """
+
+    if channels == list(range(windows.shape[1])):
+        return windows
+
+    return windows[:, channels]
+
+
+def _get_welch_psd(windows: np.ndarray, fs: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the PSD of the windows as done by the TSFEL spectral features: welch with a single segment (the whole
+    window) of the window divided by its standard deviation (unless the standard deviation is zero).
+    :param windows: array of shape (windows x channels x window length)
+    :param fs: the sampling rate (in Hz) of the data
+    :return: tuple containing the frequencies and the PSD of each window and channel
+    """
+
+    # standardize the windows (windows with constant values are kept)
+    std = np.std(windows, axis=-1, keepdims=True)
+    standardized = np.divide(windows, std, out=np.array(windows), where=std != 0)
+
+    return signal.welch(standardized, fs, nperseg=windows.shape[-1], axis=-1)
+
+
+def _get_median_frequency(windows: np.ndarray, fs: int) -> np.ndarray:
+    """
+    Computes the median frequency of the windows, i.e., the first frequency at which the cumulative FFT magnitude
+    exceeds half of the total (tsfel.median_frequency).
+    :param windows: array of shape (windows x channels x window length)
+    :param fs: the sampling rate (in Hz) of the data
+    :return: array of shape (windows x channels) containing the median frequencies
+    """
+
+    # magnitude spectrum
+    frequencies = np.fft.rfftfreq(windows.shape[-1], d=1 / fs)
+    cumulative_magnitude = np.cumsum(np.abs(np.fft.rfft(windows, axis=-1)), axis=-1)
+
+    # first frequency above half of the total magnitude (first frequency if there is none)
+    is_above = cumulative_magnitude > cumulative_magnitude[..., -1:] * MEDIAN_FRACTION
+
+    return frequencies[np.argmax(is_above, axis=-1)]
+
+
+def _get_power_bandwidth(frequencies: np.ndarray, psd: np.ndarray) -> np.ndarray:
+    """
+    Computes the width of the frequency band that contains 95 % of the power of each window (tsfel.power_bandwidth).
+    :param frequencies: the frequencies of the psd (Hz)
+    :param psd: array containing the power spectral densities along the last axis
+    :return: array containing the power bandwidth (0 for windows without power)
+    """
+
+    # cumulative power from the lowest and from the highest frequency
+    cumulative_power = np.cumsum(psd, axis=-1)
+    cumulative_power_inv = np.cumsum(psd[..., ::-1], axis=-1)
+    power_threshold = cumulative_power[..., -1:] * BANDWIDTH_POWER_FRACTION
+
+    # lower and upper limit of the band
+    f_lower = frequencies[np.argmax(cumulative_power >= power_threshold, axis=-1)]
+    f_upper = frequencies[psd.shape[-1] - 1 - np.argmax(cumulative_power_inv >= power_threshold, axis=-1)]
+
+    # windows without power have no bandwidth
+    return np.where(np.sum(psd, axis=-1) == 0, 0.0, np.abs(f_upper - f_lower))
@@ -0,0 +1,223 @@
+"""
+Functions to post-process the predictions of the HAR model (threshold tuning and heuristics-based label correction).
+The functions are shared by the classifier (see classify_human_activities(...)), the re-application of the
+post-processing to stored probabilities (see reapply_postprocessing(...)), and the tuning of the post-processing
+settings (see tune_postprocessing(...)).
+
+Available Functions
+-------------------
+[Public]
+apply_classification_pipeline(...): Applies the post-processing pipeline (threshold tuning and heuristics-based label correction) to the model predictions.
+postprocess_worn_windows(...): Applies the post-processing pipeline separately to each contiguous period of classified windows.
+get_worn_periods(...): Gets the contiguous periods of classified windows.
+threshold_tuning(...): Adjusts model predictions to reduce confusion between 'stand' and 'sit' based on a probability threshold.
+heuristics_correction(...): Post-processes predicted labels to correct short-duration segments.
+expand_classification(...): Expands windowed predictions to match the original signal length.
+correct_short_segments(...): Replaces short segments of a specific class with the neighboring class (run-length encoded).
+run_length_encode(...): Gets the contiguous segments (class and length) of a prediction array.
+-------------------
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+from typing import Tuple, List, Dict, Union
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+NON_WEAR_LABEL = -1 # label of the windows that were not classified (non-wear)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def apply_classification_pipeline(y_pred: np.ndarray, y_pred_proba: np.ndarray, w_size: float, threshold: float,
+                                  min_durations: Dict[int, float]) -> np.ndarray:
+    """
+    Applies classification pipeline to the predictions of the model (see predict_activities(...)). The classification
+    pipeline consists of:
+
+    1. Apply threshold tuning label correction
+    2. Apply heuristics-based label correction
+
+    :param y_pred: array containing the labels predicted by the Random Forest for each window
+    :param y_pred_proba: numpy.array of shape (n_samples, n_classes) containing the predicted probabilities
+    :param w_size: window size in seconds
+    :param threshold: The probability margin threshold for adjusting predictions.
+    :param min_durations: Dictionary mapping each class label to its minimum segment duration in seconds.
+    :return: Labels for each window.
+    """
+
+    # apply threshold tuning
+    y_pred_tt = threshold_tuning(y_pred_proba, y_pred, 0, 1, threshold)
+
+    # combine tt with heuristics
+    return heuristics_correction(y_pred_tt, w_size, min_durations)
+
+
+def postprocess_worn_windows(y_pred: np.ndarray, y_pred_proba: np.ndarray, window_mask: np.ndarray, w_size: float,
+                             threshold: float, min_durations: Dict[int, float]) -> np.ndarray:
+    """
+    Applies the classification pipeline (see apply_classification_pipeline(...)) separately to each contiguous period
+    of classified windows, so that the heuristics-based label correction does not consider the windows before and after
+    a non-wear period as neighbors. The remaining windows are labeled as non-wear (NON_WEAR_LABEL).
+
+    :param y_pred: array containing the labels predicted by the Random Forest for the classified windows
+    :param y_pred_proba: numpy.array of shape (n_classified_windows, n_classes) containing the predicted probabilities
+    :param window_mask: boolean array with one entry per window (True: the window was classified)
+    :param w_size: window size in seconds
+    :param threshold: The probability margin threshold for adjusting predictions.
+    :param min_durations: Dictionary mapping each class label to its minimum segment duration in seconds.
+    :return: array with the label of each window
+    """
+
+    y_pred_all = np.full(window_mask.shape[0], NON_WEAR_LABEL, dtype=np.asarray(y_pred).dtype)
+
+    # cycle over the worn periods
+    for windows, classified_windows in get_worn_periods(window_mask):
+        y_pred_all[windows] = apply_classification_pipeline(y_pred[classified_windows],
+                                                            y_pred_proba[classified_windows], w_size=w_size,
+                                                            threshold=threshold, min_durations=min_durations)
+
+    return y_pred_all
+
+
+def get_worn_periods(window_mask: np.ndarray) -> List[Tuple[slice, slice]]:
+    """
+    Gets the contiguous periods of classified windows.
+    :param window_mask: boolean array with one entry per window (True: the window was classified)
+    :return: list with one tuple per period containing the slice of the period in all windows and the slice of the period
+             in the classified windows
+    """
+
+    # get the segments of the mask
+    run_values, run_lengths = run_length_encode(np.asarray(window_mask, dtype=bool))
+    run_ends = np.cumsum(run_lengths)
+
+    # list for holding the periods
+    periods = []
+    n_classified = 0
+
+    for is_worn, end, length in zip(run_values, run_ends, run_lengths):
+        if is_worn:
+            periods.append((slice(int(end - length), int(end)), slice(n_classified, n_classified + int(length))))
+            n_classified += int(length)
+
+    return periods
+
+
+def threshold_tuning(probabilities: np.ndarray, y_pred: Union[np.ndarray, list],
+                     sit_label: int = 0, stand_label: int = 1, threshold: float = 0.1) -> np.ndarray:
+    """
+    Adjusts predictions for a classifier by reducing confusion between 'stand' and 'sit'.
+
+    If the model predicts 'stand' (class 1) and the difference in predicted probability
+    between 'stand' and 'sit' (class 0) is less than the given threshold, the prediction
+    is changed to 'sit'.
+
+    :param probabilities: numpy.array of shape (n_samples, n_classes) containing the predicted probabilities
+    :param y_pred: array containing the predicted class labels (as integers)
+    :param sit_label: Class label for 'sit'. Default is 0.
+    :param stand_label: Class label for 'stand'. Default is 1.
+    :param threshold: The probability margin threshold for adjusting predictions. Default is 0.1.
+    :return: numpy.ndarray containing the adjusted class label predictions
+    """
+    adjusted = np.array(y_pred)
+
+    # change the 'stand' predictions with a probability margin to 'sit' below the threshold
+    adjusted[(adjusted == stand_label) &
+             (probabilities[:, stand_label] - probabilities[:, sit_label] < threshold)] = sit_label
+
+    return adjusted
+
+
+def heuristics_correction(predictions: np.ndarray, window_size: float, min_durations: Dict[int, float]) -> np.ndarray:
+    """
+    Apply post-processing to correct short activity segments for each class.
+
+    The predictions are run-length encoded (one run per segment) and the short segments of each class are replaced
+    (in the order of min_durations) directly on the runs, merging the runs that end up with the same class.
+
+    :param predictions: 1D array of predicted class labels.
+    :param window_size: Duration of each prediction window in seconds.
+    :param min_durations: Dictionary mapping each class label to its minimum segment duration in seconds.
+    :return: Post-processed prediction array with short segments corrected.
+    """
+    # get the segments of the predictions
+    run_values, run_lengths = run_length_encode(np.asarray(predictions))
+
+    # Apply correction for each class using the specified minimum duration
+    for class_id, min_duration in min_durations.items():
+        run_values, run_lengths = correct_short_segments(run_values, run_lengths, class_id, min_duration, window_size)
+
+    # decode the segments
+    return np.repeat(run_values, run_lengths)
+
+
+def expand_classification(clf_result: np.ndarray, w_size: float, fs: int) -> np.ndarray:
+    """
+    Expands the classification of each window to the samples of the window.
+    :param clf_result: list with the classifier prediction where each entry is the prediction made for a window.
+    :param w_size: the window size in seconds that was used to make the classification.
+    :param fs: the sampling frequency of the signal that was classified.
+    :return: the expanded classification results (int8).
+    """
+
+    return np.repeat(np.asarray(clf_result, dtype=np.int8), int(w_size * fs))
+
+
+def correct_short_segments(run_values: np.ndarray, run_lengths: np.ndarray, class_id: int, min_duration: float,
+                           window_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Replace segments of a specific class that are shorter than a given duration.
+
+    The replacement class is chosen from the neighboring segments. In case the left and the right neighbor are from
+    different classes then the left neighbor (i.e., the previous activity - chronologically) is chosen. A segment without
+    neighbors (covering all predictions) is not replaced.
+
+    :param run_values: 1D array with the class of each segment (see run_length_encode(...)).
+    :param run_lengths: 1D array with the number of windows of each segment.
+    :param class_id: Class to check for short-duration segments.
+    :param min_duration: Minimum acceptable duration for a segment in seconds.
+    :param window_size: Duration of each prediction window in seconds.
+    :return: the class and the number of windows of each segment after replacing the short segments.
+    """
+
+    # get the segments of the class that need to be corrected (too short)
+    short_segments = np.flatnonzero((run_values == class_id) & (run_lengths * window_size < min_duration))
+
+    if short_segments.size == 0:
+        return run_values, run_lengths
+
+    # get the left neighbor (the right neighbor for the first segment, the segment itself if it has no neighbors)
+    n_runs = run_values.shape[0]
+    neighbors = np.where(short_segments > 0, short_segments - 1, np.minimum(short_segments + 1, n_runs - 1))
+
+    # replace the segments (the neighbors are never replaced, as they are from a different class)
+    corrected_values = run_values.copy()
+    corrected_values[short_segments] = run_values[neighbors]
+
+    # merge the neighboring segments that are now from the same class
+    segment_starts = np.flatnonzero(np.concatenate(([True], corrected_values[1:] != corrected_values[:-1])))
+
+    return corrected_values[segment_starts], np.add.reduceat(run_lengths, segment_starts)
+
+
+def run_length_encode(predictions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the contiguous segments of a prediction array (run-length encoding).
+
+    :param predictions: 1D array of predicted class labels.
+    :return: A tuple containing:
+        - np.ndarray: the class of each segment
+        - np.ndarray: the number of windows of each segment
+    """
+
+    if predictions.shape[0] == 0:
+        return predictions.copy(), np.zeros(0, dtype=int)
+
+    # get the first window of each segment
+    segment_starts = np.flatnonzero(np.concatenate(([True], predictions[1:] != predictions[:-1])))
+
+    return predictions[segment_starts], np.diff(np.append(segment_starts, predictions.shape[0]))
@@ -0,0 +1,365 @@
+"""
+Functions to tune the post-processing of the HAR predictions (PROB_THRESHOLD and MIN_DURATIONS) on labelled data, using
+the class probabilities stored by classify_human_activities(...) (see HAR.probability_cache).
+
+The grid of thresholds and minimum durations (one list of durations per class) is evaluated per acquisition and the
+confusion matrices are summed over all acquisitions. The evaluation is shared between configurations as far as possible:
+
+(1) minimum durations that give the same short segments (for the window size and the length of the acquisition) are
+    only evaluated once
+(2) the corrections of the classes are applied one after the other (as in the classifier), thus the corrections of the
+    first classes are shared by all durations of the following classes
+(3) the correction of the last class and the confusion matrices are computed for all its durations at once, on the
+    run-length encoded predictions
+
+The subjects are evaluated in parallel worker processes.
+
+Available Functions
+-------------------
+[Public]
+tune_postprocessing(...): Evaluates a grid of thresholds and minimum durations against labelled windows.
+------------------
+[Private]
+_get_subject_confusions(...): Gets the confusion matrices of all configurations for the acquisitions of a subject.
+_get_acquisition_confusions(...): Gets the confusion matrices of all configurations for an acquisition.
+_get_period_confusions(...): Gets the confusion matrices of all configurations for a worn period.
+_get_heuristics_confusions(...): Gets the confusion matrices of all minimum durations for a thresholded prediction array.
+_get_run_counts(...): Counts the labelled windows of each class in each segment.
+_get_scores(...): Gets the accuracy and the F1-scores from confusion matrices.
+_get_subject_from_key(...): Gets the subject of an acquisition from its key.
+------------------
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePosixPath
+from typing import Dict, List, Sequence, Tuple
+
+# internal imports
+from .classifier import MIN_DURATIONS
+from .postprocessing import threshold_tuning, correct_short_segments, run_length_encode, get_worn_periods
+from .probability_cache import PROBABILITIES, WINDOW_MASK, CLASSES, W_SIZE
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+# default grid
+THRESHOLDS = np.round(np.arange(0.0, 1.0, 0.05), 2)
+MIN_DURATIONS_GRID = {class_id: tuple(range(0, 65, 5)) for class_id in MIN_DURATIONS}
+
+# labels used by the threshold tuning
+SIT_LABEL = 0
+STAND_LABEL = 1
+
+# number of parts of the acquisition keys that identify the subject ('<group>/<subject>/<day>/<acquisition>')
+SUBJECT_KEY_PARTS = 2
+
+# column names
+THRESHOLD_COLUMN = 'threshold'
+MIN_DURATION_COLUMN = 'min_duration_{}'
+ACCURACY_COLUMN = 'accuracy'
+F1_MACRO_COLUMN = 'f1_macro'
+F1_COLUMN = 'f1_{}'
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def tune_postprocessing(probas: Dict[str, Dict[str, np.ndarray]], labels: Dict[str, np.ndarray],
+                        thresholds: Sequence[float] = THRESHOLDS,
+                        min_durations_grid: Dict[int, Sequence[float]] = MIN_DURATIONS_GRID,
+                        workers: int = 1) -> pd.DataFrame:
+    """
+    Evaluates all combinations of thresholds and minimum durations (thresholds x durations of each class) against
+    labelled windows. The labels of each configuration are the same as the ones obtained with
+    reapply_postprocessing(probas, threshold, min_durations), and only the classified windows with a label of one of the
+    model classes are evaluated (e.g., -1 can be used for unlabelled windows).
+
+    Example:
+        probas = load_probabilities(os.path.join('HAR', 'probabilities'))
+        results = tune_postprocessing(probas, labels, workers=4)
+        best = results.iloc[0]
+
+    :param probas: dictionary with the acquisitions as keys and the stored probabilities as values
+                   (see load_probabilities(...)). The acquisitions are grouped by subject using the first two parts
+                   of the keys ('<group>/<subject>/...').
+    :param labels: dictionary with the same keys as probas and the true label of each window (all windows of the
+                   acquisition) as values
+    :param thresholds: the probability margin thresholds. Default: 0.0 to 0.95 in steps of 0.05
+    :param min_durations_grid: dictionary mapping each class label to the minimum segment durations (in seconds) that
+                               are evaluated. The corrections are applied in the order of the keys (as in
+                               MIN_DURATIONS). Default: 0 to 60 s in steps of 5 s for each class
+    :param workers: the number of worker processes (the subjects are distributed among the workers). Default: 1
+    :return: dataframe with one row per configuration (threshold, min_duration_<class>) containing the accuracy, the
+             macro F1-score, and the F1-score of each class, sorted by the macro F1-score (best first)
+    """
+
+    # check the labels
+    missing = [acquisition for acquisition in probas if acquisition not in labels]
+    if missing:
+        raise KeyError(f"No labels for the acquisitions {missing}.")
+
+    # get the classes of the model (from the first acquisition that was classified)
+    classes = next((stored[CLASSES] for stored in probas.values() if stored[CLASSES].size), np.zeros(0, dtype=int))
+    if classes.size == 0:
+        raise ValueError("No window was classified in the given acquisitions.")
+
+    thresholds = np.asarray(thresholds, dtype=float)
+    class_ids = list(min_durations_grid.keys())
+    durations = [np.asarray(min_durations_grid[class_id], dtype=float) for class_id in class_ids]
+
+    # group the acquisitions by subject
+    subjects = {}
+    for acquisition in probas:
+        subjects.setdefault(_get_subject_from_key(acquisition), []).append(acquisition)
+
+    subject_args = [({acquisition: probas[acquisition] for acquisition in acquisitions},
+                     {acquisition: labels[acquisition] for acquisition in acquisitions},
+                     classes, thresholds, class_ids, durations)
+                    for acquisitions in subjects.values()]
+
+    # evaluate the subjects (in parallel)
+    if workers > 1 and len(subject_args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            subject_confusions = list(executor.map(_get_subject_confusions, *zip(*subject_args)))
+
+    else:
+        subject_confusions = [_get_subject_confusions(*args) for args in subject_args]
+
+    # sum the confusion matrices (n_thresholds, n_durations class 1, ..., n_durations class m, n_classes, n_classes)
+    confusions = np.sum(subject_confusions, axis=0)
+
+    # get the scores of each configuration
+    confusions = confusions.reshape(-1, classes.size, classes.size)
+    accuracy, f1_scores, f1_macro = _get_scores(confusions)
+
+    # build the results
+    configurations = np.array(list(itertools.product(thresholds, *durations)))
+    results = pd.DataFrame(configurations,
+                           columns=[THRESHOLD_COLUMN] + [MIN_DURATION_COLUMN.format(class_id) for class_id in class_ids])
+    results[ACCURACY_COLUMN] = accuracy
+    results[F1_MACRO_COLUMN] = f1_macro
+    for class_index, class_id in enumerate(classes):
+        results[F1_COLUMN.format(class_id)] = f1_scores[:, class_index]
+
+    return results.sort_values(F1_MACRO_COLUMN, ascending=False, kind='stable').reset_index(drop=True)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_subject_confusions(probas: Dict[str, Dict[str, np.ndarray]], labels: Dict[str, np.ndarray],
+                            classes: np.ndarray, thresholds: np.ndarray, class_ids: List[int],
+                            durations: List[np.ndarray]) -> np.ndarray:
+    """
+    Gets the confusion matrices of all configurations for the acquisitions of a subject (summed over the acquisitions).
+    :param probas: dictionary with the acquisitions as keys and the stored probabilities as values
+    :param labels: dictionary with the acquisitions as keys and the true label of each window as values
+    :param classes: the classes of the model
+    :param thresholds: the probability margin thresholds
+    :param class_ids: the classes that are corrected (in order)
+    :param durations: list with the minimum durations of each class in class_ids
+    :return: numpy.array of shape (n_thresholds, n_durations class 1, ..., n_durations class m, n_classes, n_classes)
+             with the confusion matrices (true class x predicted class)
+    """
+
+    # array for holding the confusion matrices
+    confusions = np.zeros((thresholds.size, *[class_durations.size for class_durations in durations],
+                           classes.size, classes.size))
+
+    for acquisition, stored in probas.items():
+        confusions += _get_acquisition_confusions(stored, np.asarray(labels[acquisition]), classes, thresholds,
+                                                  class_ids, durations)
+
+    return confusions
+
+
+def _get_acquisition_confusions(stored: Dict[str, np.ndarray], labels: np.ndarray, classes: np.ndarray,
+                                thresholds: np.ndarray, class_ids: List[int],
+                                durations: List[np.ndarray]) -> np.ndarray:
+    """
+    Gets the confusion matrices of all configurations for an acquisition.
+    :param stored: the stored probabilities of the acquisition (see load_probabilities(...))
+    :param labels: the true label of each window of the acquisition
+    :param classes: the classes of the model
+    :param thresholds: the probability margin thresholds
+    :param class_ids: the classes that are corrected (in order)
+    :param durations: list with the minimum durations of each class in class_ids
+    :return: numpy.array of shape (n_thresholds, n_durations class 1, ..., n_durations class m, n_classes, n_classes)
+    """
+
+    confusions = np.zeros((thresholds.size, *[class_durations.size for class_durations in durations],
+                           classes.size, classes.size))
+
+    # no window was classified
+    window_mask = stored[WINDOW_MASK]
+    if not window_mask.any():
+        return confusions
+
+    if labels.shape[0] != window_mask.shape[0]:
+        raise ValueError(f"Expected {window_mask.shape[0]} labels (one per window), got {labels.shape[0]}.")
+
+    # get the labels of the model and the true labels of the classified windows
+    y_pred_proba = stored[PROBABILITIES]
+    y_pred = stored[CLASSES].take(np.argmax(y_pred_proba, axis=1), axis=0)
+    y_true = labels[window_mask]
+    w_size = float(stored[W_SIZE])
+
+    # evaluate each worn period separately (as in the classifier, the periods are post-processed separately)
+    for _, classified_windows in get_worn_periods(window_mask):
+        confusions += _get_period_confusions(y_pred[classified_windows], y_pred_proba[classified_windows],
+                                             y_true[classified_windows], w_size, classes, thresholds, class_ids,
+                                             durations)
+
+    return confusions
+
+
+def _get_period_confusions(y_pred: np.ndarray, y_pred_proba: np.ndarray, y_true: np.ndarray, w_size: float,
+                           classes: np.ndarray, thresholds: np.ndarray, class_ids: List[int],
+                           durations: List[np.ndarray]) -> np.ndarray:
+    """
+    Gets the confusion matrices of all configurations for a worn period (contiguous classified windows).
+    :param y_pred: the labels of the model for the windows of the period
+    :param y_pred_proba: the class probabilities of the windows of the period
+    :param y_true: the true labels of the windows of the period
+    :param w_size: the window size in seconds
+    :param classes: the classes of the model
+    :param thresholds: the probability margin thresholds
+    :param class_ids: the classes that are corrected (in order)
+    :param durations: list with the minimum durations of each class in class_ids
+    :return: numpy.array of shape (n_thresholds, n_durations class 1, ..., n_durations class m, n_classes, n_classes)
+    """
+
+    confusions = np.zeros((thresholds.size, *[class_durations.size for class_durations in durations],
+                           classes.size, classes.size))
+
+    # get the minimum durations that give the same short segments (segments of 1 to n_short windows are short)
+    segment_durations = np.arange(1, y_pred.shape[0] + 1) * w_size
+    n_short = [np.count_nonzero(segment_durations[np.newaxis, :] < class_durations[:, np.newaxis], axis=1)
+               for class_durations in durations]
+
+    # number of labelled windows of each class up to each window
+    true_counts = np.zeros((y_true.shape[0] + 1, classes.size))
+    true_counts[1:] = np.cumsum(y_true[:, np.newaxis] == classes[np.newaxis, :], axis=0)
+
+    for threshold_index, threshold in enumerate(thresholds):
+
+        # apply threshold tuning
+        y_pred_tt = threshold_tuning(y_pred_proba, y_pred, SIT_LABEL, STAND_LABEL, threshold)
+
+        # apply the heuristics-based label correction for all minimum durations
+        confusions[threshold_index] = _get_heuristics_confusions(*run_length_encode(y_pred_tt), true_counts, classes,
+                                                                 class_ids, durations, n_short, w_size)
+
+    return confusions
+
+
+def _get_heuristics_confusions(run_values: np.ndarray, run_lengths: np.ndarray, true_counts: np.ndarray,
+                               classes: np.ndarray, class_ids: List[int], durations: List[np.ndarray],
+                               n_short: List[np.ndarray], w_size: float) -> np.ndarray:
+    """
+    Gets the confusion matrices of all minimum durations of the classes in class_ids for a (run-length encoded)
+    prediction array. The first class is corrected with each of its (distinct) durations and the following classes are
+    evaluated recursively. The last class is evaluated for all its durations at once.
+    :param run_values: the class of each segment (see run_length_encode(...))
+    :param run_lengths: the number of windows of each segment
+    :param true_counts: numpy.array of shape (n_windows + 1, n_classes) with the number of labelled windows of each
+                        class up to each window
+    :param classes: the classes of the model
+    :param class_ids: the classes that are corrected (in order)
+    :param durations: list with the minimum durations of each class in class_ids
+    :param n_short: list with the number of short segment lengths of each duration of each class in class_ids
+    :param w_size: the window size in seconds
+    :return: numpy.array of shape (n_durations class 1, ..., n_durations class m, n_classes, n_classes)
+    """
+
+    # get the distinct durations of the class (durations with the same short segments give the same result)
+    _, first_indices, inverse = np.unique(n_short[0], return_index=True, return_inverse=True)
+    class_id = class_ids[0]
+
+    # correct the following classes recursively
+    if len(class_ids) > 1:
+
+        confusions = [_get_heuristics_confusions(*correct_short_segments(run_values, run_lengths, class_id,
+                                                                           durations[0][index], w_size),
+                                                 true_counts, classes, class_ids[1:], durations[1:], n_short[1:],
+                                                 w_size)
+                      for index in first_indices]
+
+        return np.stack(confusions)[inverse]
+
+    # get the short segments for all durations of the last class at once (n_durations, n_segments)
+    short_segments = (run_values == class_id)[np.newaxis, :] & \
+                     (run_lengths[np.newaxis, :] * w_size < durations[0][first_indices, np.newaxis])
+
+    # replace them by the left neighbor (the right neighbor for the first segment, see correct_short_segments(...))
+    segment_indices = np.arange(run_values.shape[0])
+    neighbors = np.where(segment_indices > 0, segment_indices - 1,
+                         np.minimum(segment_indices + 1, run_values.shape[0] - 1))
+    corrected_values = np.where(short_segments, run_values[neighbors][np.newaxis, :], run_values[np.newaxis, :])
+
+    # get the confusion matrices (true class x predicted class) from the labelled windows in each segment
+    run_counts = _get_run_counts(run_lengths, true_counts)
+    predicted = corrected_values[:, :, np.newaxis] == classes[np.newaxis, np.newaxis, :]
+    confusions = np.einsum('st,dsp->dtp', run_counts, predicted.astype(float))
+
+    return confusions[inverse]
+
+
+def _get_run_counts(run_lengths: np.ndarray, true_counts: np.ndarray) -> np.ndarray:
+    """
+    Counts the labelled windows of each class in each segment.
+    :param run_lengths: the number of windows of each segment
+    :param true_counts: numpy.array of shape (n_windows + 1, n_classes) with the number of labelled windows of each
+                        class up to each window
+    :return: numpy.array of shape (n_segments, n_classes)
+    """
+
+    # get the boundaries of the segments
+    boundaries = np.concatenate(([0], np.cumsum(run_lengths)))
+
+    return np.diff(true_counts[boundaries], axis=0)
+
+
+def _get_scores(confusions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gets the accuracy and the F1-scores from confusion matrices. As in sklearn.metrics.f1_score(..., average='macro'),
+    the macro F1-score is the mean over the classes that are labelled or predicted.
+    :param confusions: numpy.array of shape (n_configurations, n_classes, n_classes) (true class x predicted class)
+    :return: A tuple containing:
+        - np.ndarray: the accuracy of each configuration
+        - np.ndarray: the F1-score of each class (n_configurations, n_classes)
+        - np.ndarray: the macro F1-score of each configuration
+    """
+
+    true_positives = np.diagonal(confusions, axis1=1, axis2=2)
+    n_true = confusions.sum(axis=2)
+    n_predicted = confusions.sum(axis=1)
+    n_windows = confusions.sum(axis=(1, 2))
+
+    # accuracy
+    accuracy = np.divide(true_positives.sum(axis=1), n_windows, out=np.zeros(n_windows.shape), where=n_windows > 0)
+
+    # F1-score of each class (2 TP / (2 TP + FP + FN))
+    support = n_true + n_predicted
+    f1_scores = np.divide(2 * true_positives, support, out=np.zeros(support.shape), where=support > 0)
+
+    # macro F1-score over the classes that occur
+    n_occurring = np.count_nonzero(support > 0, axis=1)
+    f1_macro = np.divide(f1_scores.sum(axis=1), n_occurring, out=np.zeros(n_occurring.shape), where=n_occurring > 0)
+
+    return accuracy, f1_scores, f1_macro
+
+
+def _get_subject_from_key(acquisition: str) -> str:
+    """
+    Gets the subject of an acquisition from its key ('<group>/<subject>/<day>/<acquisition>', see load_probabilities(...)).
+    :param acquisition: the key of the acquisition
+    :return: the subject ('<group>/<subject>')
+    """
+
+    return '/'.join(PurePosixPath(acquisition).parts[:SUBJECT_KEY_PARTS])
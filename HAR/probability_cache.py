@@ -0,0 +1,113 @@
+"""
+Functions to persist the class probabilities predicted by the HAR model for each window, so that the post-processing
+(threshold tuning and heuristics-based label correction) can be re-applied with other settings without extracting the
+features and running the model again (see reapply_postprocessing(...)).
+
+Each acquisition is stored in '<probability_dir>/<acquisition_time>.npz' with the probabilities of the classified
+windows, the window mask (windows that were classified), the classes of the model, the file name of the model (which
+identifies the model variant), and the window size.
+
+Available Functions
+-------------------
+[Public]
+save_probabilities(...): Saves the class probabilities of the windows of an acquisition.
+load_probabilities(...): Loads all probabilities stored in a folder (and its sub-folders).
+get_probability_dir(...): Gets the folder of the probabilities of a subject on a given day.
+------------------
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import os
+import numpy as np
+from pathlib import Path
+from typing import Dict
+
+# internal imports
+from utils import get_group_from_path
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+PROBABILITY_FOLDER_NAME = 'probabilities'
+NPZ = '.npz'
+
+# keys of the stored arrays
+PROBABILITIES = 'probabilities'
+WINDOW_MASK = 'window_mask'
+CLASSES = 'classes'
+MODEL = 'model'
+W_SIZE = 'w_size'
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def save_probabilities(probability_dir: str, acquisition_time: str, probabilities: np.ndarray, window_mask: np.ndarray,
+                       classes: np.ndarray, model_name: str, w_size: float) -> str:
+    """
+    Saves the class probabilities of the windows of an acquisition in '<probability_dir>/<acquisition_time>.npz'
+    (replacing the probabilities of a previous run).
+
+    :param probability_dir: the folder in which the probabilities are stored (e.g., get_probability_dir(...))
+    :param acquisition_time: the acquisition time
+    :param probabilities: numpy.array of shape (n_classified_windows, n_classes) with the class probabilities
+    :param window_mask: boolean array with one entry per window (True: the window was classified)
+    :param classes: the classes of the model (order of the probability columns)
+    :param model_name: the file name of the model that computed the probabilities (e.g., 'HAR_model_500_trees_100.joblib')
+    :param w_size: the window size in seconds
+    :return: the path to the stored file
+    """
+
+    # get the path of the file
+    os.makedirs(probability_dir, exist_ok=True)
+    probability_path = os.path.join(probability_dir, f"{acquisition_time}{NPZ}")
+
+    # store the probabilities (written to a temporary file first, so that no partial files are left behind)
+    temporary_path = f"{probability_path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as file:
+        np.savez(file, **{PROBABILITIES: probabilities, WINDOW_MASK: np.asarray(window_mask, dtype=bool),
+                          CLASSES: np.asarray(classes), MODEL: np.str_(model_name),
+                          W_SIZE: np.float64(w_size)})
+    os.replace(temporary_path, probability_path)
+
+    return probability_path
+
+
+def load_probabilities(probability_dir: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Loads all probabilities stored in a folder and its sub-folders (e.g., the folder of a day, or HAR/probabilities for
+    the whole cohort).
+
+    :param probability_dir: the folder in which the probabilities are stored
+    :return: dictionary with the paths of the acquisitions relative to probability_dir (without extension, e.g.,
+             'group1/LIBPhys #001/2025-09-23/10-00-00') as keys and dictionaries with the stored arrays
+             ('probabilities', 'window_mask', 'classes', 'model', 'w_size') as values
+    """
+
+    # dictionary for holding the probabilities of each acquisition
+    probabilities_dict = {}
+
+    for probability_path in sorted(Path(probability_dir).rglob(f"*{NPZ}")):
+
+        # load all arrays (the file is closed afterwards)
+        with np.load(probability_path) as stored:
+            probabilities_dict[probability_path.relative_to(probability_dir).with_suffix('').as_posix()] = \
+                {key: stored[key] for key in stored.files}
+
+    return probabilities_dict
+
+
+def get_probability_dir(folder_path: str) -> str:
+    """
+    Gets the folder of the probabilities of a subject on a given day: HAR/probabilities/<group>/<subject>/<day>.
+
+    :param folder_path: path to the folder containing the data of the day (e.g., '.../group1/sensors/LIBPhys #001/2025-09-23')
+    :return: the path to the folder
+    """
+
+    # get the subject and the day from the path
+    folder_path = Path(folder_path)
+
+    return os.path.join(Path(__file__).parent, PROBABILITY_FOLDER_NAME, get_group_from_path(str(folder_path)),
+                        folder_path.parent.name, folder_path.name)
@@ -2,13 +2,14 @@
 # imports
 # ------------------------------------------------------------------------------------------------------------------- #
 import pandas as pd
-from typing import Dict, Union
+from typing import Dict, Union, Optional
 import copy
 
 
 # internal imports
 from .classifier import classify_human_activities
 from constants import PHONE, WATCH, MBAN_LEFT, MBAN_RIGHT
+from signal_processing.wear_detection import get_wear_masks
 
 # ------------------------------------------------------------------------------------------------------------------- #
 # constants
@@ -23,7 +24,11 @@ MBAN_R_SUFFIX = '_MBAN_R'
 # ------------------------------------------------------------------------------------------------------------------- #
 
 def classify_and_synchronise_predictions(daily_data_dict: Dict[str, Dict[str, pd.DataFrame]], w_size: float = 5.0,
-                                         fs: int = 100) -> pd.DataFrame:
+                                         fs: int = 100, skip_non_wear: bool = False,
+                                         feature_cache_dir: Optional[str] = None,
+                                         model_variant: Optional[str] = None,
+                                         probability_dir: Optional[str] = None,
+                                         use_feature_cache: bool = True) -> pd.DataFrame:
     """
     Classify and synchronise activity predictions across multiple devices.
 
@@ -32,10 +37,22 @@ def classify_and_synchronise_predictions(daily_data_dict: Dict[str, Dict[str, pd
     classifies human activities using the smartphone data, and then synchronises the predictions across all devices,
     using a sliding window approach.
 
+    If skip_non_wear is True, the non-wear periods and invalid segments of each device are detected first
+    (see signal_processing.get_wear_masks(...)). The phone windows that were not worn are not classified, and the
+    samples of all devices that were not worn are dropped before synchronising (NaN in the synchronised dataframe).
+
     :param daily_data_dict: a nested dictionary with the following format: {device_name : {acquisition_time: pd.DataFrame}}
                             (e.g., 'phone': {'09:45:00': pd.DataFrame} , 'watch': {'10:45:00': pd.DataFrame, '11:30:00': pd.DataFrame})
     :param w_size: the window size in seconds that should be used for windowing the data
     :param fs: the sampling rate (in Hz) of the data
+    :param skip_non_wear: bool. If true, the non-wear periods are skipped. Default: False
+    :param feature_cache_dir: optional folder in which the HAR features are cached (see get_feature_cache_dir(...)).
+                              Default: None (default folder)
+    :param model_variant: optional name of a smaller variant of the HAR model (e.g., 'trees_100', see
+                          HAR.model_variants). Default: None (production model)
+    :param probability_dir: optional folder in which the class probabilities of the HAR model are stored
+                            (see get_probability_dir(...) and reapply_postprocessing(...)). Default: None (not stored)
+    :param use_feature_cache: whether the HAR features are cached (see classify_human_activities(...)). Default: True
     :return: a dataframe with all synchronised signals
     """
     daily_dict = copy.deepcopy(daily_data_dict)
@@ -44,8 +61,15 @@ def classify_and_synchronise_predictions(daily_data_dict: Dict[str, Dict[str, pd
     if PHONE not in daily_data_dict.keys():
         raise KeyError(f"Key '{PHONE}' not found in dictionary. Load smartphone data to classify the activities.")
 
+    # get the samples in which each device was worn
+    wear_masks = get_wear_masks(daily_data_dict, fs=fs) if skip_non_wear else {}
+
     # classify human activities using only the phone
-    daily_dict[PHONE] = classify_human_activities(daily_data_dict[PHONE], w_size=w_size, fs=fs)
+    daily_dict[PHONE] = classify_human_activities(daily_data_dict[PHONE], w_size=w_size, fs=fs,
+                                                  wear_mask_dict=wear_masks.get(PHONE),
+                                                  feature_cache_dir=feature_cache_dir, model_variant=model_variant,
+                                                  probability_dir=probability_dir,
+                                                  use_feature_cache=use_feature_cache)
 
     # cycle over the outer dictionary
     for device_name, acquisitions_dict in daily_dict.items():
@@ -65,6 +89,10 @@ def classify_and_synchronise_predictions(daily_data_dict: Dict[str, Dict[str, pd
             # set time column as index
             sensor_df = sensor_df.set_index('time')
 
+            # drop the samples in which the device was not worn (the phone data was trimmed to full windows)
+            if skip_non_wear:
+                sensor_df = sensor_df[wear_masks[device_name][acquisition_time][:sensor_df.shape[0]]]
+
             # add replace in the dictionary
             acquisitions_dict[acquisition_time] = sensor_df
 
@@ -28,6 +28,9 @@ NOISE = 'NOISE'
 HEART = 'HEART'
 EMG = 'EMG'
 
+# gravitational component of the ACC (optional output of the pre-processing)
+GRAV = 'GRAV'
+
 # define valid sensors for the three devices
 PHONE_SENSORS = [ACC, GYR, MAG, ROT, NOISE]
 WATCH_SENSORS = [ACC, GYR, MAG, ROT, HEART]
@@ -1,3 +1,4 @@
-from .raw_data_loader import load_daily_acquisitions
+from .raw_data_loader import load_daily_acquisitions, load_noise_recordings
 
-__all__ = ['load_daily_acquisitions']
\ No newline at end of file
+__all__ = ['load_daily_acquisitions',
+           'load_noise_recordings']
\ No newline at end of file
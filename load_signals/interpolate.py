@@ -8,6 +8,7 @@ cubic_spline_interpolation(...): Apply cubic spline interpolation to resample se
 slerp_interpolation(...): Perform SLERP (Spherical Linear Interpolation) over a quaternion time series.
 zero_order_hold_interpolation(...): Interpolates a signal by repeating the previous value.
 interpolate_heart_rate_sensor(...): Interpolates the heart rate sensor accounting for the starts and stops of the sensor
+resample_signals(...): Resamples all sensor signals to a new sampling frequency (see signal_processing/resampling.py).
 ------------------
 [Private]
 _convert_android_timestamp_to_seconds(...): Converts the time column from the android timestamp which is in nanoseconds to seconds.
@@ -22,8 +23,7 @@ import numpy as np
 from scipy.spatial.transform import Rotation as R
 from scipy.spatial.transform import Slerp
 from scipy.interpolate import CubicSpline, interp1d
-from scipy.signal import resample_poly
-from constants import TIME_COLUMN_NAME
+from signal_processing.resampling import resample_signals
 
 # ------------------------------------------------------------------------------------------------------------------- #
 # file specific constants
@@ -224,59 +224,6 @@ def interpolate_heart_rate_sensor(sensor_df: pd.DataFrame, fs: int = 100) -> pd.
     return interpolated_df
 
 
-def resample_signals(sensor_df: pd.DataFrame, fs, fs_new) -> pd.DataFrame:
-    """
-    Function to resample signals using polyphase filtering. If fs_new > fs, the function upsamples the signal.
-    If fs_new < fs, this function downsamples the signals. This function also generates a time axis in seconds based
-    on the length of the signals and on the new sampling frequency. The first column of sensor_df is considered to be
-    a time-axis (or a index column) and the remaining columns are considered signals.
-
-    :param sensor_df: A DataFrame containing timestamps or indices in first column and sensor data in the remaining columns.
-    :param fs: The original sampling frequency.
-    :param fs_new: The target sampling frequency in Hz.
-    :return: A DataFrame where the first column is the timestamps in seconds and the remaining are resampled data.
-    """
-
-    # list for holding the resampled signals
-    resampled_signals = []
-
-    # extract signals (and cast to numpy.array)
-    signals = sensor_df.iloc[:, 1:].values
-
-    # calculate resampling factor based on original fs and the new fs
-    if fs > fs_new:
-        factor = round(fs/fs_new)
-        resample = 'down'
-
-    else:
-        factor = round(fs_new/fs)
-        resample = 'up'
-
-    # cycle over the signal channels
-    for channel in range(signals.shape[1]):
-
-        if resample == 'up':
-
-            # upsample signals using polyphase filtering
-            resampled_signal = resample_poly(signals[:, channel], up=factor, down=1)
-
-        else:
-
-            # downsample signals using polyphase filtering
-            resampled_signal = resample_poly(signals[:, channel], up=1, down=factor)
-
-        # append to resample signals
-        resampled_signals.append(resampled_signal)
-
-    # generate new time axis with the new sampling frequency
-    time_axis_inter = _generate_time_column_from_samples(resampled_signals[0].shape[0], fs_new)
-
-    # create interpolated DataFrame and change time column name
-    resampled_df = pd.DataFrame(np.column_stack([time_axis_inter] + resampled_signals),
-                                   columns=[TIME_COLUMN_NAME] + list(sensor_df.columns[1:]))
-
-    return resampled_df
-
 # ------------------------------------------------------------------------------------------------------------------- #
 # private functions
 # ------------------------------------------------------------------------------------------------------------------- #
@@ -298,13 +245,3 @@ def _convert_android_timestamp_to_seconds(time_column: pd.Series) -> pd.Series:
     time_column = time_column * 1e-9
 
     return time_column
-
-def _generate_time_column_from_samples(signal_size:int, fs: int):
-
-    # get time (seconds) between each sample
-    delta_t = 1/fs
-
-    # generate time column in seconds
-    time_column = np.arange(signal_size) * delta_t
-
-    return time_column
@@ -5,6 +5,7 @@ Available Functions
 -------------------
 [Public]
 load_daily_acquisitions(...): Loads raw sensor data (phone, watch, or MuscleBan) from an entire day.
+load_noise_recordings(...): Loads the phone NOISE recorder of an entire day at its native sampling rate.
 -------------------
 
 [Private]
@@ -34,7 +35,8 @@ from constants import PHONE, WATCH, VALID_MBAN_DATA, NSEQ, IMU_SENSORS, TIME_COL
 from .path_handler import get_sensor_paths_per_device
 from .parser import extract_sensor_from_filename
 from .interpolate import cubic_spline_interpolation, slerp_interpolation, zero_order_hold_interpolation, \
-    interpolate_heart_rate_sensor
+    interpolate_heart_rate_sensor, _convert_android_timestamp_to_seconds
+from signal_processing.pre_process_muscleban import apply_transfer_functions
 # ------------------------------------------------------------------------------------------------------------------- #
 # file specific constants
 # ------------------------------------------------------------------------------------------------------------------- #
@@ -54,7 +56,8 @@ ROUNDING_FACTOR = 1000 # sampling rate  times 10
 # public functions
 # -------------------------------------------------------------------------------------------------------------------- #
 def load_daily_acquisitions(folder_path: str, load_devices: Dict[str, List[str]], fs_android: int = 100,
-                            padding_type: str = PADDING_SAME) -> Dict[str, Dict[str, pd.DataFrame]]:
+                            padding_type: str = PADDING_SAME,
+                            convert_muscleban: bool = True) -> Dict[str, Dict[str, pd.DataFrame]]:
     """
     Load sensor data of an entire day.
 
@@ -82,6 +85,10 @@ def load_daily_acquisitions(folder_path: str, load_devices: Dict[str, List[str]]
     :param fs_android: the sampling rate to which all android sensors should be re-sampled to. Default: 100 (Hz)
     :param padding_type: padding which should be used to ensure that all sensors start and stop at the same time. The
                          following padding types are supported: 'same', 'zero'. Default: 'same'
+    :param convert_muscleban: bool. If true, the muscleBAN ACC and EMG are converted to m/s^2 and mV (float32) while
+                              loading. Otherwise, the raw ADC values are returned (uint16) and have to be converted
+                              when pre-processing (apply_pre_processing_pipeline(..., convert_muscleban=True)).
+                              Default: True
     :return: a nested dictionary containing the sensor data from the devices and sensors in load_sensors
     """
     # innit dictionary to hold the dataframes
@@ -114,7 +121,8 @@ def load_daily_acquisitions(folder_path: str, load_devices: Dict[str, List[str]]
 
                     # muscleBAN only has one file per acquisition
                     # load_signals muscleBAN data - only the sensors defined in load_devices
-                    muscleban_sensor_data = _load_muscleban_data(paths_list[0], sensor_list_mban)
+                    muscleban_sensor_data = _load_muscleban_data(paths_list[0], sensor_list_mban,
+                                                                 convert=convert_muscleban)
 
                     # add to dictionary
                     dataframes_dict[device][acquisition_time] = muscleban_sensor_data
@@ -146,6 +154,33 @@ def load_daily_acquisitions(folder_path: str, load_devices: Dict[str, List[str]]
 
     return dataframes_dict
 
+def load_noise_recordings(folder_path: str) -> Dict[str, pd.DataFrame]:
+    """
+    Loads the phone NOISE recorder of an entire day at its native sampling rate. Unlike load_daily_acquisitions(...),
+    the samples are not padded nor resampled to fs_android (zero order hold), as the noise exposure is computed from the
+    samples and their durations (see signal_processing.get_noise_exposure(...)). Thus, NOISE can be left out of the
+    sensors passed to load_daily_acquisitions(...).
+
+    :param folder_path: Path to the folder containing the data of an entire day of acquisitions.
+    :return: dictionary {acquisition_time: pd.DataFrame} with the time column (seconds since the first sample of the
+             acquisition) and the NOISE column
+    """
+    # dictionary for holding the noise recordings
+    noise_dict: Dict[str, pd.DataFrame] = {}
+
+    # get the paths of the noise recorder files
+    paths_dict = get_sensor_paths_per_device(folder_path, {PHONE: [NOISE]})
+
+    for acquisition_time, paths_list in paths_dict.get(PHONE, {}).items():
+
+        # load the file and convert the android timestamps to seconds
+        noise_df = _load_sensor_file(paths_list[0], NOISE)
+        noise_df[TIME_COLUMN_NAME] = _convert_android_timestamp_to_seconds(noise_df[TIME_COLUMN_NAME])
+
+        noise_dict[acquisition_time] = noise_df
+
+    return noise_dict
+
 # -------------------------------------------------------------------------------------------------------------------- #
 # private functions
 # -------------------------------------------------------------------------------------------------------------------- #
@@ -478,41 +513,51 @@ def _re_sample_data(sensor_data: List[pd.DataFrame], report:  Dict[str, Any], fs
     return re_sampled_data
 
 
-def _load_muscleban_data(file_path: Path, sensor_list: List[str]) -> pd.DataFrame:
+def _load_muscleban_data(file_path: Path, sensor_list: List[str], convert: bool = True) -> pd.DataFrame:
     """
     Loads MuscleBan data into a DataFrame.
 
     Loads only EMG or/and accelerometer (x, y, z) signals, depending on sensor_list. Removes MAG sensor as it is unreliable.
+    The ADC channels are read as 16-bit unsigned integers and (if convert is true) converted to mV and m/s^2 through
+    lookup tables, so that the raw values are never stored as float64.
 
     :param file_path: pathlib.Path to the folder containing the file.
     :param sensor_list: List of str pertaining to the sensors to be loaded for the mban
+    :param convert: bool. If true, the ACC and EMG are converted to m/s^2 and mV (float32). Default: True
     :return:  A DataFrame containing the EMG and ACC data from the muscleban
     """
     # inform user
     print(f"\nLoading muscleBAN data from file: {file_path.name}.")
 
-    # load_signals data into a csv file
-    sensor_df = pd.read_csv(file_path, delimiter = '\t', header=None, skiprows=3)
-
-    # remove Nan column that is generated when using pd.read_csv
-    sensor_df = sensor_df.dropna(axis=1, how="all")
+    # read the first row to find the columns holding data (the trailing tab generates a Nan column)
+    first_row = pd.read_csv(file_path, delimiter='\t', header=None, skiprows=3, nrows=1)
+    data_columns = [col for col in first_row.columns if first_row[col].notna().all()]
 
     # if there are 9 column then the second column is only zeros (happens in some firmware versions)
-    if len(sensor_df.columns) > 8:
+    if len(data_columns) > 8:
 
         # remove zero column
-        sensor_df = sensor_df.drop(sensor_df.columns[1], axis=1)
+        data_columns.pop(1)
 
     # remove MAG which are the last three channels
-    sensor_df = sensor_df.drop(sensor_df.columns[-3:], axis=1)
+    data_columns = data_columns[:-3]
+
+    # keep only the sensors in sensor list (plus nSeq)
+    columns_to_load = {col: name for col, name in zip(data_columns, VALID_MBAN_DATA)
+                       if any(sensor in name for sensor in sensor_list) or name == NSEQ}
+
+    # load_signals data from the csv file (nSeq as integer, ADC channels as 16-bit unsigned integers)
+    sensor_df = pd.read_csv(file_path, delimiter='\t', header=None, skiprows=3, usecols=list(columns_to_load),
+                            dtype={col: np.int64 if name == NSEQ else np.uint16
+                                   for col, name in columns_to_load.items()})
 
     # add column names - nseq, emg and acc columns
-    sensor_df.columns = VALID_MBAN_DATA
+    sensor_df.columns = list(columns_to_load.values())
 
-    # keep only the sensors in sensor list (plus nSeq)
-    cols_to_keep = [col for col in sensor_df.columns
-                    if any(sensor in col for sensor in sensor_list) or col == NSEQ]
-    sensor_df = sensor_df[cols_to_keep]
+    if convert:
+
+        # convert acc and/or emg to m/s^2 and/or mV
+        sensor_df = apply_transfer_functions(sensor_df)
 
     return sensor_df
 
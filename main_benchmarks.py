@@ -0,0 +1,240 @@
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import time
+import numpy as np
+import pandas as pd
+from pyquaternion import Quaternion
+from sklearn.ensemble import RandomForestClassifier
+from scipy.spatial.transform import Rotation
+
+# internal imports
+from signal_processing.filters import median_filter, slerp_smoothing, MEDFILT, MEDFILT_BACKENDS
+from HAR.feature_extractor import extract_features, NATIVE, TSFEL
+from HAR.flat_forest import compile_random_forest
+from constants import ACC, GYR, MAG
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+BENCHMARK_MEDIAN_FILTER = True
+BENCHMARK_SLERP_SMOOTHING = True
+BENCHMARK_FEATURE_EXTRACTION = True
+BENCHMARK_FOREST_INFERENCE = True
+
+FS = 100
+N_HOURS = 8  # one working day
+N_CHANNELS = 3
+MEDFILT_WINDOW_LENGTH = 11
+N_REPEATS = 3
+N_SLERP_SAMPLES = 100000
+SLERP_SMOOTH_FACTOR = 0.3
+N_FEATURE_MINUTES = 30
+HAR_W_SIZE = 5.0
+N_TREES = 500  # same as the production model
+N_MODEL_FEATURES = 30
+N_TRAIN_WINDOWS = 5000
+INFERENCE_BATCH_SIZES = (1, 12, 720, 5760)  # one window, one minute, one hour, and one working day of 5 s windows
+RANDOM_SEED = 42
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# benchmark functions
+# ------------------------------------------------------------------------------------------------------------------- #
+
+def _time_function(func, *args, n_repeats: int = N_REPEATS, **kwargs) -> float:
+    """
+    Runs func(*args, **kwargs) n_repeats times and returns the best run time.
+    :param func: the function to be timed
+    :param n_repeats: the number of runs
+    :return: the best run time in seconds
+    """
+
+    # list for holding the run times
+    run_times = []
+
+    for _ in range(n_repeats):
+
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        run_times.append(time.perf_counter() - start)
+
+    return min(run_times)
+
+
+def benchmark_median_filter(n_samples: int, n_channels: int, window_length: int) -> None:
+    """
+    Prints the throughput (in million samples per second) of each median filter backend and checks that all backends
+    give the same output as scipy.signal.medfilt.
+    :param n_samples: the number of samples per channel
+    :param n_channels: the number of channels
+    :param window_length: the length of the median filter
+    :return: None
+    """
+
+    print(f"\n-------------------Median filter ({n_samples} x {n_channels}, window: {window_length})-------------------\n")
+
+    # generate random IMU-like data
+    sensor_data = np.random.default_rng(RANDOM_SEED).normal(size=(n_samples, n_channels))
+
+    # reference output
+    reference = median_filter(sensor_data, window_length, backend=MEDFILT)
+
+    for backend in MEDFILT_BACKENDS:
+
+        # time the backend
+        run_time = _time_function(median_filter, sensor_data, window_length, backend=backend)
+
+        # check the output
+        is_equal = np.array_equal(median_filter(sensor_data, window_length, backend=backend), reference)
+
+        print(f"{backend:>15}: {run_time:7.3f} s | {n_samples * n_channels / run_time / 1e6:7.1f} MSamples/s "
+              f"| identical to medfilt: {is_equal}")
+
+
+def benchmark_slerp_smoothing(n_samples: int, smooth_factor: float) -> None:
+    """
+    Compares the run time of the array-based SLERP smoothing with a reference implementation that chains
+    pyquaternion.Quaternion.slerp(...) and checks that both give the same result.
+    :param n_samples: the number of quaternions
+    :param smooth_factor: the interpolation factor for SLERP
+    :return: None
+    """
+
+    print(f"\n-------------------SLERP smoothing ({n_samples} quaternions)-------------------\n")
+
+    # generate a random walk of rotations (scalar last) with random sign flips
+    rng = np.random.default_rng(RANDOM_SEED)
+    quaternions = Rotation.from_rotvec(np.cumsum(rng.normal(scale=0.05, size=(n_samples, 3)), axis=0)).as_quat()
+    quaternions[rng.random(n_samples) < 0.3] *= -1
+
+    # time both implementations
+    reference_time = _time_function(_pyquaternion_slerp_smoothing, quaternions, smooth_factor, n_repeats=1)
+    array_time = _time_function(slerp_smoothing, quaternions, smooth_factor)
+
+    # check the output
+    max_error = np.max(np.abs(slerp_smoothing(quaternions, smooth_factor) -
+                              _pyquaternion_slerp_smoothing(quaternions, smooth_factor)))
+
+    print(f"    pyquaternion: {reference_time:7.3f} s")
+    print(f"     array-based: {array_time:7.3f} s | speedup: {reference_time / array_time:5.1f}x "
+          f"| max abs difference: {max_error:.2e}")
+
+
+def benchmark_feature_extraction(n_samples: int, w_size: float) -> None:
+    """
+    Compares the run time of the native feature engine with TSFEL on the production HAR features and checks that both
+    give the same features (column names and values).
+    :param n_samples: the number of samples per channel
+    :param w_size: the window size in seconds
+    :return: None
+    """
+
+    print(f"\n-------------------HAR feature extraction ({n_samples} samples, window: {w_size} s)-------------------\n")
+
+    # generate random IMU-like data for ACC, GYR, and MAG
+    sensor_df = pd.DataFrame(np.random.default_rng(RANDOM_SEED).normal(size=(n_samples, 9)),
+                             columns=[f"{axis}_{sensor}" for sensor in (ACC, GYR, MAG) for axis in 'xyz'])
+
+    # time both engines
+    tsfel_time = _time_function(extract_features, sensor_df, [ACC, GYR, MAG], w_size, FS, engine=TSFEL, n_repeats=1)
+    native_time = _time_function(extract_features, sensor_df, [ACC, GYR, MAG], w_size, FS, engine=NATIVE)
+
+    # check the output
+    tsfel_features = extract_features(sensor_df, [ACC, GYR, MAG], w_size, FS, engine=TSFEL)
+    native_features = extract_features(sensor_df, [ACC, GYR, MAG], w_size, FS, engine=NATIVE)
+    same_columns = list(tsfel_features.columns) == list(native_features.columns)
+    max_error = np.max(np.abs(tsfel_features.to_numpy() - native_features.to_numpy()))
+
+    print(f"           tsfel: {tsfel_time:7.3f} s")
+    print(f"          native: {native_time:7.3f} s | speedup: {tsfel_time / native_time:5.1f}x "
+          f"| same columns: {same_columns} | max abs difference: {max_error:.2e}")
+
+
+def benchmark_forest_inference(n_trees: int, n_features: int, batch_sizes: tuple) -> None:
+    """
+    Compares the latency and throughput of the flattened Random Forest evaluator with
+    RandomForestClassifier.predict_proba(...) for different batch sizes and checks that both give the same probabilities.
+    :param n_trees: the number of trees of the model
+    :param n_features: the number of features of the model
+    :param batch_sizes: the number of windows that are classified at once
+    :return: None
+    """
+
+    print(f"\n-------------------Random Forest inference ({n_trees} trees, {n_features} features)-------------------\n")
+
+    # train a model on random features with three classes
+    rng = np.random.default_rng(RANDOM_SEED)
+    features = rng.normal(size=(N_TRAIN_WINDOWS, n_features))
+    labels = np.digitize(features[:, 0] + features[:, 1] * features[:, 2] + rng.normal(size=N_TRAIN_WINDOWS), [-1, 1])
+    model = RandomForestClassifier(n_estimators=n_trees, n_jobs=-1, random_state=RANDOM_SEED).fit(features, labels)
+
+    # single-threaded inference for both implementations
+    model.set_params(n_jobs=None)
+
+    # compile the model
+    start = time.perf_counter()
+    flat_model = compile_random_forest(model)
+    print(f"     compilation: {time.perf_counter() - start:7.3f} s\n")
+
+    for batch_size in batch_sizes:
+
+        # time both implementations
+        batch = rng.normal(size=(batch_size, n_features))
+        sklearn_time = _time_function(model.predict_proba, batch)
+        flat_time = _time_function(flat_model.predict_proba, batch)
+
+        # check the output
+        is_equal = np.array_equal(model.predict_proba(batch), flat_model.predict_proba(batch))
+
+        print(f"{batch_size:>6} windows | sklearn: {sklearn_time * 1e3:9.2f} ms ({batch_size / sklearn_time:9.0f} windows/s) "
+              f"| flat: {flat_time * 1e3:9.2f} ms ({batch_size / flat_time:9.0f} windows/s) "
+              f"| speedup: {sklearn_time / flat_time:5.1f}x | identical: {is_equal}")
+
+
+def _pyquaternion_slerp_smoothing(quaternions: np.ndarray, smooth_factor: float) -> np.ndarray:
+    """
+    Reference SLERP smoothing using pyquaternion.Quaternion objects (scalar last input and output).
+    :param quaternions: numpy.array of shape (N, 4) in scalar last notation (x, y, z, w)
+    :param smooth_factor: the interpolation factor for SLERP
+    :return: numpy.array of shape (N, 4) containing the smoothed quaternions in scalar last notation
+    """
+
+    # change to scalar first notation
+    quaternions = np.hstack((quaternions[:, -1:], quaternions[:, :-1]))
+
+    # smooth the quaternions (the previous quaternion object may be modified by slerp)
+    smoothed = [Quaternion(quaternions[0])]
+    for quaternion in quaternions[1:]:
+        smoothed.append(Quaternion.slerp(smoothed[-1], Quaternion(quaternion), smooth_factor))
+
+    # change back to scalar last notation
+    smoothed = np.array([quat.elements for quat in smoothed])
+
+    return np.hstack((smoothed[:, 1:], smoothed[:, :1]))
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# program starts here
+# ------------------------------------------------------------------------------------------------------------------- #
+
+def main():
+
+    if BENCHMARK_MEDIAN_FILTER:
+
+        benchmark_median_filter(N_HOURS * 3600 * FS, N_CHANNELS, MEDFILT_WINDOW_LENGTH)
+
+    if BENCHMARK_SLERP_SMOOTHING:
+
+        benchmark_slerp_smoothing(N_SLERP_SAMPLES, SLERP_SMOOTH_FACTOR)
+
+    if BENCHMARK_FEATURE_EXTRACTION:
+
+        benchmark_feature_extraction(N_FEATURE_MINUTES * 60 * FS, HAR_W_SIZE)
+
+    if BENCHMARK_FOREST_INFERENCE:
+
+        benchmark_forest_inference(N_TREES, N_MODEL_FEATURES, INFERENCE_BATCH_SIZES)
+
+
+if __name__ == '__main__':
+
+    main()
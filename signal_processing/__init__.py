@@ -1,3 +1,18 @@
 from .pre_process_android import apply_pre_processing_pipeline
+from .streaming import StreamingPreProcessor
+from .pre_process_muscleban import get_emg_envelopes
+from .emg_spectral import get_emg_spectral_indices
+from .orientation import get_orientation_angles
+from .step_detection import get_steps
+from .noise_exposure import get_noise_exposure, save_noise_exposure
+from .wear_detection import get_wear_masks
 
-__all__ = ['apply_pre_processing_pipeline']
\ No newline at end of file
+__all__ = ['apply_pre_processing_pipeline',
+           'StreamingPreProcessor',
+           'get_emg_envelopes',
+           'get_emg_spectral_indices',
+           'get_orientation_angles',
+           'get_steps',
+           'get_noise_exposure',
+           'save_noise_exposure',
+           'get_wear_masks']
@@ -0,0 +1,198 @@
+"""
+Functions to compute windowed spectral indices of the muscleBAN EMG (e.g., for the assessment of muscle fatigue).
+
+Available Functions
+-------------------
+[Public]
+get_emg_spectral_indices(...): Gets the windowed EMG spectral indices (MNF, MDF, TP) of both muscleBANs.
+compute_spectral_indices(...): Computes the mean frequency, median frequency, and total power over sliding windows.
+------------------
+[Private]
+_get_indices_from_psd(...): Computes the spectral indices from a batch of power spectral densities.
+------------------
+"""
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+from typing import Dict, Tuple
+
+# internal imports
+from constants import EMG, FS_MBAN, MBAN_LEFT, MBAN_RIGHT, TIME_COLUMN_NAME
+from .pre_process_muscleban import apply_transfer_functions, check_converted_muscleban_data
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+MNF = 'MNF'
+MDF = 'MDF'
+TP = 'TP'
+SPECTRAL_INDICES = [MNF, MDF, TP]
+
+# default window and hop size (in seconds) and welch segment length (in samples)
+EMG_WINDOW_SIZE = 1.0
+EMG_HOP_SIZE = 0.5
+WELCH_SEGMENT_LENGTH = 256
+
+# number of windows that are transformed at once (bounds the memory of the welch segments)
+WINDOWS_PER_BATCH = 2 ** 12
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def get_emg_spectral_indices(daily_data_dict: Dict[str, Dict[str, pd.DataFrame]], w_size: float = EMG_WINDOW_SIZE,
+                             hop_size: float = EMG_HOP_SIZE, fs: int = FS_MBAN,
+                             nperseg: int = WELCH_SEGMENT_LENGTH,
+                             convert_muscleban: bool = False) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Gets the windowed spectral indices of the EMG channels of both muscleBANs (left and right): mean frequency (MNF),
+    median frequency (MDF), and total power (TP). The indices have to be computed at the native sampling rate of the
+    muscleBAN, i.e., before the data is downsampled by apply_pre_processing_pipeline(...), as downsampling removes the
+    high-frequency content of the EMG. Thus, daily_data_dict should be the output of load_daily_acquisitions(...) (or
+    the output of apply_pre_processing_pipeline(..., downsample_muscleban=False)). Raw ADC values are converted to mV if
+    convert_muscleban is set to True.
+
+    :param daily_data_dict: nested dictionary {device: {acquisition_time: pd.DataFrame}} containing the muscleBAN data
+    :param w_size: the window size in seconds. Default: 1.0
+    :param hop_size: the time between the start of consecutive windows in seconds. Default: 0.5
+    :param fs: the sampling frequency of the EMG (Hz). Default: 1000
+    :param nperseg: the length of the welch segments in samples (limited to the window size). Default: 256
+    :param convert_muscleban: bool. If true, the EMG holds raw ADC values, which are converted to mV (i.e., the data
+                              was loaded with load_daily_acquisitions(..., convert_muscleban=False)). Default: False
+    :return: nested dictionary {device: {acquisition_time: pd.DataFrame}}. Each DataFrame contains the time of the
+             window centers in seconds and the indices of each EMG channel (e.g., 'EMG_MNF', 'EMG_MDF', 'EMG_TP').
+    """
+
+    # dictionary for holding the spectral indices
+    indices_dict = {}
+
+    for device_name in (MBAN_LEFT, MBAN_RIGHT):
+
+        # skip muscleBANs that were not used
+        if device_name not in daily_data_dict:
+            continue
+
+        indices_dict[device_name] = {}
+
+        for acquisition_time, df in daily_data_dict[device_name].items():
+
+            if convert_muscleban:
+
+                # convert raw ADC values to mV
+                df = apply_transfer_functions(df)
+
+            else:
+
+                # the data has to be converted when loading
+                check_converted_muscleban_data(df)
+
+            # get the EMG columns
+            emg_columns = [column for column in df.columns if EMG in column]
+
+            # compute the indices of all channels at once
+            window_centers, indices = compute_spectral_indices(df[emg_columns].to_numpy(dtype=np.float64), fs=fs,
+                                                               w_size=w_size, hop_size=hop_size, nperseg=nperseg)
+
+            # create the DataFrame (one column per channel and index)
+            indices_df = pd.DataFrame({f"{column}_{index}": indices[index][:, col]
+                                       for col, column in enumerate(emg_columns) for index in SPECTRAL_INDICES})
+            indices_df.insert(0, TIME_COLUMN_NAME, window_centers)
+
+            indices_dict[device_name][acquisition_time] = indices_df
+
+    return indices_dict
+
+
+def compute_spectral_indices(emg_data: np.ndarray, fs: int = FS_MBAN, w_size: float = EMG_WINDOW_SIZE,
+                             hop_size: float = EMG_HOP_SIZE,
+                             nperseg: int = WELCH_SEGMENT_LENGTH) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Computes the mean frequency (MNF), the median frequency (MDF), and the total power (TP) of the EMG over sliding
+    windows. The windows are strided views of the signal (no copy), and the power spectral densities of a batch of
+    windows (of all channels) are estimated in a single call to scipy.signal.welch(...). Only full windows are used.
+
+    :param emg_data: a 1-D or (MxN) array, where M is the signal length in samples and N is the number of channels
+    :param fs: the sampling frequency (Hz). Default: 1000
+    :param w_size: the window size in seconds. Default: 1.0
+    :param hop_size: the time between the start of consecutive windows in seconds. Default: 0.5
+    :param nperseg: the length of the welch segments in samples (limited to the window size). Default: 256
+    :return: tuple containing the time of the window centers in seconds and a dictionary {index: array} with the
+             indices of each window and channel (shape: windows x channels). The frequencies are in Hz and the power in
+             (units of the signal)^2. Windows without power have NaN MNF and MDF.
+    """
+
+    # cast to 2D array
+    emg_data = np.asarray(emg_data, dtype=np.float64)
+    emg_2d = emg_data.reshape(emg_data.shape[0], -1)
+
+    # get the window and hop size in samples
+    window_length = int(round(w_size * fs))
+    hop_length = int(round(hop_size * fs))
+
+    if window_length < 2 or hop_length < 1:
+        raise ValueError(f"The window has to contain at least 2 samples and the hop at least 1 sample. "
+                         f"Provided: w_size={w_size} s, hop_size={hop_size} s at fs={fs} Hz")
+
+    # get the windows (windows x channels x window length)
+    if emg_2d.shape[0] >= window_length:
+        windows = sliding_window_view(emg_2d, window_length, axis=0)[::hop_length]
+    else:
+        windows = np.zeros((0, emg_2d.shape[1], window_length))
+
+    # arrays for holding the indices
+    indices = {index: np.empty((windows.shape[0], emg_2d.shape[1])) for index in SPECTRAL_INDICES}
+
+    # cycle over the batches of windows
+    for start in range(0, windows.shape[0], WINDOWS_PER_BATCH):
+
+        # estimate the power spectral density of all windows and channels of the batch
+        frequencies, psd = signal.welch(windows[start:start + WINDOWS_PER_BATCH], fs=fs,
+                                        nperseg=min(nperseg, window_length), axis=-1)
+
+        # compute the indices
+        batch_indices = _get_indices_from_psd(frequencies, psd)
+
+        for index in SPECTRAL_INDICES:
+            indices[index][start:start + WINDOWS_PER_BATCH] = batch_indices[index]
+
+    # get the time of the window centers
+    window_centers = (np.arange(windows.shape[0]) * hop_length + window_length / 2) / fs
+
+    return window_centers, indices
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_indices_from_psd(frequencies: np.ndarray, psd: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Computes the spectral indices from a batch of power spectral densities.
+    :param frequencies: the frequencies of the psd (Hz)
+    :param psd: array containing the power spectral densities along the last axis
+    :return: dictionary {index: array} with the indices (shape of psd without the last axis)
+    """
+
+    # get the frequency resolution
+    delta_f = frequencies[1] - frequencies[0]
+
+    # get the cumulative power and the total power
+    cumulative_power = np.cumsum(psd, axis=-1) * delta_f
+    total_power = cumulative_power[..., -1]
+
+    # windows without power have no mean and median frequency
+    has_power = total_power > 0
+
+    # mean frequency: power weighted average of the frequencies
+    mean_frequency = np.full(total_power.shape, np.nan)
+    np.divide(psd @ frequencies * delta_f, total_power, out=mean_frequency, where=has_power)
+
+    # median frequency: first frequency at which the cumulative power reaches half of the total power
+    median_frequency = frequencies[np.argmax(cumulative_power >= total_power[..., np.newaxis] / 2, axis=-1)]
+    median_frequency[~has_power] = np.nan
+
+    return {MNF: mean_frequency, MDF: median_frequency, TP: total_power}
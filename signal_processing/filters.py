@@ -7,12 +7,20 @@ Available Functions
 median_and_lowpass_filter(...): Applies a median filter followed by a butterworth lowpass filter.
 gravitational_filter(): Function to filter out the gravitational component of ACC signals.
 get_envelope(...): Gets the envelope of the passed signal.
+acc_body_gravity_filter(...): Fused ACC filter returning the body and the gravitational components in a single pass.
+get_butter_sos(...): Designs a butterworth filter in SOS format (memoized).
+median_filter(...): Applies a median filter along the time axis using one of the available backends.
+slerp_smoothing(...): Smooths a quaternion time series using recursive SLERP on (N, 4) arrays.
 
 ------------------
 [Private]
+_sliding_window_median(...): Median filter based on a sliding window view of the zero-padded signal.
+_design_butter_sos(...): Designs a butterworth filter in SOS format (memoized, read-only).
 _butter_lowpass_filter(...): Filters a signal using a butterworth lowpass filter.
 _moving_average(...): Application of a moving average filter for signal smoothing.
 _window_rms(...): Passes a root-mean-square filter over the data.
+_rolling_mean(...): Mean over centered windows along axis 0 based on blocked cumulative sums.
+_slerp_kernel(...): Recursive SLERP smoothing kernel working on flat views of the quaternion arrays.
 ------------------
 """
 
@@ -20,7 +28,11 @@ _window_rms(...): Passes a root-mean-square filter over the data.
 # imports
 # ------------------------------------------------------------------------------------------------------------------- #
 import numpy as np
-from scipy import signal
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal, ndimage
+from functools import lru_cache
+from typing import Optional, Tuple, List
+import math
 
 # ------------------------------------------------------------------------------------------------------------------- #
 # constants
@@ -29,53 +41,61 @@ RMS = 'rms'
 LOW_PASS = 'lowpass'
 MOVING_AVERAGE = 'MA'
 
+# median filter backends
+MEDFILT = 'medfilt'
+NDIMAGE = 'ndimage'
+SLIDING_WINDOW = 'sliding_window'
+MEDFILT_BACKENDS = [MEDFILT, NDIMAGE, SLIDING_WINDOW]
+
+# positions of the (w, x, y, z) components in scalar-first and scalar-last notation
+SCALAR_FIRST_ORDER = (0, 1, 2, 3)
+SCALAR_LAST_ORDER = (3, 0, 1, 2)
+
+# tolerances used by pyquaternion (unit quaternion check, Pade approximation of the norm, linear interpolation)
+UNIT_TOLERANCE = 1e-14
+PADE_TOLERANCE = 2.107342e-08
+LINEAR_INTERPOLATION_THRESHOLD = 0.9995
+
+# number of samples per block of the fused ACC filter
+FUSED_BLOCK_SIZE = 2 ** 16
+
+# number of samples per block of the sliding window median (bounds the memory of the partitioned windows)
+SLIDING_WINDOW_BLOCK_SIZE = 2 ** 16
+
+# number of samples per block of the rolling window envelopes (bounds the memory and the cumulative sum error)
+ENVELOPE_BLOCK_SIZE = 2 ** 16
+
 
 # ------------------------------------------------------------------------------------------------------------------- #
 # public functions
 # ------------------------------------------------------------------------------------------------------------------- #
-def median_and_lowpass_filter(sensor_data: np.ndarray, fs: int, medfilt_window_length=11) -> np.ndarray:
+def median_and_lowpass_filter(sensor_data: np.ndarray, fs: int, medfilt_window_length=11,
+                              medfilt_backend: str = MEDFILT) -> np.ndarray:
     """
     Applies a median filter followed by a butterworth lowpass filter. The lowpass filter is 3rd order with a cutoff
     frequency of 20 Hz . The processing scheme is based on:
     "A Public Domain Dataset for Human Activity Recognition Using Smartphones"
     https://www.esann.org/sites/default/files/proceedings/legacy/es2013-84.pdf
 
+    The lowpass filter is applied to all channels at once along the time axis (axis=0).
+
     :param sensor_data: a 1-D or (MxN) array, where M is the signal length in samples and
                         N is the number of signals / channels.
     :param fs: the sampling frequency of the acc data.
     :param medfilt_window_length: the length of the median filter (has to be odd). Default: 11
+    :param medfilt_backend: the backend used for the median filter. See median_filter(...) for the available backends.
+                            Default: 'medfilt'
     :return: the filtered data
     """
 
-    # define the filter
-    order = 3
-    f_c = 20
-    filt = signal.butter(order, f_c, fs=fs, output='sos')
-
-    # copy the array
-    filtered_data = sensor_data.copy()
+    # get the (cached) filter
+    sos = get_butter_sos(order=3, cutoff=20, fs=fs, btype='low')
 
-    # check the dimensionality of the input
-    if filtered_data.ndim > 1:  # (MxN) array
+    # apply median filter to all channels
+    med_filt = median_filter(sensor_data, medfilt_window_length, backend=medfilt_backend)
 
-        # cycle of the channels contained in data
-        for channel in range(filtered_data.shape[1]):
-            # get the channel
-            sig = sensor_data[:, channel]
-
-            # apply the median filter
-            sig = signal.medfilt(sig, medfilt_window_length)
-
-            # apply butterworth filter
-            filtered_data[:, channel] = signal.sosfilt(filt, sig)
-
-    else:  # 1-D array
-
-        # apply median filter
-        med_filt = signal.medfilt(sensor_data, medfilt_window_length)
-
-        # apply butterworth filter
-        filtered_data = signal.sosfilt(filt, med_filt)
+    # apply butterworth filter to all channels
+    filtered_data = signal.sosfilt(sos, med_filt, axis=0)
 
     return filtered_data
 
@@ -87,36 +107,164 @@ def gravitational_filter(acc_data: np.ndarray, fs: int) -> np.ndarray:
     The implementation is based on:
     "A Public Domain Dataset for Human Activity Recognition Using Smartphones"
     https://www.esann.org/sites/default/files/proceedings/legacy/es2013-84.pdf
+
+    All channels are filtered at once along the time axis (axis=0).
+
     :param acc_data: a 1-D or (MxN) array, where where M is the signal length in samples and
                  N is the number of signals / channels.
     :param fs: the sampling frequency of the acc data.
     :return: the gravitational component of each signal/channel contained in acc_data
     """
 
-    # define the filter
-    order = 3
-    f_c = 0.3
-    filter = signal.butter(order, f_c, fs=fs, output='sos')
+    # get the (cached) filter
+    sos = get_butter_sos(order=3, cutoff=0.3, fs=fs, btype='low')
 
-    # copy the array
-    gravity_data = acc_data.copy()
+    # apply butterworth filter to all channels
+    gravity_data = signal.sosfilt(sos, acc_data, axis=0)
 
-    # check the dimensionality of the input
-    if gravity_data.ndim > 1:  # (MxN) array
+    return gravity_data
 
-        # cycle of the channels contained in data
-        for channel in range(gravity_data.shape[1]):
-            # get the channel
-            sig = acc_data[:, channel]
 
-            # apply butterworth filter
-            gravity_data[:, channel] = signal.sosfilt(filter, sig)
+def acc_body_gravity_filter(acc_data: np.ndarray, fs: int, medfilt_window_length: int = 11,
+                            medfilt_backend: str = MEDFILT, out_body: Optional[np.ndarray] = None,
+                            out_gravity: Optional[np.ndarray] = None,
+                            block_size: int = FUSED_BLOCK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fused ACC pre-processing. Gives the same result as median_and_lowpass_filter(...) followed by
+    gravitational_filter(...) and the subtraction of the gravitational component, but computes the body and the
+    gravitational components in a single pass over preallocated output buffers:
 
-    else:  # 1-D array
+    (1) the median filter is written into the body buffer
+    (2) the body buffer is traversed in blocks of block_size samples. Each block is low-pass filtered (20 Hz), the
+        gravitational component (0.3 Hz low-pass of the filtered block) is written into the gravity buffer and the
+        body component (filtered block - gravitational component) is written back into the body buffer. The filter
+        states are carried between the blocks.
 
-        gravity_data = signal.sosfilt(filter, acc_data)
+    Thus, apart from the outputs, only block-sized temporary arrays are allocated.
 
-    return gravity_data
+    :param acc_data: a 1-D or (MxN) array, where M is the signal length in samples and N is the number of channels.
+    :param fs: the sampling frequency of the acc data.
+    :param medfilt_window_length: the length of the median filter (has to be odd). Default: 11
+    :param medfilt_backend: the backend used for the median filter. Default: 'medfilt'
+    :param out_body: optional float64 array with the same shape as acc_data for the body component. It must not
+                     overlap with acc_data. Default: None
+    :param out_gravity: optional float64 array with the same shape as acc_data for the gravitational component.
+                        Default: None
+    :param block_size: the number of samples processed at a time. Default: 65536
+    :return: a tuple containing the body component and the gravitational component of the ACC signals
+    """
+
+    # allocate the outputs
+    if out_body is None:
+        out_body = np.empty(acc_data.shape, dtype=np.float64)
+    if out_gravity is None:
+        out_gravity = np.empty(acc_data.shape, dtype=np.float64)
+
+    # get the (cached) filters
+    lowpass_sos = get_butter_sos(order=3, cutoff=20, fs=fs, btype='low')
+    gravity_sos = get_butter_sos(order=3, cutoff=0.3, fs=fs, btype='low')
+
+    # (1) apply median filter to all channels (written into the body buffer)
+    median_filter(acc_data, medfilt_window_length, backend=medfilt_backend, out=out_body)
+
+    # initial filter states (zero - same as filtering the whole signal at once)
+    lowpass_zi = np.zeros((lowpass_sos.shape[0], 2) + acc_data.shape[1:])
+    gravity_zi = np.zeros((gravity_sos.shape[0], 2) + acc_data.shape[1:])
+
+    # (2) cycle over the blocks
+    for start in range(0, acc_data.shape[0], block_size):
+
+        # get the block of the body buffer
+        body_block = out_body[start:start + block_size]
+
+        # apply butterworth filter
+        filtered_block, lowpass_zi = signal.sosfilt(lowpass_sos, body_block, axis=0, zi=lowpass_zi)
+
+        # get the gravitational component
+        gravity_block, gravity_zi = signal.sosfilt(gravity_sos, filtered_block, axis=0, zi=gravity_zi)
+        out_gravity[start:start + block_size] = gravity_block
+
+        # subtract the gravitational component
+        np.subtract(filtered_block, gravity_block, out=body_block)
+
+    return out_body, out_gravity
+
+
+def get_butter_sos(order: int, cutoff: float, fs: float, btype: str = 'low') -> np.ndarray:
+    """
+    Designs a digital butterworth filter in second-order sections (SOS) format. The designs are memoized, thus each
+    combination of (order, cutoff, fs, btype) is only designed once per process. The memoized designs are read-only and
+    each call returns a copy (scipy's sosfilt(...) does not accept read-only arrays), thus the callers can not modify
+    the shared designs.
+
+    :param order: the order of the filter
+    :param cutoff: the cutoff frequency (or a tuple with the two cutoff frequencies for 'band' filters)
+    :param fs: the sampling frequency
+    :param btype: the type of filter ('low', 'high', 'band', 'bandstop'). Default: 'low'
+    :return: numpy.array of shape (n_sections, 6) containing the filter coefficients
+    """
+
+    # get the memoized design
+    return _design_butter_sos(order, cutoff, fs, btype).copy()
+
+
+def median_filter(sensor_data: np.ndarray, window_length: int = 11, backend: str = MEDFILT,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Applies a median filter along the time axis (axis=0) of a 1-D or (MxN) array. The signal is zero-padded at both
+    ends, as done by scipy.signal.medfilt, thus all backends give identical results. The following backends are
+    available:
+    1. 'medfilt': scipy.signal.medfilt(...) applied to each channel
+    2. 'ndimage': scipy.ndimage.median_filter(...) applied to each channel
+    3. 'sliding_window': np.partition(...) over a sliding window view of the signal, processed in blocks
+
+    The N-D kernels of medfilt and ndimage (i.e., kernel_size=(window_length, 1)) are not used since these are
+    considerably slower than cycling over the channels with the 1-D kernel. The data is expected to not contain NaN
+    values, as NaN handling differs between the backends.
+
+    :param sensor_data: a 1-D or (MxN) array, where M is the signal length in samples and N is the number of channels.
+    :param window_length: the length of the median filter (has to be odd). Default: 11
+    :param backend: the backend used for filtering ('medfilt', 'ndimage', 'sliding_window'). Default: 'medfilt'
+    :param out: optional float64 array with the same shape as sensor_data, in which the result is written. It must not
+                overlap with sensor_data. Default: None
+    :return: the median filtered data
+    """
+
+    # check the backend
+    if backend not in MEDFILT_BACKENDS:
+        raise ValueError(f"The median filter backend you chose is not defined. Chosen backend: {backend}. "
+                         f"Available backends: {MEDFILT_BACKENDS}")
+
+    # check the window length
+    if window_length % 2 == 0:
+        raise ValueError(f"The median filter window length has to be odd. Provided window length: {window_length}")
+
+    # allocate the output
+    if out is None:
+        out = np.empty(sensor_data.shape, dtype=np.float64)
+
+    # work on the (MxN) representation of the data
+    data_2d = sensor_data.reshape(sensor_data.shape[0], -1)
+    med_filt = out.reshape(data_2d.shape)
+
+    if backend == SLIDING_WINDOW:
+
+        # apply sliding window median to all channels
+        _sliding_window_median(data_2d.astype(np.float64, copy=False), window_length, med_filt)
+
+    else:
+
+        # cycle over the channels
+        for channel in range(data_2d.shape[1]):
+
+            if backend == MEDFILT:
+                med_filt[:, channel] = signal.medfilt(data_2d[:, channel], window_length)
+
+            else:
+                med_filt[:, channel] = ndimage.median_filter(data_2d[:, channel], size=window_length,
+                                                             mode='constant', cval=0.0)
+
+    return out
 
 
 def get_envelope(signal_array: np.array, envelope_type: str = RMS, type_param: int = 10, fs: int = 100) -> np.array:
@@ -125,7 +273,14 @@ def get_envelope(signal_array: np.array, envelope_type: str = RMS, type_param: i
     1. 'lowpass': uses a lowpass filter
     2. 'ma': uses a moving average filter
     3. 'rms': uses a root-mean-square filter
-    :param signal_array: the signal
+
+    The envelope has the same length as the signal and is time-aligned with it: the moving average and the rms are
+    calculated over centered windows (zero-padded at the edges) and the lowpass filter is applied forwards and
+    backwards (zero phase). The signals are filtered along the time axis (axis=0), thus all channels of an (MxN) array
+    are processed in one call. The moving average and the rms are calculated with cumulative sums, so their run time
+    does not depend on the window size.
+
+    :param signal_array: a 1-D or (MxN) array, where M is the signal length in samples and N is the number of channels
     :param envelope_type: the type of filter that should be used for getting the envelope as defined above
     :param type_param: the parameter for the envelope_type. The following options are available (based on the envelope_type)
                        'lowpass': type_param is the cutoff frequency of the lowpass filter
@@ -137,8 +292,8 @@ def get_envelope(signal_array: np.array, envelope_type: str = RMS, type_param: i
 
     # check for the passed type
     if envelope_type == LOW_PASS:
-        # apply lowpass filter
-        filtered_signal = _butter_lowpass_filter(signal_array, cutoff=10, fs=fs)
+        # apply lowpass filter (forwards and backwards, so that the envelope is not delayed)
+        filtered_signal = _butter_lowpass_filter(signal_array, cutoff=type_param, fs=fs, zero_phase=True)
     elif envelope_type == MOVING_AVERAGE:
         # apply moving average
         filtered_signal = _moving_average(signal_array, wind_size=type_param)
@@ -153,60 +308,300 @@ def get_envelope(signal_array: np.array, envelope_type: str = RMS, type_param: i
     return filtered_signal
 
 
+def slerp_smoothing(quaternion_array: np.ndarray, smooth_factor: float = 0.5, scalar_first: bool = False,
+                    return_scalar_first: bool = False, initial_quaternion: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Smooths a quaternion time series using spherical linear interpolation (SLERP) between the previous smoothed
+    quaternion and the current quaternion (recursive low-pass filter), following:
+    https://www.mathworks.com/help/fusion/ug/lowpass-filter-orientation-using-quaternion-slerp.html
+
+    The quaternions are kept as a contiguous (N, 4) float array. The results are identical (up to floating point
+    precision) to chaining pyquaternion.Quaternion.slerp(...) over the series, including its side effects on the
+    previous smoothed quaternion: it is normalized and, when the dot product with the current quaternion is negative,
+    negated (to take the shorter path).
+
+    :param quaternion_array: 2D numpy.array of shape (N, 4) containing a sequence of quaternions. The quaternions can
+                             be represented in either scalar-first (w, x, y, z) or scalar-last (x, y, z, w) notation.
+    :param smooth_factor: the interpolation factor for SLERP, controlling how much smoothing is applied. The value must
+                          be between [0, 1]. Values closer to 0 increase smoothing, while values closer to 1 retain the
+                          original sequence.
+    :param scalar_first: boolean indicating the notation of quaternion_array. Default: False
+    :param return_scalar_first: boolean indicating the notation of the returned quaternions. Default: False
+    :param initial_quaternion: the smoothed quaternion preceding quaternion_array (in the notation of quaternion_array).
+                               If None, the first quaternion is kept as it is. Default: None
+    :return: numpy.array of shape (N, 4) containing the smoothed quaternions.
+    """
+
+    # check range of smooth factor
+    if not (0 <= smooth_factor <= 1):
+        raise ValueError(f"The smooth factor has to be between [0, 1]. Provided smooth factor: {smooth_factor}")
+
+    # get contiguous float64 input
+    quaternion_array = np.ascontiguousarray(quaternion_array, dtype=np.float64)
+
+    # check the shape
+    if quaternion_array.ndim != 2 or quaternion_array.shape[1] != 4:
+        raise ValueError(f"The quaternions have to be an array of shape (N, 4). Provided shape: {quaternion_array.shape}")
+
+    # position of the scalar component (w) and of the vector components (x, y, z) in the input and in the output
+    input_order = SCALAR_FIRST_ORDER if scalar_first else SCALAR_LAST_ORDER
+    output_order = SCALAR_FIRST_ORDER if return_scalar_first else SCALAR_LAST_ORDER
+
+    # allocate the output
+    smoothed_quaternion_array = np.empty_like(quaternion_array)
+
+    if quaternion_array.shape[0] > 0:
+
+        # get the initial quaternion in (w, x, y, z) order
+        if initial_quaternion is not None:
+            initial_quaternion = [float(initial_quaternion[i]) for i in input_order]
+
+        # smooth the series
+        _slerp_kernel(quaternion_array, smoothed_quaternion_array, smooth_factor, input_order, output_order,
+                      initial_quaternion)
+
+    return smoothed_quaternion_array
+
+
 # ------------------------------------------------------------------------------------------------------------------- #
 # private functions
 # ------------------------------------------------------------------------------------------------------------------- #
-def _butter_lowpass_filter(signal_array: np.array, cutoff: int, fs: int, order: int = 4) -> np.array:
+def _sliding_window_median(sensor_data: np.ndarray, window_length: int, med_filt: np.ndarray) -> None:
+    """
+    Median filter based on a sliding window view of the zero-padded signal. The windows are processed in blocks of
+    SLIDING_WINDOW_BLOCK_SIZE samples and the median of each window is obtained through np.partition(...), thus only
+    a (block x N x window_length) array is allocated at a time.
+
+    :param sensor_data: a (MxN) array, where M is the signal length in samples and N is the number of channels.
+    :param window_length: the length of the median filter (has to be odd)
+    :param med_filt: (MxN) float64 array in which the median filtered data is written
+    :return: None
+    """
+
+    # get the half window length (position of the median inside the window)
+    half_length = window_length // 2
+
+    # zero-pad the signal at both ends (same edge behaviour as scipy.signal.medfilt)
+    padded_data = np.pad(sensor_data, ((half_length, half_length), (0, 0)))
+
+    # get a (M x N x window_length) view of the windows (no copy)
+    windows = sliding_window_view(padded_data, window_length, axis=0)
+
+    # cycle over the blocks
+    for start in range(0, sensor_data.shape[0], SLIDING_WINDOW_BLOCK_SIZE):
+
+        # get the median of the windows in the block
+        block = windows[start:start + SLIDING_WINDOW_BLOCK_SIZE]
+        med_filt[start:start + SLIDING_WINDOW_BLOCK_SIZE] = np.partition(block, half_length, axis=-1)[..., half_length]
+
+
+@lru_cache(maxsize=None)
+def _design_butter_sos(order: int, cutoff: float, fs: float, btype: str) -> np.ndarray:
+    """
+    Designs a digital butterworth filter in second-order sections (SOS) format (see get_butter_sos(...)).
+    :param order: the order of the filter
+    :param cutoff: the cutoff frequency (or a tuple with the two cutoff frequencies for 'band' filters)
+    :param fs: the sampling frequency
+    :param btype: the type of filter ('low', 'high', 'band', 'bandstop')
+    :return: read-only numpy.array of shape (n_sections, 6) containing the filter coefficients
+    """
+
+    # design the filter
+    sos = signal.butter(order, cutoff, btype=btype, fs=fs, output='sos')
+
+    # the design is shared between calls
+    sos.flags.writeable = False
+
+    return sos
+
+
+def _butter_lowpass_filter(signal_array: np.array, cutoff: int, fs: int, order: int = 4,
+                           zero_phase: bool = False) -> np.array:
     """
     Filters a signal using a butterworth lowpass filter.
     :param signal_array: the signal
     :param cutoff: frequency cutoff
     :param fs: sampling frequency
     :param order: order of the filter
+    :param zero_phase: bool. If true, the filter is applied forwards and backwards (no delay). Default: False
     :return: the filtered signal
     """
-    # design filter
-    b, a = signal.butter(order, cutoff, btype='low', fs=fs, analog=False)
+    # get the (cached) filter
+    sos = get_butter_sos(order=order, cutoff=cutoff, fs=fs, btype='low')
 
     # apply filter
-    filtered_signal = signal.lfilter(b, a, signal_array)
+    if zero_phase:
+        filtered_signal = signal.sosfiltfilt(sos, signal_array, axis=0)
+    else:
+        filtered_signal = signal.sosfilt(sos, signal_array, axis=0)
 
     return filtered_signal
 
 
 def _moving_average(signal_array: np.array, wind_size: int = 3) -> np.array:
     """
-    Application of a moving average filter for signal smoothing.
-    :param signal_array: the signal
+    Application of a moving average filter for signal smoothing. The average is calculated over centered windows
+    along axis 0 (zero-padded at the edges), thus the output has the same length as the input.
+    :param signal_array: the signal (1-D or (MxN) array)
     :param wind_size: the window_size
     :return: filtered signal
     """
 
-    # cast window size to int
-    wind_size = int(wind_size)
-
-    # calculate cumulative sum
-    ret = np.cumsum(signal_array, dtype=float)
-
-    # apply window
-    ret[wind_size:] = ret[wind_size:] - ret[:-wind_size]
-
-    return np.concatenate((np.zeros(wind_size - 1), ret[wind_size - 1:] / wind_size))
+    return _rolling_mean(np.asarray(signal_array, dtype=np.float64), int(wind_size), square=False)
 
 
 def _window_rms(signal_array: np.array, window_size: int = 3) -> np.array:
     """
-    Passes a root-mean-square filter over the data.
-    :param signal_array: the data for which the root-mean-square should be calculated
+    Passes a root-mean-square filter over the data. The rms is calculated over centered windows along axis 0
+    (zero-padded at the edges), thus the output has the same length as the input.
+    :param signal_array: the data for which the root-mean-square should be calculated (1-D or (MxN) array)
     :param window_size: the window size
     :return: the rms for the given window
     """
 
-    # square the data
-    data_squared = np.power(signal_array, 2)
+    # get the mean of the squared data
+    mean_squared = _rolling_mean(np.asarray(signal_array, dtype=np.float64), int(window_size), square=True)
+
+    # calculate RMS (the cumulative sum differences may be slightly negative for all zero windows)
+    np.maximum(mean_squared, 0, out=mean_squared)
+
+    return np.sqrt(mean_squared, out=mean_squared)
+
+
+def _rolling_mean(signal_array: np.ndarray, window_size: int, square: bool) -> np.ndarray:
+    """
+    Calculates the mean over centered windows along axis 0 using cumulative sums. The window of sample i covers the
+    samples i - window_size // 2 to i - window_size // 2 + window_size - 1 (same alignment as
+    numpy.convolve(..., mode='same')), with zeros outside the signal. The signal is processed in blocks of
+    ENVELOPE_BLOCK_SIZE samples, so that the cumulative sums are restarted regularly (their rounding error does not
+    grow with the signal length) and only block-sized temporaries are allocated.
+    :param signal_array: float64 array (1-D or (MxN))
+    :param window_size: the window size in samples
+    :param square: bool. If true, the mean of the squared signal is calculated
+    :return: array with the same shape as signal_array containing the means
+    """
+
+    # check the window size
+    if window_size < 1:
+        raise ValueError(f"The window size has to be at least 1. Provided window size: {window_size}")
+
+    # array for holding the means
+    n_samples = signal_array.shape[0]
+    means = np.empty(signal_array.shape)
+
+    # samples before the center of the window
+    half_length = window_size // 2
+
+    # cycle over the blocks
+    for start in range(0, n_samples, ENVELOPE_BLOCK_SIZE):
+
+        stop = min(start + ENVELOPE_BLOCK_SIZE, n_samples)
+
+        # get the samples covered by the windows of the block (zeros outside the signal)
+        first = start - half_length
+        last = stop - half_length + window_size - 1
+        block = np.zeros((last - first + 1,) + signal_array.shape[1:])
+        block[1 + max(-first, 0):1 + (last - first) - max(last - n_samples, 0)] = \
+            signal_array[max(first, 0):min(last, n_samples)]
+
+        # square the data (if needed)
+        if square:
+            np.square(block, out=block)
+
+        # cumulative sum (the leading zero allows getting the sum of the first window)
+        np.cumsum(block, axis=0, out=block)
+
+        # get the window sums and divide by the window size
+        np.subtract(block[window_size:], block[:-window_size], out=means[start:stop])
+        means[start:stop] /= window_size
+
+    return means
+
+
+def _slerp_kernel(quaternion_array: np.ndarray, smoothed_quaternion_array: np.ndarray, smooth_factor: float,
+                  input_order: Tuple[int, int, int, int], output_order: Tuple[int, int, int, int],
+                  initial_quaternion: Optional[List[float]]) -> None:
+    """
+    Recursive SLERP smoothing kernel. Works on flat memoryviews of the input and output arrays with scalar arithmetic,
+    so that no temporary arrays or quaternion objects are created per sample. The operations follow
+    pyquaternion.Quaternion.slerp(...) and pyquaternion.Quaternion._fast_normalise(...).
+
+    :param quaternion_array: C-contiguous float64 array of shape (N, 4) with the quaternions
+    :param smoothed_quaternion_array: C-contiguous float64 array of shape (N, 4), in which the result is written
+    :param smooth_factor: the interpolation factor for SLERP
+    :param input_order: positions of the (w, x, y, z) components in the input
+    :param output_order: positions of the (w, x, y, z) components in the output
+    :param initial_quaternion: the smoothed quaternion preceding the series in (w, x, y, z) order or None
+    :return: None
+    """
+
+    # flat views on the data
+    q_in = memoryview(quaternion_array).cast('B').cast('d')
+    q_out = memoryview(smoothed_quaternion_array).cast('B').cast('d')
+
+    # component positions
+    iw, ix, iy, iz = input_order
+    ow, ox, oy, oz = output_order
 
-    # create window
-    window = np.ones(window_size) / float(window_size)
+    # amount of interpolation
+    amount = min(max(smooth_factor, 0.0), 1.0)
 
-    # calculate RMS
-    return np.sqrt(np.convolve(data_squared, window, 'valid'))
\ No newline at end of file
+    # initialize the previous quaternion (w, x, y, z)
+    if initial_quaternion is None:
+        w0, x0, y0, z0 = q_in[iw], q_in[ix], q_in[iy], q_in[iz]
+        q_out[ow], q_out[ox], q_out[oy], q_out[oz] = w0, x0, y0, z0
+        start_row = 1
+    else:
+        w0, x0, y0, z0 = initial_quaternion
+        start_row = 0
+
+    for row in range(start_row, len(q_in) // 4):
+
+        # normalize the previous smoothed quaternion
+        mag_squared = w0 * w0 + x0 * x0 + y0 * y0 + z0 * z0
+        if abs(1.0 - mag_squared) >= UNIT_TOLERANCE and mag_squared != 0:
+            mag = (1.0 + mag_squared) / 2.0 if abs(1.0 - mag_squared) < PADE_TOLERANCE else math.sqrt(mag_squared)
+            w0, x0, y0, z0 = w0 / mag, x0 / mag, y0 / mag, z0 / mag
+
+        # get and normalize the current quaternion
+        base = 4 * row
+        w1, x1, y1, z1 = q_in[base + iw], q_in[base + ix], q_in[base + iy], q_in[base + iz]
+        mag_squared = w1 * w1 + x1 * x1 + y1 * y1 + z1 * z1
+        if abs(1.0 - mag_squared) >= UNIT_TOLERANCE and mag_squared != 0:
+            mag = (1.0 + mag_squared) / 2.0 if abs(1.0 - mag_squared) < PADE_TOLERANCE else math.sqrt(mag_squared)
+            w1, x1, y1, z1 = w1 / mag, x1 / mag, y1 / mag, z1 / mag
+
+        dot = w0 * w1 + x0 * x1 + y0 * y1 + z0 * z1
+
+        # take the shorter path (the previous smoothed quaternion is negated)
+        if dot < 0.0:
+            w0, x0, y0, z0 = -w0, -x0, -y0, -z0
+            dot = -dot
+
+        # write back the (normalized and possibly negated) previous smoothed quaternion
+        if row > 0:
+            prev = base - 4
+            q_out[prev + ow], q_out[prev + ox], q_out[prev + oy], q_out[prev + oz] = w0, x0, y0, z0
+
+        # linear interpolation for (almost) parallel quaternions, as sin(theta_0) can not be zero
+        if dot > LINEAR_INTERPOLATION_THRESHOLD:
+            w0, x0, y0, z0 = (w0 + amount * (w1 - w0), x0 + amount * (x1 - x0),
+                              y0 + amount * (y1 - y0), z0 + amount * (z1 - z0))
+
+        else:
+            theta_0 = math.acos(dot)
+            sin_theta_0 = math.sin(theta_0)
+            theta = theta_0 * amount
+            sin_theta = math.sin(theta)
+            s0 = math.cos(theta) - dot * sin_theta / sin_theta_0
+            s1 = sin_theta / sin_theta_0
+            w0, x0, y0, z0 = s0 * w0 + s1 * w1, s0 * x0 + s1 * x1, s0 * y0 + s1 * y1, s0 * z0 + s1 * z1
+
+        # normalize the result
+        mag_squared = w0 * w0 + x0 * x0 + y0 * y0 + z0 * z0
+        if abs(1.0 - mag_squared) >= UNIT_TOLERANCE and mag_squared != 0:
+            mag = (1.0 + mag_squared) / 2.0 if abs(1.0 - mag_squared) < PADE_TOLERANCE else math.sqrt(mag_squared)
+            w0, x0, y0, z0 = w0 / mag, x0 / mag, y0 / mag, z0 / mag
+
+        # store the smoothed quaternion
+        q_out[base + ow], q_out[base + ox], q_out[base + oy], q_out[base + oz] = w0, x0, y0, z0
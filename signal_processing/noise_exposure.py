@@ -0,0 +1,269 @@
+"""
+Functions to compute the noise exposure of the subjects from the smartphone NOISE recorder.
+
+Available Functions
+-------------------
+[Public]
+get_noise_exposure(...): Gets the LAeq and the time above a threshold per minute, per acquisition, and for the whole day.
+compute_laeq(...): Computes the equivalent continuous sound level of groups of samples with different durations.
+save_noise_exposure(...): Saves the daily noise exposure of a subject next to the 'ambiente' questionnaire results.
+------------------
+[Private]
+_get_sample_durations(...): Gets the duration of each sample of an acquisition from its timestamps.
+_get_subject_id_from_path(...): Gets the subject id from the device number in the path of the daily folder.
+------------------
+"""
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import os
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Tuple, Optional
+
+# internal imports
+from constants import NOISE, TIME_COLUMN_NAME, RESULTS_FOLDER_NAME, AMBIENTE, CSV
+from utils import create_dir, get_group_from_path
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+ACQUISITION = 'acquisition'
+MINUTE = 'minute'
+DATE = 'date'
+DURATION = 'duration'
+LAEQ = 'LAeq'
+TIME_ABOVE = 'time_above'
+LEX_8H = 'LEX_8h'
+DOSE = 'dose'
+
+# lower exposure action value (dB(A)) of the EU directive 2003/10/EC
+NOISE_THRESHOLD = 80.0
+
+# criterion level (dB(A)) and reference duration (s) of the daily noise dose
+NOISE_CRITERION_LEVEL = 85.0
+REFERENCE_DURATION = 8 * 3600
+
+SECONDS_PER_MINUTE = 60
+
+# folder of the questionnaire results
+QUESTIONNAIRE_FOLDER_NAME = 'questionnaire_processing'
+NOISE_RESULTS_FILENAME = f"results_{AMBIENTE}_noise{CSV}"
+SUBJECT_ID_COLUMN = 'id.1'
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def get_noise_exposure(noise_dict: Dict[str, pd.DataFrame],
+                       threshold: float = NOISE_THRESHOLD) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series]:
+    """
+    Gets the equivalent continuous sound level (LAeq) and the time above a threshold per minute, per acquisition, and
+    for the whole day. The NOISE recorder stores sound levels in dB(A) at irregular intervals, thus each sample is
+    weighted by its duration (time until the next sample) instead of upsampling the recording to a fixed sampling rate.
+    The levels are averaged in the energy domain (see compute_laeq(...)), and all groups of the day are computed at once.
+
+    noise_dict should be the output of load_signals.load_noise_recordings(...) (native sampling rate). The acquisitions
+    of load_daily_acquisitions(...) (daily_data_dict['phone']) are also accepted, as long as they contain the NOISE
+    column, but the zero order hold samples add nothing but computation time.
+
+    :param noise_dict: dictionary {acquisition_time: pd.DataFrame} containing the time in seconds (TIME_COLUMN_NAME
+                       column or index) and the NOISE column
+    :param threshold: the sound level (dB(A)) above which the time is counted. Default: 80 (lower exposure action value)
+    :return: tuple containing
+             (1) pd.DataFrame with the 'acquisition', 'minute' (since the start of the acquisition), 'duration' (s),
+                 'LAeq' (dB(A)) and 'time_above' (s) of each minute
+             (2) pd.DataFrame with the 'duration', 'LAeq' and 'time_above' of each acquisition (indexed by acquisition)
+             (3) pd.Series with the 'duration', 'LAeq', 'time_above', the daily exposure level normalized to 8 hours
+                 ('LEX_8h', dB(A)) and the noise 'dose' (%, 100 % = 8 hours at 85 dB(A)) of the whole day
+    """
+
+    # remove empty acquisitions
+    noise_dict = {acquisition_time: df for acquisition_time, df in noise_dict.items() if not df.empty}
+
+    # lists for holding the levels, durations, and minutes of all acquisitions
+    levels_list, durations_list, minutes_list, acquisition_list = [], [], [], []
+
+    for acquisition, (acquisition_time, df) in enumerate(noise_dict.items()):
+
+        # get the time axis in seconds
+        time_axis = df[TIME_COLUMN_NAME] if TIME_COLUMN_NAME in df.columns else df.index
+        time_axis = np.asarray(time_axis, dtype=np.float64)
+
+        # get the levels and the duration of each sample (samples without a level do not count)
+        levels = df[NOISE].to_numpy(dtype=np.float64)
+        durations = _get_sample_durations(time_axis)
+        durations[np.isnan(levels)] = 0
+
+        levels_list.append(np.nan_to_num(levels))
+        durations_list.append(durations)
+        minutes_list.append(((time_axis - time_axis[0]) // SECONDS_PER_MINUTE).astype(np.int64))
+        acquisition_list.append(np.full(len(df), acquisition))
+
+    # no recordings
+    if not levels_list:
+        raise ValueError("No NOISE recordings were passed.")
+
+    # concatenate all acquisitions
+    levels = np.concatenate(levels_list)
+    durations = np.concatenate(durations_list)
+    minutes = np.concatenate(minutes_list)
+    acquisitions = np.concatenate(acquisition_list)
+
+    # get a group for each minute of each acquisition (consecutive group numbers)
+    n_minutes = np.array([minute[-1] + 1 for minute in minutes_list])
+    minute_offsets = np.concatenate(([0], np.cumsum(n_minutes)[:-1]))
+    minute_groups = minute_offsets[acquisitions] + minutes
+
+    # compute the minute levels
+    minute_duration, minute_laeq, minute_above = compute_laeq(levels, durations, minute_groups,
+                                                              n_groups=int(n_minutes.sum()), threshold=threshold)
+
+    acquisition_times = list(noise_dict.keys())
+    minute_df = pd.DataFrame({ACQUISITION: np.repeat(acquisition_times, n_minutes),
+                              MINUTE: np.arange(n_minutes.sum()) - np.repeat(minute_offsets, n_minutes),
+                              DURATION: minute_duration, LAEQ: minute_laeq, TIME_ABOVE: minute_above})
+
+    # drop the minutes without samples (e.g., gaps in the recording)
+    minute_df = minute_df[minute_df[DURATION] > 0].reset_index(drop=True)
+
+    # compute the acquisition levels
+    acquisition_duration, acquisition_laeq, acquisition_above = compute_laeq(levels, durations, acquisitions,
+                                                                             n_groups=len(acquisition_times),
+                                                                             threshold=threshold)
+
+    acquisition_df = pd.DataFrame({DURATION: acquisition_duration, LAEQ: acquisition_laeq,
+                                   TIME_ABOVE: acquisition_above}, index=pd.Index(acquisition_times, name=ACQUISITION))
+
+    # compute the daily level
+    day_duration, day_laeq, day_above = compute_laeq(levels, durations, np.zeros(levels.size, dtype=np.int64),
+                                                     n_groups=1, threshold=threshold)
+
+    # normalize the daily level to 8 hours and get the dose
+    lex_8h = day_laeq[0] + 10 * np.log10(day_duration[0] / REFERENCE_DURATION)
+    dose = 100 * 10 ** ((lex_8h - NOISE_CRITERION_LEVEL) / 10)
+
+    day_series = pd.Series({DURATION: day_duration[0], LAEQ: day_laeq[0], TIME_ABOVE: day_above[0], LEX_8H: lex_8h,
+                            DOSE: dose})
+
+    return minute_df, acquisition_df, day_series
+
+
+def compute_laeq(levels: np.ndarray, durations: np.ndarray, groups: np.ndarray, n_groups: Optional[int] = None,
+                 threshold: float = NOISE_THRESHOLD) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes the equivalent continuous sound level (LAeq) of groups of samples with different durations:
+
+    LAeq = 10 * log10(sum(duration_i * 10^(level_i / 10)) / sum(duration_i))
+
+    The levels are converted to energy relative to the maximum level, so that the sums do not overflow, and all groups
+    are summed at once with numpy.bincount(...).
+
+    :param levels: the sound levels in dB
+    :param durations: the duration of each sample in seconds
+    :param groups: the group (non-negative integer) of each sample
+    :param n_groups: the number of groups. If None, it is given by the largest group. Default: None
+    :param threshold: the level (dB) above which the time is counted. Default: 80
+    :return: tuple containing the duration, the LAeq (NaN for groups without samples), and the time above the threshold
+             of each group
+    """
+
+    # get the energy of each sample relative to the maximum level
+    reference_level = np.max(levels) if levels.size else 0.0
+    energy = durations * 10 ** ((levels - reference_level) / 10)
+
+    # sum the durations and the energy of each group
+    n_groups = n_groups if n_groups is not None else (int(groups.max()) + 1 if groups.size else 0)
+    total_duration = np.bincount(groups, weights=durations, minlength=n_groups)
+    total_energy = np.bincount(groups, weights=energy, minlength=n_groups)
+    time_above = np.bincount(groups, weights=durations * (levels >= threshold), minlength=n_groups)
+
+    # get the level of each group
+    laeq = np.full(n_groups, np.nan)
+    has_energy = total_energy > 0
+    laeq[has_energy] = reference_level + 10 * np.log10(total_energy[has_energy] / total_duration[has_energy])
+
+    return total_duration, laeq, time_above
+
+
+def save_noise_exposure(day_series: pd.Series, folder_path: str, subject_id: Optional[int] = None) -> None:
+    """
+    Saves the daily noise exposure of a subject next to the results of the 'ambiente' questionnaire domain
+    (questionnaire_processing/results/<group>/results_ambiente_noise.csv). Each row holds the noise exposure of one
+    subject ('id.1') on one day ('date'). If the file already contains the same subject and day, the row is replaced.
+
+    :param day_series: the daily noise exposure returned by get_noise_exposure(...)
+    :param folder_path: path to the folder containing the data of the day (e.g., '.../group1/sensors/LIBPhys #001/2025-09-23')
+    :param subject_id: the id of the subject. If None, it is obtained from the device number in folder_path
+                       (see participants_info.csv). Default: None
+    :return: None
+    """
+
+    # get the subject id
+    if subject_id is None:
+        subject_id = _get_subject_id_from_path(folder_path)
+
+    # create the row of the day
+    day_df = day_series.to_frame().T
+    day_df.insert(0, DATE, Path(folder_path).name)
+    day_df.index = pd.Index([subject_id], name=SUBJECT_ID_COLUMN)
+
+    # get the path to the results file
+    results_path = create_dir(Path(__file__).parent.parent / QUESTIONNAIRE_FOLDER_NAME,
+                              os.path.join(RESULTS_FOLDER_NAME, get_group_from_path(str(folder_path))))
+    results_path = os.path.join(results_path, NOISE_RESULTS_FILENAME)
+
+    # replace the row of the same subject and day
+    if os.path.isfile(results_path):
+
+        results_df = pd.read_csv(results_path, index_col=SUBJECT_ID_COLUMN, dtype={DATE: str})
+        is_same_row = (results_df.index == subject_id) & (results_df[DATE] == day_df[DATE].iloc[0])
+        day_df = pd.concat([results_df[~is_same_row], day_df])
+
+    day_df.to_csv(results_path)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_sample_durations(time_axis: np.ndarray) -> np.ndarray:
+    """
+    Gets the duration of each sample of an acquisition, i.e., the time until the next sample. The last sample gets the
+    median duration of the acquisition.
+    :param time_axis: the timestamps of the samples in seconds
+    :return: numpy.array containing the duration of each sample in seconds
+    """
+
+    # time until the next sample
+    durations = np.diff(time_axis, append=np.nan)
+
+    # the last sample has no next sample
+    durations[-1] = np.median(durations[:-1]) if durations.size > 1 else 0.0
+
+    return durations
+
+
+def _get_subject_id_from_path(folder_path: str) -> int:
+    """
+    Gets the subject id from the device number (e.g., '#001') in the path of the daily folder.
+    :param folder_path: path to the folder containing the data of the day
+    :return: the subject id
+    """
+
+    # find the device number
+    match = re.search(r'#\d+', str(folder_path))
+
+    if not match:
+        raise ValueError(f"No device number (e.g., '#001') was found in the path: {folder_path}")
+
+    # get the subject that used the device
+    participants_df = pd.read_csv(Path(__file__).parent.parent / 'participants_info.csv', sep=';', encoding='utf-8')
+    subject_ids = participants_df.loc[participants_df['device_num'] == match.group(), 'subject_id']
+
+    if subject_ids.empty:
+        raise ValueError(f"The device {match.group()} is not listed in participants_info.csv.")
+
+    return int(subject_ids.iloc[0])
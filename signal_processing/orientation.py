@@ -0,0 +1,123 @@
+"""
+Functions to obtain the orientation of the smartphone and smartwatch (posture angles) from the ROTATION VECTOR.
+
+Available Functions
+-------------------
+[Public]
+get_orientation_angles(...): Gets the inclination, pitch, and roll of the phone and watch for the whole day.
+compute_orientation_angles(...): Computes the inclination, pitch, and roll from an array of quaternions.
+------------------
+[Private]
+None
+------------------
+"""
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+# internal imports
+from constants import ROT, PHONE, WATCH
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+INCLINATION = 'inclination'
+PITCH = 'pitch'
+ROLL = 'roll'
+ORIENTATION_ANGLES = [INCLINATION, PITCH, ROLL]
+
+# order of the quaternion components in the ROT columns
+ROT_COMPONENTS = ['x', 'y', 'z', 'w']
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def get_orientation_angles(daily_data_dict: Dict[str, Dict[str, pd.DataFrame]],
+                           degrees: bool = True) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Gets the inclination, pitch, and roll of the smartphone and smartwatch from the ROT columns ('x_ROT', 'y_ROT',
+    'z_ROT', 'w_ROT'). The quaternions of all acquisitions of both devices are converted in a single batch (see
+    compute_orientation_angles(...)) and split back into the acquisitions.
+
+    :param daily_data_dict: nested dictionary {device: {acquisition_time: pd.DataFrame}} containing the (pre-processed)
+                            smartphone and smartwatch data
+    :param degrees: bool. If true, the angles are returned in degrees, otherwise in radians. Default: True
+    :return: nested dictionary {device: {acquisition_time: pd.DataFrame}} containing the angles (one column per angle).
+             The index of each DataFrame is the same as the one of the corresponding acquisition.
+    """
+
+    # get the acquisitions with ROT data
+    rot_columns = [f"{component}_{ROT}" for component in ROT_COMPONENTS]
+    acquisitions = [(device_name, acquisition_time, df) for device_name in (PHONE, WATCH)
+                    for acquisition_time, df in daily_data_dict.get(device_name, {}).items()
+                    if all(column in df.columns for column in rot_columns)]
+
+    if not acquisitions:
+        return {}
+
+    # convert the quaternions of all acquisitions at once
+    quaternions = np.concatenate([df[rot_columns].to_numpy(dtype=np.float64) for _, _, df in acquisitions])
+    angles = compute_orientation_angles(quaternions, degrees=degrees)
+
+    # split the angles into the acquisitions
+    split_indices = np.cumsum([len(df) for _, _, df in acquisitions])[:-1]
+    split_angles = {angle: np.split(angles[angle], split_indices) for angle in ORIENTATION_ANGLES}
+
+    # dictionary for holding the angles
+    angles_dict = {}
+
+    for position, (device_name, acquisition_time, df) in enumerate(acquisitions):
+
+        angles_dict.setdefault(device_name, {})[acquisition_time] = pd.DataFrame(
+            {angle: split_angles[angle][position] for angle in ORIENTATION_ANGLES}, index=df.index)
+
+    return angles_dict
+
+
+def compute_orientation_angles(quaternions: np.ndarray, degrees: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Computes the inclination, pitch, and roll from an array of quaternions (rotation vector samples). The rotation
+    matrix R of each quaternion is obtained as in android's SensorManager.getRotationMatrixFromVector(...), and the
+    pitch and roll follow SensorManager.getOrientation(...):
+
+    (1) pitch: rotation about the device x-axis, asin(-R[2][1]), in [-90, 90] degrees
+    (2) roll: rotation about the device y-axis, atan2(-R[2][0], R[2][2]), in [-180, 180] degrees
+    (3) inclination: angle between the device z-axis (perpendicular to the screen) and the vertical, acos(R[2][2]), in
+        [0, 180] degrees (0: lying flat, screen up; 90: upright)
+
+    Only the last row of R is needed, thus the angles are computed with a few vectorized operations on the whole array.
+
+    :param quaternions: numpy.array of shape (N, 4) in scalar last notation (x, y, z, w). The quaternions do not need to
+                        be normalized. The angles of zero-norm quaternions are NaN.
+    :param degrees: bool. If true, the angles are returned in degrees, otherwise in radians. Default: True
+    :return: dictionary {angle: numpy.array of shape (N,)} with the keys 'inclination', 'pitch', and 'roll'
+    """
+
+    # normalize the quaternions (zero-norm quaternions are set to NaN)
+    quaternions = np.asarray(quaternions, dtype=np.float64)
+    norm = np.linalg.norm(quaternions, axis=1, keepdims=True)
+    quaternions = np.divide(quaternions, norm, out=np.full_like(quaternions, np.nan), where=norm > 0)
+    x, y, z, w = quaternions.T
+
+    # get the last row of the rotation matrix
+    r_20 = 2 * (x * z - y * w)
+    r_21 = 2 * (y * z + x * w)
+    r_22 = 1 - 2 * (x * x + y * y)
+
+    # compute the angles (clipped due to rounding errors)
+    angles = {INCLINATION: np.arccos(np.clip(r_22, -1, 1)),
+              PITCH: np.arcsin(np.clip(-r_21, -1, 1)),
+              ROLL: np.arctan2(-r_20, r_22)}
+
+    # convert to degrees
+    if degrees:
+
+        for angle in ORIENTATION_ANGLES:
+            np.degrees(angles[angle], out=angles[angle])
+
+    return angles
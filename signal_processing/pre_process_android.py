@@ -8,7 +8,10 @@ _pre_process_inertial_data(...): Applies the pre-processing pipeline of "A Publi
 _slerp_smoothing(...): Smooths a quaternion time series using spherical linear interpolation (SLERP).
 ------------------
 [Private]
-None
+_pre_process_acquisition(...): Pre-processes the data of one acquisition according to the device it was recorded with.
+_pre_process_in_pool(...): Pre-processes all acquisitions in a pool of worker processes, using shared memory.
+_pre_process_shared_acquisition(...): Worker function that pre-processes one acquisition stored in shared memory.
+_get_gravity_names(...): Gets the names of the gravity columns from the names of the ACC columns.
 ------------------
 """
 
@@ -18,29 +21,54 @@ None
 import numpy as np
 import pandas as pd
 from pyquaternion import Quaternion
-from tqdm import tqdm
-from typing import Tuple, List, Dict
-import copy
+from typing import Tuple, List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
 
 # internal imports
-from .filters import median_and_lowpass_filter, gravitational_filter
-from constants import ACC, MAG, GYR, ROT, PHONE, WATCH, FS_MBAN
-from .pre_process_muscleban import apply_transfer_functions, resample_signals
+from .filters import median_and_lowpass_filter, gravitational_filter, acc_body_gravity_filter, slerp_smoothing, MEDFILT
+from constants import ACC, MAG, GYR, ROT, GRAV, PHONE, WATCH, FS_MBAN
+from .pre_process_muscleban import apply_transfer_functions, check_converted_muscleban_data, \
+    downsample_muscleban_data
+from .resampling import resample_signals
 # ------------------------------------------------------------------------------------------------------------------- #
 # constants
 # ------------------------------------------------------------------------------------------------------------------- #
 VALID_SENSORS = [ACC, GYR, MAG, ROT]
 
+# number of samples removed at the beginning of the signals (impulse response of the filters)
+IMPULSE_RESPONSE_SAMPLES = 250
+
+# smooth factor of the SLERP smoothing of the rotation vector
+ROT_SMOOTH_FACTOR = 0.3
+
+# number of bytes per value in the shared memory blocks (float64)
+SHARED_ITEM_SIZE = 8
+
 # ------------------------------------------------------------------------------------------------------------------- #
 # public functions
 # ------------------------------------------------------------------------------------------------------------------- #
 
 def apply_pre_processing_pipeline(daily_data_dict: Dict[str, Dict[str, pd.DataFrame]], fs_android: int = 100,
-                                  downsample_muscleban: bool = True) -> Dict[str, Dict[str, pd.DataFrame]]:
+                                  downsample_muscleban: bool = True, medfilt_backend: str = MEDFILT,
+                                  inplace: bool = False, workers: int = 1, return_gravity: bool = False,
+                                  emg_features: bool = True,
+                                  convert_muscleban: bool = False) -> Dict[str, Dict[str, pd.DataFrame]]:
     """
     This function pre-processes the inertial sensor data from the smartwatch and smartphone devices. For the muscleban,
-    this function applies the transfer functions for the EMG and ACC, filters the EMG, and downsamples the muscleban
-    signals if downsample_muscleban is set to True.
+    this function applies the transfer functions for the EMG and ACC (if convert_muscleban is set to True), filters
+    the EMG, and downsamples the muscleban
+    signals if downsample_muscleban is set to True. When downsampling, the EMG is replaced by its envelope and
+    activation, which are computed at the full sampling rate (see downsample_muscleban_data(...)), unless
+    emg_features is set to False.
+
+    The pre-processing never modifies the input DataFrames, it always creates new ones. If inplace is set to True,
+    these replace the raw DataFrames in daily_data_dict, so that each raw DataFrame can be freed as soon as it has been
+    pre-processed (the peak memory is roughly one copy of the day). Otherwise, a new dictionary is returned.
+
+    If workers > 1, the acquisitions of all devices are pre-processed in a pool of worker processes. The raw data of
+    each acquisition is handed to the workers through shared memory, in which the smartwatch and smartphone data are
+    also pre-processed in place.
 
     :param daily_data_dict: a nested dictionary with the following format: {device_name : {acquisition_time: pd.DataFrame}}
                             (e.g., 'phone': {'09:45:00': pd.DataFrame} , 'watch': {'10:45:00': pd.DataFrame, '11:30:00': pd.DataFrame})
@@ -48,84 +76,313 @@ def apply_pre_processing_pipeline(daily_data_dict: Dict[str, Dict[str, pd.DataFr
                         the muscleban signal will be downsampled to. Default = 100.
     :param downsample_muscleban: bool. If true, muscleban signals are downsampled, if not, these keep the original sampling
                                 frequency
+    :param medfilt_backend: the backend used for the median filter of the inertial sensors ('medfilt', 'ndimage',
+                            'sliding_window'). All backends give identical results. Default: 'medfilt'
+    :param inplace: bool. If true, the pre-processed DataFrames replace the raw DataFrames in daily_data_dict.
+                    Default: False
+    :param workers: the number of worker processes. If 1, all acquisitions are pre-processed in the calling process.
+                    Default: 1
+    :param return_gravity: bool. If true, the gravitational component that is removed from the ACC of the smartwatch
+                           and smartphone is added as extra columns (e.g., 'x_ACC' -> 'x_GRAV'). Default: False
+    :param emg_features: bool. If true (and downsample_muscleban is true), the EMG envelope and activation are computed
+                         at the full sampling rate and downsampled instead of the raw EMG ('EMG' -> 'EMG_ENV',
+                         'EMG_ACT'). Otherwise, the raw EMG is downsampled. Default: True
+    :param convert_muscleban: bool. If true, the muscleban ACC and EMG hold raw ADC values, which are converted to m/s^2
+                              and mV (i.e., the data was loaded with load_daily_acquisitions(..., convert_muscleban=False)).
+                              Otherwise, the data has to be converted already (the default of load_daily_acquisitions(...)).
+                              Default: False
     :return: a nested dictionary with the same format as the input one, but with the preprocessed signals.
     """
 
-    # make a copy to not overwrite the original dictionary
-    processed_dict = copy.deepcopy(daily_data_dict)
+    # the pre-processed DataFrames are new objects, thus only the dictionaries need to be copied
+    processed_dict = daily_data_dict if inplace else {device_name: dict(acquisitions_dict)
+                                                      for device_name, acquisitions_dict in daily_data_dict.items()}
+
+    # pre-process in worker processes
+    if workers > 1:
+
+        _pre_process_in_pool(processed_dict, fs_android, downsample_muscleban, medfilt_backend, workers,
+                             return_gravity, emg_features, convert_muscleban)
+
+        return processed_dict
 
     # cycle over the outer dict with the device names and acquisition data
     for device_name, acquisitions_dict in processed_dict.items():
 
         print(f"\n-------------------Preprocessing {device_name}-------------------\n")
 
+        # cycle over the inner dict with the acquisition times and dataframes
+        for acquisition_time, df in acquisitions_dict.items():
+
+            print(f"Acquisition time: {acquisition_time}\n")
+
+            # preprocess signals and replace the raw data in the dictionary
+            acquisitions_dict[acquisition_time] = _pre_process_acquisition(df, device_name, fs_android,
+                                                                           downsample_muscleban, medfilt_backend,
+                                                                           return_gravity, emg_features,
+                                                                           convert_muscleban)
+
+    return processed_dict
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _pre_process_acquisition(df: pd.DataFrame, device_name: str, fs_android: int, downsample_muscleban: bool,
+                             medfilt_backend: str, return_gravity: bool = False, emg_features: bool = True,
+                             convert_muscleban: bool = False) -> pd.DataFrame:
+    """
+    Pre-processes the data of one acquisition according to the device it was recorded with.
+
+    :param df: pandas.DataFrame containing the sensor data
+    :param device_name: the name of the device (e.g., 'phone', 'watch', 'mBAN_left')
+    :param fs_android: the sampling rate (in Hz) of the smart devices (target sampling rate of the muscleban)
+    :param downsample_muscleban: bool. If true, muscleban signals are downsampled
+    :param medfilt_backend: the backend used for the median filter
+    :param return_gravity: bool. If true, the gravitational component of the ACC is added as extra columns (android)
+    :param emg_features: bool. If true, the EMG envelope and activation are downsampled instead of the raw EMG
+    :param convert_muscleban: bool. If true, the muscleban ACC and EMG are converted from raw ADC values to m/s^2 and mV.
+                              Default: False
+    :return: the pre-processed sensor data
+    """
+
+    # check if it is android device
+    if device_name == PHONE or device_name == WATCH:
+
+        return _pre_process_signals(df, fs_android, medfilt_backend=medfilt_backend, return_gravity=return_gravity)
+
+    if convert_muscleban:
+
+        # convert acc and/or emg to m/s^2 and/or mV
+        df = apply_transfer_functions(df)
+
+    else:
+
+        # the data has to be converted when loading
+        check_converted_muscleban_data(df)
+
+    if downsample_muscleban and emg_features:
+
+        # get the EMG envelope and activation at full rate and downsample them together with the ACC
+        df = downsample_muscleban_data(df, fs=FS_MBAN, fs_new=fs_android)
+
+    elif downsample_muscleban:
+
+        # downsample ACC and/or EMG
+        df = resample_signals(df, fs=FS_MBAN, fs_new=fs_android)
+
+    return df
+
+
+def _pre_process_in_pool(processed_dict: Dict[str, Dict[str, pd.DataFrame]], fs_android: int,
+                         downsample_muscleban: bool, medfilt_backend: str, workers: int,
+                         return_gravity: bool = False, emg_features: bool = True,
+                         convert_muscleban: bool = False) -> None:
+    """
+    Pre-processes all acquisitions in processed_dict in a pool of worker processes and replaces them (in the
+    dictionary) by the pre-processed data. The data of each acquisition is copied into a shared memory block that is
+    attached by the worker, and the raw DataFrame is released from processed_dict as soon as it has been copied.
+
+    :param processed_dict: nested dictionary {device_name : {acquisition_time: pd.DataFrame}} that is updated
+    :param fs_android: the sampling rate (in Hz) of the smart devices (target sampling rate of the muscleban)
+    :param downsample_muscleban: bool. If true, muscleban signals are downsampled
+    :param medfilt_backend: the backend used for the median filter
+    :param workers: the number of worker processes
+    :param return_gravity: bool. If true, the gravitational component of the ACC is added as extra columns (android)
+    :param emg_features: bool. If true, the EMG envelope and activation are downsampled instead of the raw EMG
+    :param convert_muscleban: bool. If true, the muscleban ACC and EMG are converted from raw ADC values to m/s^2 and mV
+    :return: None
+    """
+
+    # dictionary for holding the submitted tasks {future: (device_name, acquisition_time, shared memory, shape, columns)}
+    tasks = {}
+
+    print(f"\n-------------------Preprocessing {list(processed_dict.keys())} ({workers} workers)-------------------\n")
+
+    try:
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+
+            for device_name, acquisitions_dict in processed_dict.items():
+
+                for acquisition_time, df in acquisitions_dict.items():
+
+                    # get the names of the gravity columns (extra columns in the shared memory)
+                    is_android = device_name == PHONE or device_name == WATCH
+                    gravity_names = _get_gravity_names(df.columns) if return_gravity and is_android else []
+                    shape = (df.shape[0], df.shape[1] + len(gravity_names))
+
+                    # copy the data into shared memory (column-major, as the data is processed column-wise)
+                    shared_memory = SharedMemory(create=True, size=max(shape[0] * shape[1] * SHARED_ITEM_SIZE, 1))
+                    shared_data = np.ndarray(shape, dtype=np.float64, buffer=shared_memory.buf, order='F')
+                    shared_data[:, :df.shape[1]] = df.to_numpy(dtype=np.float64)
+                    del shared_data
+
+                    # the data types are lost in the shared memory (check the muscleban data beforehand)
+                    if not is_android and not convert_muscleban:
+                        check_converted_muscleban_data(df)
+
+                    # submit the acquisition
+                    future = executor.submit(_pre_process_shared_acquisition, shared_memory.name, shape,
+                                             list(df.columns), device_name, fs_android, downsample_muscleban,
+                                             medfilt_backend, emg_features, convert_muscleban)
+                    tasks[future] = (device_name, acquisition_time, shared_memory, shape,
+                                     list(df.columns) + gravity_names)
+
+                    # release the raw data
+                    acquisitions_dict[acquisition_time] = None
+                    del df
+
+            # collect the results as the workers finish
+            for future in as_completed(tasks):
+
+                device_name, acquisition_time, shared_memory, shape, columns = tasks[future]
+
+                # data that was not processed in place is returned by the worker
+                processed_df = future.result()
+
+                if processed_df is None:
+
+                    # get the data that was processed in place
+                    shared_data = np.ndarray(shape, dtype=np.float64, buffer=shared_memory.buf, order='F')
+
+                    # remove impulse response (android devices) and copy out of the shared memory
+                    n_discard = IMPULSE_RESPONSE_SAMPLES if device_name in (PHONE, WATCH) else 0
+                    processed_df = pd.DataFrame(shared_data[n_discard:], columns=columns, copy=True)
+                    del shared_data
+
+                print(f"Preprocessed {device_name} acquisition: {acquisition_time}")
+
+                # add to dictionary
+                processed_dict[device_name][acquisition_time] = processed_df
+
+                # free the shared memory
+                shared_memory.close()
+                shared_memory.unlink()
+                del tasks[future]
+
+    finally:
+
+        # free the shared memory of tasks that did not finish
+        for _, _, shared_memory, _, _ in tasks.values():
+            shared_memory.close()
+            shared_memory.unlink()
+
+
+def _pre_process_shared_acquisition(shared_memory_name: str, shape: Tuple[int, int], columns: List[str],
+                                    device_name: str, fs_android: int, downsample_muscleban: bool,
+                                    medfilt_backend: str, emg_features: bool = True,
+                                    convert_muscleban: bool = False) -> Optional[pd.DataFrame]:
+    """
+    Worker function of _pre_process_in_pool(...). Pre-processes the data of one acquisition that is stored in shared
+    memory (float64, column-major). The smartwatch and smartphone data are pre-processed in place (without removing the
+    impulse response). If the shared memory has more columns than the data, the gravitational component of the ACC is
+    written into these. The muscleban data is also converted in place, unless it is downsampled, in which case the
+    (smaller) downsampled data is returned.
+
+    :param shared_memory_name: the name of the shared memory block
+    :param shape: the shape of the shared memory block (samples x columns)
+    :param columns: the column names of the data
+    :param device_name: the name of the device (e.g., 'phone', 'watch', 'mBAN_left')
+    :param fs_android: the sampling rate (in Hz) of the smart devices (target sampling rate of the muscleban)
+    :param downsample_muscleban: bool. If true, muscleban signals are downsampled
+    :param medfilt_backend: the backend used for the median filter
+    :param emg_features: bool. If true, the EMG envelope and activation are downsampled instead of the raw EMG
+    :param convert_muscleban: bool. If true, the muscleban ACC and EMG are converted from raw ADC values to m/s^2 and mV.
+                              Default: False
+    :return: the downsampled muscleban data or None if the data was pre-processed in place
+    """
+
+    # attach to the shared memory
+    shared_memory = SharedMemory(name=shared_memory_name)
+    shared_data = np.ndarray(shape, dtype=np.float64, buffer=shared_memory.buf, order='F')
+
+    try:
+
         # check if it is android device
         if device_name == PHONE or device_name == WATCH:
 
-            # cycle over the inner dict with the acquisition times and dataframes
-            for acquisition_time, df in acquisitions_dict.items():
+            # the extra columns hold the gravitational component
+            gravity_data = shared_data[:, len(columns):] if shape[1] > len(columns) else None
 
-                print(f"Acquisition time: {acquisition_time}\n")
+            _pre_process_sensors(shared_data[:, :len(columns)], columns, fs=fs_android, medfilt_backend=medfilt_backend,
+                                 gravity_data=gravity_data)
+            del gravity_data
 
-                # preprocess signals and add to dictionary
-                processed_dict[device_name][acquisition_time] = _pre_process_signals(df, fs_android)
+            return None
 
-        else:
+        # pre-process the muscleban data
+        processed_df = _pre_process_acquisition(pd.DataFrame(shared_data, columns=columns, copy=False), device_name,
+                                                fs_android, downsample_muscleban, medfilt_backend,
+                                                emg_features=emg_features, convert_muscleban=convert_muscleban)
 
-            # apply muscleban preprocessing
-            # cycle over the inner dict with the acquisition times and respective dataframes
-            for acquisition_time, df in acquisitions_dict.items():
+        if downsample_muscleban:
+            return processed_df
 
-                print(f"Acquisition time: {acquisition_time}")
+        # write the converted data back
+        shared_data[:] = processed_df.to_numpy(dtype=np.float64)
+        del processed_df
 
-                # convert acc and/or emg to m/s^2 and/or mV
-                processed_dict[device_name][acquisition_time] = apply_transfer_functions(df)
+        return None
 
-                if downsample_muscleban:
+    finally:
 
-                    # downsample ACC and/or EMG
-                    processed_dict[device_name][acquisition_time] = resample_signals(df, fs=FS_MBAN, fs_new = fs_android)
+        # release the views on the shared memory before closing it
+        del shared_data
+        shared_memory.close()
 
-    return processed_dict
 
-# ------------------------------------------------------------------------------------------------------------------- #
-# private functions
-# ------------------------------------------------------------------------------------------------------------------- #
-def _pre_process_signals(subject_data: pd.DataFrame, fs: int) -> pd.DataFrame:
+def _pre_process_signals(subject_data: pd.DataFrame, fs: int, medfilt_backend: str = MEDFILT,
+                         return_gravity: bool = False) -> pd.DataFrame:
     """
     Pre-processes the sensors contained in subject_data according to their sensor type and removes samples from the
     impulse response of the filters.
 
     :param subject_data: pandas.DataFrame containing the sensor data
     :param fs: the sampling frequency (Hz)
+    :param medfilt_backend: the backend used for the median filter. Default: 'medfilt'
+    :param return_gravity: bool. If true, the gravitational component of the ACC is added as extra columns
+                           (e.g., 'x_ACC' -> 'x_GRAV'). Default: False
     :return: the processed sensor data
     """
 
     # get the column names (sensor names) first row
-    sensor_names = subject_data.columns.values[::]
+    sensor_names = list(subject_data.columns)
+
+    # get the names of the gravity columns
+    gravity_names = _get_gravity_names(sensor_names) if return_gravity else []
+
+    # copy the data into an array that also holds the gravity columns (_pre_process_sensors works in place)
+    sensor_data = np.empty((subject_data.shape[0], len(sensor_names) + len(gravity_names)), order='F')
+    sensor_data[:, :len(sensor_names)] = subject_data.to_numpy(dtype=np.float64)
 
     # pre-process the data
-    sensor_data = _pre_process_sensors(subject_data.to_numpy(), sensor_names, fs=fs)
+    _pre_process_sensors(sensor_data[:, :len(sensor_names)], sensor_names, fs=fs, medfilt_backend=medfilt_backend,
+                         gravity_data=sensor_data[:, len(sensor_names):] if return_gravity else None)
 
     # remove impulse response
-    sensor_data = sensor_data[250:, :]
+    sensor_data = sensor_data[IMPULSE_RESPONSE_SAMPLES:, :]
 
-    # transform back to dataframe for easier handling of the data
-    sensor_data = pd.DataFrame(sensor_data, columns=sensor_names)
+    # transform back to dataframe for easier handling of the data (without copying the data again)
+    sensor_data = pd.DataFrame(sensor_data, columns=sensor_names + gravity_names, copy=False)
 
     return sensor_data
 
 
-def _pre_process_sensors(data_array: np.array, sensor_names: List[str], fs: int) -> np.array:
+def _pre_process_sensors(data_array: np.array, sensor_names: List[str], fs: int, medfilt_backend: str = MEDFILT,
+                         gravity_data: Optional[np.ndarray] = None) -> np.array:
     """
-    Pre-processes the sensors contained in data_array according to their sensor type.
-    :param data_array: the loaded data
+    Pre-processes the sensors contained in data_array according to their sensor type. The data is processed in place.
+    :param data_array: the loaded data (float array, which is overwritten with the processed data)
     :param sensor_names: the names of the sensors contained in the data array
-    :return:
+    :param fs: the sampling frequency (Hz)
+    :param medfilt_backend: the backend used for the median filter. Default: 'medfilt'
+    :param gravity_data: optional float64 array of shape (samples x ACC columns), in which the gravitational component
+                         of the ACC is written. Default: None
+    :return: data_array containing the processed data
     """
 
-    # make a copy to not override the original data
-    processed_data = data_array.copy()
+    # the data is processed in place
+    processed_data = data_array
 
     # process each sensor
     for valid_sensor in VALID_SENSORS:
@@ -139,19 +396,21 @@ def _pre_process_sensors(data_array: np.array, sensor_names: List[str], fs: int)
             # acc pre-processing
             if valid_sensor == ACC:
 
-                processed_data[:, sensor_cols] = _pre_process_inertial_data(processed_data[:, sensor_cols], is_acc=True,
-                                                                           fs=fs)
+                # get the body and the gravitational component in a single pass (fused filter)
+                body_data, _ = acc_body_gravity_filter(processed_data[:, sensor_cols], fs=fs,
+                                                       medfilt_backend=medfilt_backend, out_gravity=gravity_data)
+                processed_data[:, sensor_cols] = body_data
 
             # gyr and mag pre-processing
             elif valid_sensor in [GYR, MAG]:
 
                 processed_data[:, sensor_cols] = _pre_process_inertial_data(processed_data[:, sensor_cols], is_acc=False,
-                                                                           fs=fs)
+                                                                           fs=fs, medfilt_backend=medfilt_backend)
 
             # rotation vector pre-processing
             else:
 
-                processed_data[:, sensor_cols] = _slerp_smoothing(processed_data[:, sensor_cols], 0.3,
+                processed_data[:, sensor_cols] = _slerp_smoothing(processed_data[:, sensor_cols], ROT_SMOOTH_FACTOR,
                                                                  scalar_first=False,
                                                                  return_numpy=True, return_scalar_first=False)
         else:
@@ -161,7 +420,8 @@ def _pre_process_sensors(data_array: np.array, sensor_names: List[str], fs: int)
     return processed_data
 
 
-def _pre_process_inertial_data(sensor_data: np.array, is_acc: bool = False, fs: int = 100, normalize: bool = False) -> np.array:
+def _pre_process_inertial_data(sensor_data: np.array, is_acc: bool = False, fs: int = 100, normalize: bool = False,
+                               medfilt_backend: str = MEDFILT) -> np.array:
     """
     Applies the pre-processing pipeline of "A Public Domain Dataset for Human Activity Recognition Using Smartphones"
     (https://www.esann.org/sites/default/files/proceedings/legacy/es2013-84.pdf). The pipeline consists of:
@@ -176,11 +436,19 @@ def _pre_process_inertial_data(sensor_data: np.array, is_acc: bool = False, fs:
     :param is_acc: boolean indicating whether the sensor is an accelerometer.
     :param fs: the sampling frequency of the sensor data (in Hz).
     :param normalize: boolean to indicate whether the data should be normalized (division by the max)
+    :param medfilt_backend: the backend used for the median filter. Default: 'medfilt'
     :return: numpy.array containing the pre-processed data.
     """
 
+    # the ACC without normalization can be pre-processed by the fused filter
+    if is_acc and not normalize:
+
+        filtered_data, _ = acc_body_gravity_filter(sensor_data, fs=fs, medfilt_backend=medfilt_backend)
+
+        return filtered_data
+
     # apply median and lowpass filter
-    filtered_data = median_and_lowpass_filter(sensor_data, fs=fs)
+    filtered_data = median_and_lowpass_filter(sensor_data, fs=fs, medfilt_backend=medfilt_backend)
 
     # check if signal is supposed to be normalized
     if normalize:
@@ -210,6 +478,9 @@ def _slerp_smoothing(quaternion_array: np.array, smooth_factor: float = 0.5, sca
     the approach described in:
     https://www.mathworks.com/help/fusion/ug/lowpass-filter-orientation-using-quaternion-slerp.html
 
+    The smoothing is done on (N, 4) arrays by slerp_smoothing(...). pyquaternion.Quaternion objects are only created
+    when return_numpy is False.
+
     :param quaternion_array: 2D numpy.array of shape (N, 4) containing a sequence of quaternions. The quaternions can
                              be represented in either scalar-first (w, x, y, z) or scalar-last (x, y, z, w) notation.
     :param smooth_factor: the interpolation factor for SLERP, controlling how much smoothing is applied. The value must
@@ -223,57 +494,30 @@ def _slerp_smoothing(quaternion_array: np.array, smooth_factor: float = 0.5, sca
              the parameter settings of the boolean parameters.
     """
 
-    # check range of smooth factor
-    if not (0 <= smooth_factor <= 1):
-        raise ValueError(f"The smooth factor has to be between [0, 1]. Provided smooth factor: {smooth_factor}")
-
-    # change quaternion notation to scalar first notation (w, x, y, z)
-    # this is needed as pyquaternion assumes this notation
-    if not scalar_first:
-
-        quaternion_array = np.hstack((quaternion_array[:, -1:], quaternion_array[:, :-1]))
-
-    # get the number of rows
-    num_rows = quaternion_array.shape[0]
-
-    # array for holding the result
-    smoothed_quaternion_array = np.zeros(num_rows, dtype=object)
-
-    # initialize the first quaternion
-    smoothed_quaternion_array[0] = Quaternion(quaternion_array[0])
-
-    # cycle over the quaternion series
-    for row in tqdm(range(1, num_rows), ncols=50, bar_format="{l_bar}{bar}| {percentage:3.0f}% {elapsed}"):
-
-        # get the previous and the current quaternion
-        q_prev = smoothed_quaternion_array[row - 1]
-        q_curr = Quaternion(quaternion_array[row])
-
-        # perform SLERP
-        q_slerp = Quaternion.slerp(q_prev, q_curr, smooth_factor)
-
-        # add the quaternion to the smoothed series
-        smoothed_quaternion_array[row] = q_slerp
+    # smooth the quaternions (array-based SLERP)
+    smoothed_quaternion_series_numpy = slerp_smoothing(quaternion_array, smooth_factor, scalar_first=scalar_first,
+                                                       return_scalar_first=return_scalar_first or not return_numpy)
 
     # return as numpy array
     if return_numpy:
 
-        # transform the output into a 2D numpy array
-        smoothed_quaternion_series_numpy = np.zeros_like(quaternion_array)
-
-        for row, quat in enumerate(smoothed_quaternion_array):
+        return smoothed_quaternion_series_numpy
 
-            smoothed_quaternion_series_numpy[row] = quat.elements
+    # array containing pyquaternion.Quaternion objects
+    smoothed_quaternion_array = np.empty(smoothed_quaternion_series_numpy.shape[0], dtype=object)
+    smoothed_quaternion_array[:] = [Quaternion(quat) for quat in smoothed_quaternion_series_numpy]
 
-        # return in (x, y, z, w) notation
-        if not return_scalar_first:
+    return smoothed_quaternion_array
 
-            smoothed_quaternion_series_numpy = np.hstack((smoothed_quaternion_series_numpy[:, 1:],
-                                                          smoothed_quaternion_series_numpy[:, :1]))
 
-        return smoothed_quaternion_series_numpy
+def _get_gravity_names(sensor_names: List[str]) -> List[str]:
+    """
+    Gets the names of the gravity columns from the names of the ACC columns (e.g., 'x_ACC' -> 'x_GRAV').
+    :param sensor_names: the names of the sensors
+    :return: list containing the names of the gravity columns
+    """
 
-    return smoothed_quaternion_array
+    return [sensor_name.replace(ACC, GRAV) for sensor_name in sensor_names if ACC in sensor_name]
 
 
 def trim_data(data: np.ndarray, w_size: float, fs: int) -> Tuple[np.ndarray, int]:
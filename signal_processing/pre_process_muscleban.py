@@ -5,22 +5,30 @@ Available Functions
 -------------------
 [Public]
 apply_transfer_functions(...): Applies transfer functions to accelerometer data and EMG data from the muscleBAN.
-resample_signals(...): Resamples all sensor signals to a new sampling frequency using polyphase filtering.
+convert_adc_to_units(...): Converts raw 16-bit ADC values of a channel to mV (EMG) or m/s^2 (ACC) using a lookup table.
+get_transfer_function_lut(...): Gets the lookup table of the transfer function of a sensor (memoized).
+check_converted_muscleban_data(...): Checks that the ACC and EMG columns of the muscleBAN data do not hold integer ADC values.
+resample_signals(...): Resamples all sensor signals to a new sampling frequency (see resampling.py).
+get_emg_envelopes(...): Gets the envelopes of the EMG channels of both muscleBANs.
+get_emg_activation(...): Detects muscle activation by thresholding the EMG envelope.
+downsample_muscleban_data(...): Multi-rate downsampling: EMG envelope and activation at full rate, then decimation.
 -------------------
 [Private]
 _emg_transfer_function(...): Converts raw EMG ADC values to millivolts.
 _acc_transfer_function(...): Converts raw accelerometer ADC values to m/s².
-_generate_time_column_from_samples(...): Generates a time axis in seconds based on the number of samples and sampling frequency.
 """
 # ------------------------------------------------------------------------------------------------------------------- #
 # imports
 # ------------------------------------------------------------------------------------------------------------------- #
 import pandas as pd
 import numpy as np
-from scipy.signal import resample_poly
+from functools import lru_cache
+from typing import Dict, Optional
 
 # internal imports
-from constants import TIME_COLUMN_NAME, ACC, EMG
+from constants import ACC, EMG, FS_MBAN, MBAN_LEFT, MBAN_RIGHT
+from .filters import get_envelope, RMS
+from .resampling import resample_signals
 
 # ------------------------------------------------------------------------------------------------------------------- #
 # constants
@@ -28,6 +36,20 @@ from constants import TIME_COLUMN_NAME, ACC, EMG
 N_BITS = 16
 GRAVITATIONAL_ACC = 9.81
 
+# number of possible ADC values (size of the lookup tables)
+N_ADC_VALUES = 2 ** N_BITS
+
+# default EMG envelope window (100 ms at 1000 Hz)
+EMG_ENVELOPE_WINDOW = 100
+
+# suffixes of the derived EMG channels (e.g., 'EMG_ENV', 'EMG_ACT')
+EMG_ENVELOPE = 'ENV'
+EMG_ACTIVATION = 'ACT'
+
+# activation threshold: factor applied to the baseline (low percentile) of the envelope
+EMG_BASELINE_PERCENTILE = 5
+EMG_ACTIVATION_FACTOR = 3.0
+
 # ------------------------------------------------------------------------------------------------------------------- #
 # public functions
 # ------------------------------------------------------------------------------------------------------------------- #
@@ -35,84 +57,244 @@ def apply_transfer_functions(muscleban_df: pd.DataFrame) -> pd.DataFrame:
     """
     Apply transfer functions to muscleban data.
     This function cycles over the columns of the dataframe containing the muscleban data and when it finds accelerometer
-    and EMG columns, applies the respective transfer functions to convert to m/s^2 and mV respectively.
+    and EMG columns, applies the respective transfer functions to convert to m/s^2 and mV respectively. The conversion
+    is done through lookup tables (see convert_adc_to_units(...)), writing directly into a float32 array, so the input
+    DataFrame is neither copied nor modified.
     :param muscleban_df: pd.DataFrame containing the muscleban data
-    :return: pd.DataFrame with the converted acc and emg signals.
+    :return: pd.DataFrame with the converted acc and emg signals (float32). The remaining columns are kept as they are.
     """
-    # get copy of the dataframe to not overwrite the data
-    processed_df = muscleban_df.copy()
 
     print("Applying transfer functions to muscleban data")
 
-    # cycle over the columns of the muscleban dataframe
-    for column in processed_df.columns:
+    # get the columns that are converted and their sensor
+    sensor_columns = {column: ACC if ACC in column else EMG for column in muscleban_df.columns
+                      if ACC in column or EMG in column}
 
-        # if it's ACC column
-        if ACC in column:
+    # array for holding the converted data (column-major, so that each column is written contiguously)
+    converted_data = np.empty((len(muscleban_df), len(sensor_columns)), dtype=np.float32, order='F')
 
-            # apply ACC transfer function
-            processed_df[column] = _acc_transfer_function(processed_df[column])
+    # cycle over the acc and emg columns and apply the transfer function
+    for col, (column, sensor) in enumerate(sensor_columns.items()):
 
-        # if it is emg column
-        elif EMG in column:
+        convert_adc_to_units(muscleban_df[column].to_numpy(), sensor, out=converted_data[:, col])
 
-            # apply EMG transfer function
-            processed_df[column] = _emg_transfer_function(processed_df[column])
+    # create the DataFrame (without copying the converted data)
+    processed_df = pd.DataFrame(converted_data, columns=list(sensor_columns), index=muscleban_df.index, copy=False)
+
+    # add the remaining columns (e.g., nSeq) at their original position
+    for position, column in enumerate(muscleban_df.columns):
+
+        if column not in sensor_columns:
+
+            processed_df.insert(position, column, muscleban_df[column].to_numpy(copy=True))
 
     return processed_df
 
 
-def resample_signals(sensor_df: pd.DataFrame, fs: int, fs_new: int) -> pd.DataFrame:
+def convert_adc_to_units(adc_data: np.ndarray, sensor: str, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Converts the raw 16-bit ADC values of a muscleBAN channel to mV (EMG) or m/s^2 (ACC). Since there are only
+    2^16 possible ADC values, the transfer function is precomputed for all of them and the conversion is a single
+    lookup per sample. The results are the same as the ones of _emg_transfer_function(...) and
+    _acc_transfer_function(...), cast to float32.
+
+    :param adc_data: array containing the ADC values. uint16 and int16 arrays are used directly (int16 values are
+                     interpreted as the bit pattern of the unsigned ADC value). Other arrays are checked to be in the
+                     range of the ADC.
+    :param sensor: the sensor of the channel ('ACC' or 'EMG')
+    :param out: optional float32 array with the same shape as adc_data in which the result is written. Default: None
+    :return: float32 array containing the converted data
     """
-    Function to resample signals using polyphase filtering. If fs_new > fs, the function upsamples the signal.
-    If fs_new < fs, this function downsamples the signals. This function also generates a time axis in seconds based
-    on the length of the signals and on the new sampling frequency. The first column of sensor_df is considered to be
-    a time-axis (or an index column) and the remaining columns are considered signals.
 
-    :param sensor_df: A DataFrame containing timestamps or indices in first column and sensor data in the remaining columns.
-    :param fs: The original sampling frequency.
-    :param fs_new: The target sampling frequency in Hz.
-    :return: A DataFrame where the first column is the timestamps in seconds and the remaining are resampled data.
+    # get the lookup table
+    lut = get_transfer_function_lut(sensor)
+
+    # cast to numpy.array
+    adc_data = np.asarray(adc_data)
+
+    if adc_data.dtype == np.int16:
+
+        # reinterpret as unsigned values (no copy)
+        adc_data = adc_data.view(np.uint16)
+
+    elif adc_data.dtype != np.uint16:
+
+        # check that the values are valid ADC values
+        if adc_data.size and (np.min(adc_data) < 0 or np.max(adc_data) >= N_ADC_VALUES):
+            raise ValueError(f"The {sensor} data contains values outside of the range of the {N_BITS}-bit ADC.")
+
+        adc_data = adc_data.astype(np.uint16)
+
+    # look up the converted values (all indices are valid, thus no bounds checking is needed)
+    return np.take(lut, adc_data, out=out, mode='clip')
+
+
+@lru_cache(maxsize=None)
+def get_transfer_function_lut(sensor: str) -> np.ndarray:
+    """
+    Gets the lookup table of the transfer function of a sensor, i.e., the converted value of each of the 2^16 ADC
+    values. The tables are memoized, thus the returned array is shared between calls (it is read-only).
+
+    :param sensor: the sensor ('ACC' or 'EMG')
+    :return: float32 array of length 2^16 containing the converted values
     """
-    print(f"Resampling data to {fs_new} Hz\n")
 
-    # list for holding the resampled signals
-    resampled_signals = []
+    # all possible ADC values
+    adc_values = pd.Series(np.arange(N_ADC_VALUES))
 
-    # extract signals (and cast to numpy.array)
-    signals = sensor_df.iloc[:, 1:].values
+    if sensor == ACC:
+        lut = _acc_transfer_function(adc_values).to_numpy(dtype=np.float32)
 
-    # calculate resampling factor based on original fs and the new fs
-    if fs > fs_new:
-        factor = round(fs/fs_new)
-        resample = 'down'
+    elif sensor == EMG:
+        lut = _emg_transfer_function(adc_values).to_numpy(dtype=np.float32)
 
     else:
-        factor = round(fs_new/fs)
-        resample = 'up'
+        raise ValueError(f"There is no transfer function for the sensor {sensor}. Supported sensors: {[ACC, EMG]}")
+
+    # the table is shared between calls
+    lut.flags.writeable = False
 
-    # cycle over the signal channels
-    for channel in range(signals.shape[1]):
+    return lut
 
-        if resample == 'up':
 
-            # upsample signals using polyphase filtering
-            resampled_signal = resample_poly(signals[:, channel], up=factor, down=1)
+def check_converted_muscleban_data(muscleban_df: pd.DataFrame) -> None:
+    """
+    Checks that the ACC and EMG columns of the muscleBAN data were converted to m/s^2 and mV. Whether the data is
+    converted is never decided from the data types (raw ADC values may be stored as floats), this check only catches
+    data that is certainly not converted, i.e., ACC or EMG columns holding integers (e.g., the output of
+    load_daily_acquisitions(..., convert_muscleban=False)).
+
+    :param muscleban_df: pd.DataFrame containing the muscleban data
+    :return: None
+    """
+
+    # get the columns holding integers
+    integer_columns = [column for column in muscleban_df.columns if (ACC in column or EMG in column)
+                       and pd.api.types.is_integer_dtype(muscleban_df[column])]
+
+    if integer_columns:
+        raise ValueError(f"The muscleBAN columns {integer_columns} hold raw ADC values. Set convert_muscleban=True to "
+                         f"convert them to m/s^2 and mV.")
+
+
+def get_emg_envelopes(daily_data_dict: Dict[str, Dict[str, pd.DataFrame]], envelope_type: str = RMS,
+                      type_param: int = EMG_ENVELOPE_WINDOW,
+                      fs: int = FS_MBAN) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Gets the envelopes of the EMG channels of both muscleBANs (left and right). For each acquisition, all EMG channels
+    are filtered in a single call to get_envelope(...). The envelopes have the same length as the signals and are
+    time-aligned with them (see get_envelope(...)).
+
+    The EMG is full-wave rectified (absolute value) before computing the 'MA' and 'lowpass' envelopes, as these filters
+    would otherwise average the zero-mean EMG to (almost) zero. The 'rms' envelope does not depend on the sign of the
+    signal, thus it is computed on the EMG directly.
+
+    The EMG should already be converted to mV and not downsampled, i.e., the output of
+    apply_pre_processing_pipeline(..., downsample_muscleban=False).
+
+    :param daily_data_dict: nested dictionary {device: {acquisition_time: pd.DataFrame}} containing the muscleBAN data
+    :param envelope_type: the type of envelope ('rms', 'MA', or 'lowpass'). Default: 'rms'
+    :param type_param: the window size in samples ('rms', 'MA') or the cutoff frequency ('lowpass'). Default: 100
+    :param fs: the sampling frequency of the EMG (Hz). Default: 1000
+    :return: nested dictionary {device: {acquisition_time: pd.DataFrame}} with the envelopes of the EMG columns of the
+             muscleBANs. The index of each DataFrame is the same as the one of the corresponding acquisition.
+    """
+
+    # dictionary for holding the envelopes
+    envelopes_dict = {}
+
+    for device_name in (MBAN_LEFT, MBAN_RIGHT):
+
+        # skip muscleBANs that were not used
+        if device_name not in daily_data_dict:
+            continue
+
+        envelopes_dict[device_name] = {}
+
+        for acquisition_time, df in daily_data_dict[device_name].items():
+
+            # get the EMG columns
+            emg_columns = [column for column in df.columns if EMG in column]
+
+            # get the EMG of all channels (rectified for the moving average and the lowpass envelopes)
+            emg = df[emg_columns].to_numpy(dtype=np.float64)
+            if envelope_type != RMS:
+                emg = np.abs(emg)
+
+            # get the envelopes of all channels at once
+            envelopes = get_envelope(emg, envelope_type=envelope_type, type_param=type_param, fs=fs)
+
+            envelopes_dict[device_name][acquisition_time] = pd.DataFrame(envelopes, columns=emg_columns,
+                                                                         index=df.index, copy=False)
+
+    return envelopes_dict
+
+def get_emg_activation(envelope: np.ndarray, baseline_percentile: float = EMG_BASELINE_PERCENTILE,
+                       activation_factor: float = EMG_ACTIVATION_FACTOR) -> np.ndarray:
+    """
+    Detects muscle activation by thresholding the EMG envelope. Since there is no dedicated rest period in the
+    acquisitions, the baseline of each channel is estimated as a low percentile of its envelope (i.e., the quietest
+    part of the acquisition), and the muscle is considered active when the envelope exceeds activation_factor times
+    the baseline.
+
+    :param envelope: a 1-D or (MxN) array containing the envelopes, where M is the signal length in samples and N is the
+                     number of channels
+    :param baseline_percentile: the percentile of the envelope that is used as baseline. Default: 5
+    :param activation_factor: the factor that is applied to the baseline to get the threshold. Default: 3.0
+    :return: float array with the same shape as envelope, containing 1.0 where the muscle is active and 0.0 otherwise
+    """
+
+    # get the threshold of each channel
+    threshold = np.percentile(envelope, baseline_percentile, axis=0) * activation_factor
+
+    return (envelope > threshold).astype(np.float64)
+
+
+def downsample_muscleban_data(muscleban_df: pd.DataFrame, fs: int = FS_MBAN, fs_new: int = 100,
+                              envelope_window: int = EMG_ENVELOPE_WINDOW) -> pd.DataFrame:
+    """
+    Multi-rate downsampling of the muscleBAN data. Downsampling the EMG directly removes most of its content (the EMG
+    bandwidth is far above fs_new / 2). Thus, the EMG envelope (RMS) and the muscle activation are computed at the full
+    sampling rate and only these low-bandwidth channels are downsampled, together with the ACC. After downsampling,
+    the activation channel holds the fraction of time the muscle was active (between 0 and 1). The raw EMG columns
+    are replaced by the derived channels (e.g., 'EMG' -> 'EMG_ENV', 'EMG_ACT').
+
+    :param muscleban_df: pd.DataFrame containing the converted muscleban data (first column is the time or nSeq)
+    :param fs: the sampling frequency of the muscleban (Hz). Default: 1000
+    :param fs_new: the target sampling frequency (Hz). Default: 100
+    :param envelope_window: the window size of the RMS envelope in samples. Default: 100
+    :return: pd.DataFrame containing the downsampled data (see resample_signals(...))
+    """
+
+    # get the EMG columns
+    emg_columns = [column for column in muscleban_df.columns if EMG in column]
+
+    # get the envelope and the activation of all channels at full rate
+    envelopes = get_envelope(muscleban_df[emg_columns].to_numpy(dtype=np.float64), envelope_type=RMS,
+                             type_param=envelope_window, fs=fs)
+    activations = get_emg_activation(envelopes)
+
+    # replace the EMG columns by the derived channels (at the same position)
+    derived_columns = {}
+    for column in muscleban_df.columns:
+
+        if column in emg_columns:
+
+            derived_columns[f"{column}_{EMG_ENVELOPE}"] = envelopes[:, emg_columns.index(column)]
+            derived_columns[f"{column}_{EMG_ACTIVATION}"] = activations[:, emg_columns.index(column)]
 
         else:
 
-            # downsample signals using polyphase filtering
-            resampled_signal = resample_poly(signals[:, channel], up=1, down=factor)
+            derived_columns[column] = muscleban_df[column].to_numpy()
 
-        # append to resample signals
-        resampled_signals.append(resampled_signal)
+    derived_df = pd.DataFrame(derived_columns, index=muscleban_df.index)
 
-    # generate new time axis with the new sampling frequency
-    time_axis_inter = _generate_time_column_from_samples(resampled_signals[0].shape[0], fs_new)
+    # downsample the ACC and the derived channels
+    resampled_df = resample_signals(derived_df, fs=fs, fs_new=fs_new)
 
-    # create interpolated DataFrame and change time column name
-    resampled_df = pd.DataFrame(np.column_stack([time_axis_inter] + resampled_signals),
-                                   columns=[TIME_COLUMN_NAME] + list(sensor_df.columns[1:]))
+    # the activation is a fraction of time (the filter may slightly over- or undershoot)
+    activation_columns = [f"{column}_{EMG_ACTIVATION}" for column in emg_columns]
+    resampled_df[activation_columns] = resampled_df[activation_columns].clip(0, 1)
 
     return resampled_df
 
@@ -143,20 +325,3 @@ def _acc_transfer_function(acc_series: pd.Series) -> pd.Series:
 
     return acc_series
 
-
-def _generate_time_column_from_samples(signal_size: int, fs: int) -> np.ndarray:
-    """
-    Generates a time axis in seconds based on the number of samples and sampling frequency.
-
-    :param signal_size: size of the signal in samples
-    :param fs: the sampling frequency of the signal in Hz
-    :return: The generated time axis
-    """
-
-    # get time (seconds) between each sample
-    delta_t = 1/fs
-
-    # generate time column in seconds
-    time_column = np.arange(signal_size) * delta_t
-
-    return time_column
\ No newline at end of file
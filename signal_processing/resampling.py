@@ -0,0 +1,313 @@
+"""
+Functions for resampling signals by arbitrary rational factors using polyphase filtering.
+
+Available Functions
+-------------------
+[Public]
+resample_signals(...): Resamples all sensor signals of a DataFrame to a new sampling frequency.
+resample_array(...): Resamples all channels of an array along the time axis (axis=0).
+resample_chunks(...): Resamples a signal that is passed in consecutive chunks (for recordings that do not fit in memory).
+get_resampling_factors(...): Gets the (coprime) up- and downsampling factors for a pair of sampling frequencies.
+get_resampling_filter(...): Designs the anti-aliasing FIR filter for a resampling ratio (memoized).
+------------------
+[Private]
+_get_polyphase_filter(...): Gets the zero-padded and scaled FIR filter used by scipy.signal.resample_poly(...).
+_resample_buffer(...): Gets a range of output samples of the resampled signal from the buffered input samples.
+_generate_time_column_from_samples(...): Generates a time axis in seconds based on the number of samples and sampling frequency.
+------------------
+"""
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import pandas as pd
+import numpy as np
+from scipy.signal import resample_poly, upfirdn, firwin
+from fractions import Fraction
+from functools import lru_cache
+from typing import Tuple, Iterable, Iterator, Union
+
+# internal imports
+from constants import TIME_COLUMN_NAME
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+# largest up- or downsampling factor when the ratio of the sampling frequencies has to be approximated (e.g.,
+# 1000 Hz -> 99.97 Hz, whose exact factors are 9997 / 100000). 100 Hz <-> 99.97 Hz is resampled exactly (9997 / 10000).
+MAX_RESAMPLING_FACTOR = 10000
+
+# largest relative error of the approximated ratio (1e-6: 0.03 s drift over 8 h)
+MAX_RESAMPLING_RATIO_ERROR = 1e-6
+
+# filter settings of scipy.signal.resample_poly(...)
+RESAMPLING_WINDOW = ('kaiser', 5.0)
+HALF_LENGTH_FACTOR = 10
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def resample_signals(sensor_df: pd.DataFrame, fs: float, fs_new: float) -> pd.DataFrame:
+    """
+    Function to resample signals using polyphase filtering. If fs_new > fs, the function upsamples the signal.
+    If fs_new < fs, this function downsamples the signals. The ratio between the sampling frequencies does not need to
+    be an integer (e.g., 1000 Hz -> 100 Hz, 100 Hz -> 50 Hz, 44100 Hz -> 1000 Hz). This function also generates a time
+    axis in seconds based on the length of the signals and on the new sampling frequency. The first column of
+    sensor_df is considered to be a time-axis (or an index column) and the remaining columns are considered signals.
+
+    :param sensor_df: A DataFrame containing timestamps or indices in first column and sensor data in the remaining columns.
+    :param fs: The original sampling frequency.
+    :param fs_new: The target sampling frequency in Hz.
+    :return: A DataFrame where the first column is the timestamps in seconds and the remaining are resampled data.
+    """
+    print(f"Resampling data to {fs_new} Hz\n")
+
+    # resample all signals at once (and cast to numpy.array)
+    resampled_signals = resample_array(sensor_df.iloc[:, 1:].to_numpy(dtype=np.float64), fs, fs_new)
+
+    # generate new time axis with the new sampling frequency
+    time_axis_inter = _generate_time_column_from_samples(resampled_signals.shape[0], fs_new)
+
+    # create interpolated DataFrame and change time column name
+    resampled_df = pd.DataFrame(np.column_stack((time_axis_inter, resampled_signals)),
+                                columns=[TIME_COLUMN_NAME] + list(sensor_df.columns[1:]))
+
+    return resampled_df
+
+
+def resample_array(signals: np.ndarray, fs: float, fs_new: float) -> np.ndarray:
+    """
+    Resamples all channels of an array along the time axis (axis=0) using polyphase filtering. The result is the same
+    as calling scipy.signal.resample_poly(...) for each channel, but the anti-aliasing filter is only designed once
+    per resampling ratio.
+
+    :param signals: a 1-D or (MxN) array, where M is the signal length in samples and N is the number of channels
+    :param fs: the original sampling frequency (Hz)
+    :param fs_new: the target sampling frequency (Hz)
+    :return: numpy.array containing the resampled signals
+    """
+
+    # get the resampling factors
+    up, down = get_resampling_factors(fs, fs_new)
+
+    # nothing to resample
+    if up == down == 1:
+        return np.array(signals, dtype=np.float64)
+
+    # resample all channels at once with the (cached) filter
+    return resample_poly(np.asarray(signals, dtype=np.float64), up, down, axis=0,
+                         window=get_resampling_filter(up, down))
+
+
+def resample_chunks(chunks: Iterable[Union[np.ndarray, pd.DataFrame]], fs: float,
+                    fs_new: float) -> Iterator[np.ndarray]:
+    """
+    Resamples a signal that is passed in consecutive chunks (e.g., read from a file piece by piece), so that recordings
+    that do not fit in memory can be resampled. Only the current chunk and the last input samples that are still needed
+    by the filter are kept in memory. Concatenating the yielded arrays gives the same result as
+    resample_array(...) on the whole signal, independently of how the signal is chunked.
+
+    Example:
+        resampled_signal = np.concatenate(list(resample_chunks(chunks, fs=1000, fs_new=100)))
+
+    :param chunks: iterable of 1-D or (MxN) arrays with consecutive samples of the signal (same number of channels)
+    :param fs: the original sampling frequency (Hz)
+    :param fs_new: the target sampling frequency (Hz)
+    :return: generator yielding the resampled samples that are ready after each chunk (the last samples are yielded
+             once all chunks were passed)
+    """
+
+    # get the resampling factors
+    up, down = get_resampling_factors(fs, fs_new)
+
+    # nothing to resample
+    if up == down == 1:
+
+        for chunk in chunks:
+            yield np.array(chunk, dtype=np.float64)
+
+        return
+
+    # get the filter
+    polyphase_filter, n_pre_remove = _get_polyphase_filter(up, down)
+
+    # buffer with the input samples that are still needed (always starts at a multiple of down)
+    buffer = None
+    buffer_start = 0
+
+    # number of input samples that were received and of output samples that were yielded
+    n_input = 0
+    n_output = 0
+
+    for chunk in chunks:
+
+        # cast to numpy.array
+        chunk = np.asarray(chunk, dtype=np.float64)
+
+        # add the chunk to the buffer
+        buffer = chunk.copy() if buffer is None else np.concatenate((buffer, chunk))
+        n_input += chunk.shape[0]
+
+        # output samples whose input samples were all received (output k needs the inputs up to (k + n_pre_remove) * down / up)
+        n_ready = (n_input * up - 1) // down - n_pre_remove + 1
+
+        if n_ready > n_output:
+
+            yield _resample_buffer(buffer, buffer_start, n_output, n_ready, polyphase_filter, n_pre_remove, up, down)
+            n_output = n_ready
+
+            # remove the input samples that are not needed for the next output sample anymore
+            first_needed = max(-(-((n_output + n_pre_remove) * down - polyphase_filter.shape[0] + 1) // up), 0)
+            new_start = min(first_needed, n_input) // down * down
+            buffer = buffer[new_start - buffer_start:]
+            buffer_start = new_start
+
+    # no chunks passed
+    if buffer is None:
+        return
+
+    # total number of output samples (same as scipy.signal.resample_poly(...))
+    n_total = -(-n_input * up // down)
+
+    if n_total > n_output:
+
+        # the signal is zero after the last sample
+        n_padding = max(-(-(n_total - 1 + n_pre_remove) * down // up) + 1 - n_input, 0)
+        buffer = np.concatenate((buffer, np.zeros((n_padding,) + buffer.shape[1:])))
+
+        yield _resample_buffer(buffer, buffer_start, n_output, n_total, polyphase_filter, n_pre_remove, up, down)
+
+
+def get_resampling_factors(fs: float, fs_new: float) -> Tuple[int, int]:
+    """
+    Gets the (coprime) up- and downsampling factors for resampling from fs to fs_new, so that fs_new = fs * up / down.
+    If the factors of the exact ratio are larger than MAX_RESAMPLING_FACTOR (e.g., for non-integer sampling
+    frequencies), the ratio is approximated by the closest fraction whose denominator is not larger than
+    MAX_RESAMPLING_FACTOR. A ValueError is raised if the relative error of the approximation exceeds
+    MAX_RESAMPLING_RATIO_ERROR, as the resampled signal would drift from the real time axis.
+
+    :param fs: the original sampling frequency (Hz)
+    :param fs_new: the target sampling frequency (Hz)
+    :return: tuple containing the upsampling and the downsampling factor
+    """
+
+    # check the sampling frequencies
+    if fs <= 0 or fs_new <= 0:
+        raise ValueError(f"The sampling frequencies have to be positive. Provided: fs={fs}, fs_new={fs_new}")
+
+    # get the ratio as a fraction (reduced to coprime factors)
+    ratio = Fraction(fs_new) / Fraction(fs)
+
+    # limit the factors for non-integer sampling frequencies
+    if max(ratio.numerator, ratio.denominator) > MAX_RESAMPLING_FACTOR:
+        approximated_ratio = ratio.limit_denominator(MAX_RESAMPLING_FACTOR)
+
+        # check the drift caused by the approximation
+        ratio_error = abs(float(approximated_ratio / ratio) - 1)
+        if ratio_error > MAX_RESAMPLING_RATIO_ERROR:
+            raise ValueError(f"The resampling ratio {fs_new} / {fs} can not be approximated with factors up to "
+                             f"{MAX_RESAMPLING_FACTOR} (closest: {approximated_ratio.numerator} / "
+                             f"{approximated_ratio.denominator}, relative error: {ratio_error:.2e}).")
+
+        ratio = approximated_ratio
+
+    return ratio.numerator, ratio.denominator
+
+
+@lru_cache(maxsize=None)
+def get_resampling_filter(up: int, down: int) -> np.ndarray:
+    """
+    Designs the linear-phase low-pass FIR filter that is used for resampling by up / down. The filter is the same as the
+    one designed by scipy.signal.resample_poly(...) (Kaiser window with beta=5.0). The designs are memoized, thus the
+    returned array is shared between calls and is read-only.
+
+    :param up: the upsampling factor
+    :param down: the downsampling factor
+    :return: numpy.array containing the filter coefficients
+    """
+
+    # get the cutoff (relative to nyquist) and the half length of the filter
+    max_rate = max(up, down)
+    half_length = HALF_LENGTH_FACTOR * max_rate
+
+    resampling_filter = firwin(2 * half_length + 1, 1. / max_rate, window=RESAMPLING_WINDOW)
+
+    # the filter is shared between calls
+    resampling_filter.flags.writeable = False
+
+    return resampling_filter
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+@lru_cache(maxsize=None)
+def _get_polyphase_filter(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """
+    Gets the FIR filter as it is applied by scipy.signal.resample_poly(...): scaled by the upsampling factor and
+    zero-padded at the beginning, so that the output samples are centered. The result is memoized, thus the returned
+    array is shared between calls and is read-only.
+
+    :param up: the upsampling factor
+    :param down: the downsampling factor
+    :return: tuple containing the filter and the number of output samples of scipy.signal.upfirdn(...) that are removed
+             at the beginning
+    """
+
+    # get the filter
+    resampling_filter = get_resampling_filter(up, down)
+    half_length = (resampling_filter.shape[0] - 1) // 2
+
+    # zero-pad the filter to put the output samples at the center
+    n_pre_pad = down - half_length % down
+    n_pre_remove = (half_length + n_pre_pad) // down
+
+    polyphase_filter = np.concatenate((np.zeros(n_pre_pad), resampling_filter * up))
+
+    # the filter is shared between calls
+    polyphase_filter.flags.writeable = False
+
+    return polyphase_filter, n_pre_remove
+
+
+def _resample_buffer(buffer: np.ndarray, buffer_start: int, first_output: int, last_output: int,
+                     polyphase_filter: np.ndarray, n_pre_remove: int, up: int, down: int) -> np.ndarray:
+    """
+    Gets the output samples first_output to last_output - 1 of the resampled signal from the buffered input samples.
+    :param buffer: the buffered input samples (containing all input samples needed by the output samples)
+    :param buffer_start: the position of the first buffered sample in the signal (multiple of down)
+    :param first_output: the position of the first output sample
+    :param last_output: the position after the last output sample
+    :param polyphase_filter: the filter returned by _get_polyphase_filter(...)
+    :param n_pre_remove: the number of output samples that are removed at the beginning
+    :param up: the upsampling factor
+    :param down: the downsampling factor
+    :return: numpy.array containing the resampled samples
+    """
+
+    # filter the buffer (the output of the buffer is aligned to the output of the whole signal)
+    resampled = upfirdn(polyphase_filter, buffer, up, down, axis=0)
+
+    # get the position of the output samples in the output of the buffer
+    offset = n_pre_remove - buffer_start * up // down
+
+    return resampled[first_output + offset:last_output + offset]
+
+
+def _generate_time_column_from_samples(signal_size: int, fs: float) -> np.ndarray:
+    """
+    Generates a time axis in seconds based on the number of samples and sampling frequency.
+
+    :param signal_size: size of the signal in samples
+    :param fs: the sampling frequency of the signal in Hz
+    :return: The generated time axis
+    """
+
+    # get time (seconds) between each sample
+    delta_t = 1/fs
+
+    # generate time column in seconds
+    time_column = np.arange(signal_size) * delta_t
+
+    return time_column
@@ -0,0 +1,277 @@
+"""
+Functions to detect steps from the (gravity-removed) ACC of the smartphone and to obtain the cadence. The steps are
+detected on the ACC along the gravity direction (vertical ACC), thus the gravitational component has to be available
+(see apply_pre_processing_pipeline(..., return_gravity=True)).
+
+Available Functions
+-------------------
+[Public]
+get_steps(...): Gets the steps, the cadence on the HAR window grid, and the walking bouts of each acquisition.
+detect_steps(...): Detects the steps of one acquisition.
+detect_steps_chunks(...): Detects the steps of an acquisition that is passed in consecutive chunks.
+get_windowed_cadence(...): Gets the number of steps and the cadence of consecutive windows.
+get_walking_bouts(...): Groups the steps into walking bouts.
+------------------
+[Private]
+_get_step_signal(...): Gets the signal in which the steps are detected (vertical ACC).
+_find_step_peaks(...): Finds the local maxima of the smoothed step signal.
+------------------
+"""
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+from scipy import ndimage
+from typing import Dict, Iterable, Iterator, Tuple
+
+# internal imports
+from constants import ACC, GRAV, PHONE, TIME_COLUMN_NAME
+from .filters import get_envelope, MOVING_AVERAGE
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+STEPS = 'steps'
+CADENCE = 'cadence'
+BOUTS = 'bouts'
+N_STEPS = 'n_steps'
+BOUT_START = 'start'
+BOUT_STOP = 'stop'
+
+# step detection settings
+STEP_SMOOTHING_WINDOW = 0.1  # window of the moving average (seconds)
+MIN_STEP_INTERVAL = 0.3  # minimum time between two steps (seconds), i.e., at most 200 steps/min
+STEP_HEIGHT_THRESHOLD = 1.0  # minimum (smoothed) acceleration of a step (m/s^2)
+
+# walking bout settings
+MAX_STEP_INTERVAL = 2.0  # maximum time between two steps of the same bout (seconds)
+MIN_BOUT_STEPS = 4  # minimum number of steps of a bout
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def get_steps(daily_data_dict: Dict[str, Dict[str, pd.DataFrame]], fs: int = 100, w_size: float = 5.0,
+              device_name: str = PHONE) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Gets the steps, the cadence, and the walking bouts of each acquisition of a device. The steps are detected on the
+    vertical component of the pre-processed ACC (see detect_steps(...)), thus the data has to contain the gravity
+    columns (apply_pre_processing_pipeline(..., return_gravity=True)). The cadence is computed on the same window grid as the human activity
+    recognition (consecutive windows of w_size seconds starting at the first sample), thus it can be matched directly
+    with the predicted activities.
+
+    :param daily_data_dict: nested dictionary {device: {acquisition_time: pd.DataFrame}} containing the pre-processed data
+    :param fs: the sampling frequency (Hz). Default: 100
+    :param w_size: the window size in seconds used for the cadence (same as for the classification). Default: 5.0
+    :param device_name: the device whose ACC is used. Default: 'phone'
+    :return: dictionary {acquisition_time: {'steps': pd.DataFrame, 'cadence': pd.DataFrame, 'bouts': pd.DataFrame}}
+             (1) steps: the sample index and the time (seconds) of each step
+             (2) cadence: the start time (seconds), the number of steps, and the cadence (steps/min) of each window
+             (3) bouts: the start and stop time (seconds), the number of steps, and the cadence of each walking bout
+    """
+
+    # dictionary for holding the results
+    steps_dict = {}
+
+    for acquisition_time, df in daily_data_dict.get(device_name, {}).items():
+
+        # get the ACC and the gravity columns
+        acc_columns = [column for column in df.columns if ACC in column]
+        gravity_columns = [column for column in df.columns if GRAV in column]
+
+        if not gravity_columns:
+            raise ValueError(f"No gravity columns found for the acquisition {acquisition_time} of the {device_name}. "
+                             f"Pre-process the data with apply_pre_processing_pipeline(..., return_gravity=True).")
+
+        acc_data = df[acc_columns].to_numpy(dtype=np.float64)
+        gravity_data = df[gravity_columns].to_numpy(dtype=np.float64)
+
+        # detect the steps
+        step_indices = detect_steps(acc_data, gravity_data, fs=fs)
+
+        steps_dict[acquisition_time] = {
+            STEPS: pd.DataFrame({STEPS: step_indices, TIME_COLUMN_NAME: step_indices / fs}),
+            CADENCE: get_windowed_cadence(step_indices, n_samples=len(df), fs=fs, w_size=w_size),
+            BOUTS: get_walking_bouts(step_indices, fs=fs)}
+
+    return steps_dict
+
+
+def detect_steps(acc_data: np.ndarray, gravity_data: np.ndarray, fs: int = 100) -> np.ndarray:
+    """
+    Detects the steps from the gravity-removed ACC. The step signal is the ACC along the gravity direction (vertical
+    ACC), which oscillates once per step. The ACC magnitude is not used, as the magnitude of the (zero-mean) oscillation
+    peaks twice per step. The step signal is smoothed with a centered moving average, and a step is detected at each sample that is the maximum within +/- MIN_STEP_INTERVAL
+    and exceeds STEP_HEIGHT_THRESHOLD. All operations are vectorized over the whole signal. Since each decision only
+    depends on the samples around it, the same steps are found when the signal is processed in chunks
+    (see detect_steps_chunks(...)).
+
+    :param acc_data: (Mx3) array containing the gravity-removed ACC (m/s^2)
+    :param gravity_data: (Mx3) array containing the gravitational component of the ACC (m/s^2)
+    :param fs: the sampling frequency (Hz). Default: 100
+    :return: numpy.array containing the sample indices of the steps
+    """
+
+    # get the signal in which the steps are detected
+    step_signal = _get_step_signal(acc_data, gravity_data)
+
+    return np.flatnonzero(_find_step_peaks(step_signal, fs))
+
+
+def detect_steps_chunks(chunks: Iterable[Tuple[np.ndarray, np.ndarray]],
+                        fs: int = 100) -> Iterator[np.ndarray]:
+    """
+    Detects the steps of an acquisition that is passed in consecutive chunks (e.g., the output of the
+    StreamingPreProcessor). Only the last samples needed by the smoothing and the local maximum search are kept between
+    chunks. Concatenating the yielded arrays gives the same steps as detect_steps(...) on the whole acquisition.
+
+    Example:
+        step_indices = np.concatenate(list(detect_steps_chunks(zip(acc_chunks, gravity_chunks), fs=100)))
+
+    :param chunks: iterable of tuples (acc_data, gravity_data) with consecutive samples (see detect_steps(...))
+    :param fs: the sampling frequency (Hz). Default: 100
+    :return: generator yielding the sample indices (in the whole acquisition) of the steps that were confirmed after
+             each chunk (the last steps are yielded once all chunks were passed)
+    """
+
+    # samples needed on each side of a sample to decide whether it is a step
+    margin = int(round(STEP_SMOOTHING_WINDOW * fs)) // 2 + int(round(MIN_STEP_INTERVAL * fs)) + 1
+
+    # buffer with the last step signal samples and position of its first sample in the acquisition
+    buffer = np.zeros(0)
+    buffer_start = 0
+
+    # position of the first sample that was not decided yet
+    n_decided = 0
+
+    for acc_data, gravity_data in chunks:
+
+        # add the chunk to the buffer
+        buffer = np.concatenate((buffer, _get_step_signal(acc_data, gravity_data)))
+        buffer_end = buffer_start + len(buffer)
+
+        # samples whose neighbourhood was fully received
+        n_ready = buffer_end - margin
+
+        if n_ready > n_decided:
+
+            # find the steps in the buffer and keep the ones that were not decided yet
+            step_indices = np.flatnonzero(_find_step_peaks(buffer, fs)) + buffer_start
+            yield step_indices[(step_indices >= n_decided) & (step_indices < n_ready)]
+            n_decided = n_ready
+
+            # keep the samples needed for the next chunk (the acquisition start is zero-padded by the smoothing)
+            new_start = max(n_decided - margin, 0)
+            buffer = buffer[new_start - buffer_start:]
+            buffer_start = new_start
+
+    # decide the remaining samples (the end of the buffer is the end of the acquisition)
+    step_indices = np.flatnonzero(_find_step_peaks(buffer, fs)) + buffer_start
+    yield step_indices[step_indices >= n_decided]
+
+
+def get_windowed_cadence(step_indices: np.ndarray, n_samples: int, fs: int = 100, w_size: float = 5.0) -> pd.DataFrame:
+    """
+    Gets the number of steps and the cadence of consecutive windows of w_size seconds starting at the first sample.
+    As for the human activity recognition, only full windows are considered (see trim_data(...)).
+
+    :param step_indices: the sample indices of the steps
+    :param n_samples: the number of samples of the acquisition
+    :param fs: the sampling frequency (Hz). Default: 100
+    :param w_size: the window size in seconds. Default: 5.0
+    :return: pd.DataFrame containing the start time of each window (seconds), the number of steps, and the cadence
+             (steps/min)
+    """
+
+    # get the number of full windows
+    window_length = int(w_size * fs)
+    n_windows = n_samples // window_length
+
+    # count the steps per window
+    steps_per_window = np.bincount(step_indices // window_length, minlength=n_windows)[:n_windows]
+
+    return pd.DataFrame({TIME_COLUMN_NAME: np.arange(n_windows) * w_size,
+                         N_STEPS: steps_per_window,
+                         CADENCE: steps_per_window * 60 / w_size})
+
+
+def get_walking_bouts(step_indices: np.ndarray, fs: int = 100) -> pd.DataFrame:
+    """
+    Groups the steps into walking bouts. Two consecutive steps belong to the same bout if they are at most
+    MAX_STEP_INTERVAL seconds apart, and only bouts with at least MIN_BOUT_STEPS steps are kept.
+
+    :param step_indices: the sample indices of the steps
+    :param fs: the sampling frequency (Hz). Default: 100
+    :return: pd.DataFrame containing the start and stop time (seconds), the number of steps, and the cadence
+             (steps/min) of each bout
+    """
+
+    # find where a new bout starts
+    bout_starts = np.flatnonzero(np.diff(step_indices, prepend=-np.inf) > MAX_STEP_INTERVAL * fs)
+    bout_stops = np.append(bout_starts[1:], len(step_indices)) - 1
+
+    # keep bouts with enough steps
+    n_steps = bout_stops - bout_starts + 1
+    is_bout = n_steps >= MIN_BOUT_STEPS
+    bout_starts, bout_stops, n_steps = bout_starts[is_bout], bout_stops[is_bout], n_steps[is_bout]
+
+    # get the times and the cadence (steps per minute between the first and the last step)
+    start_times = step_indices[bout_starts] / fs
+    stop_times = step_indices[bout_stops] / fs
+
+    return pd.DataFrame({BOUT_START: start_times, BOUT_STOP: stop_times, N_STEPS: n_steps,
+                         CADENCE: (n_steps - 1) * 60 / (stop_times - start_times)})
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_step_signal(acc_data: np.ndarray, gravity_data: np.ndarray) -> np.ndarray:
+    """
+    Gets the signal in which the steps are detected: the ACC along the gravity direction (vertical ACC).
+    :param acc_data: (Mx3) array containing the gravity-removed ACC
+    :param gravity_data: (Mx3) array containing the gravitational component of the ACC
+    :return: 1-D array containing the step signal
+    """
+
+    if gravity_data is None:
+        raise ValueError("The gravitational component of the ACC is needed to detect the steps "
+                         "(see apply_pre_processing_pipeline(..., return_gravity=True)).")
+
+    acc_data = np.asarray(acc_data, dtype=np.float64)
+
+    # project the ACC onto the gravity direction
+    gravity_data = np.asarray(gravity_data, dtype=np.float64)
+    gravity_norm = np.linalg.norm(gravity_data, axis=1)
+
+    return np.einsum('ij,ij->i', acc_data, gravity_data) / np.where(gravity_norm > 0, gravity_norm, 1)
+
+
+def _find_step_peaks(step_signal: np.ndarray, fs: int) -> np.ndarray:
+    """
+    Finds the samples of the smoothed step signal that are the maximum within +/- MIN_STEP_INTERVAL (ties are assigned
+    to the first sample) and exceed STEP_HEIGHT_THRESHOLD.
+    :param step_signal: 1-D array containing the step signal
+    :param fs: the sampling frequency (Hz)
+    :return: boolean array indicating the steps
+    """
+
+    if len(step_signal) == 0:
+        return np.zeros(0, dtype=bool)
+
+    # smooth the signal (centered moving average, zero-padded at the edges)
+    smoothed = get_envelope(step_signal, envelope_type=MOVING_AVERAGE,
+                            type_param=max(int(round(STEP_SMOOTHING_WINDOW * fs)), 1), fs=fs)
+
+    # get the maximum around each sample
+    half_length = int(round(MIN_STEP_INTERVAL * fs))
+    local_maximum = ndimage.maximum_filter1d(smoothed, size=2 * half_length + 1, mode='constant', cval=-np.inf)
+
+    # the sample has to be larger than the previous one (only the first sample of a plateau is kept)
+    is_rising = np.empty(len(smoothed), dtype=bool)
+    is_rising[0] = True
+    np.greater(smoothed[1:], smoothed[:-1], out=is_rising[1:])
+
+    return (smoothed == local_maximum) & is_rising & (smoothed >= STEP_HEIGHT_THRESHOLD)
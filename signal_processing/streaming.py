@@ -0,0 +1,272 @@
+"""
+Stateful pre-processing of ACC, GYR, MAG, and ROTATION VECTOR signals that arrive in consecutive chunks.
+
+Available Classes
+-------------------
+[Public]
+StreamingPreProcessor: Applies the pre-processing of apply_pre_processing_pipeline(...) chunk by chunk.
+------------------
+
+Available Functions
+-------------------
+[Private]
+_get_sensor_columns(...): Gets the positions of the columns belonging to each of the given sensors.
+------------------
+"""
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+from scipy import signal
+from typing import List, Union
+
+# internal imports
+from .filters import median_filter, get_butter_sos, slerp_smoothing, MEDFILT
+from .pre_process_android import IMPULSE_RESPONSE_SAMPLES, ROT_SMOOTH_FACTOR
+from constants import ACC, GYR, MAG, ROT
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+# filter settings of median_and_lowpass_filter(...) and gravitational_filter(...)
+FILTER_ORDER = 3
+LOWPASS_CUTOFF = 20
+GRAVITY_CUTOFF = 0.3
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public classes
+# ------------------------------------------------------------------------------------------------------------------- #
+class StreamingPreProcessor:
+    """
+    Pre-processes the sensor data of one acquisition chunk by chunk, applying the same steps as
+    apply_pre_processing_pipeline(...) for the smartphone and smartwatch:
+
+    (1) ACC, GYR, MAG: median filter followed by a 3rd order low-pass filter with a cut-off at 20 Hz
+    (2) ACC: removal of the gravitational component (3rd order low-pass filter with a cut-off at 0.3 Hz)
+    (3) ROT: SLERP smoothing
+    (4) removal of the first samples (impulse response of the filters)
+
+    The state of the filters is carried over between chunks: the sosfilt(...) states (zi), the last samples needed by
+    the median filter, and the last smoothed quaternion. Since the median filter is centered, the output lags the input
+    by medfilt_window_length // 2 samples, which are returned by flush(...) once the acquisition ends. Concatenating
+    the outputs of all process(...) calls and of flush(...) gives the same result as the one-shot pre-processing,
+    independently of how the data is chunked. Only the current chunk (plus a few samples) is kept in memory.
+
+    Example:
+        pre_processor = StreamingPreProcessor(df.columns, fs=100)
+        processed_chunks = [pre_processor.process(chunk) for chunk in chunks] + [pre_processor.flush()]
+        processed_df = pd.concat(processed_chunks)
+    """
+
+    def __init__(self, sensor_names: List[str], fs: int = 100, medfilt_window_length: int = 11,
+                 medfilt_backend: str = MEDFILT, n_discard: int = IMPULSE_RESPONSE_SAMPLES):
+        """
+        :param sensor_names: the names of the columns of the chunks that are going to be processed
+        :param fs: the sampling frequency (Hz)
+        :param medfilt_window_length: the length of the median filter (has to be odd). Default: 11
+        :param medfilt_backend: the backend used for the median filter. Default: 'medfilt'
+        :param n_discard: the number of samples that are removed at the beginning of the acquisition (impulse response
+                          of the filters). Default: 250
+        """
+
+        self.sensor_names = list(sensor_names)
+        self.fs = fs
+        self.medfilt_window_length = medfilt_window_length
+        self.medfilt_backend = medfilt_backend
+        self.n_discard = n_discard
+
+        # get the columns of each sensor (same matching as in apply_pre_processing_pipeline(...))
+        acc_cols = _get_sensor_columns(self.sensor_names, [ACC])
+        self._filtered_cols = acc_cols + _get_sensor_columns(self.sensor_names, [GYR, MAG])
+        self._rot_cols = _get_sensor_columns(self.sensor_names, [ROT])
+
+        # positions of the ACC columns inside the filtered columns
+        self._acc_positions = list(range(len(acc_cols)))
+
+        # get the (cached) filters
+        self._lowpass_sos = get_butter_sos(order=FILTER_ORDER, cutoff=LOWPASS_CUTOFF, fs=fs, btype='low')
+        self._gravity_sos = get_butter_sos(order=FILTER_ORDER, cutoff=GRAVITY_CUTOFF, fs=fs, btype='low')
+
+        # initialize the state
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Resets the state of the pre-processor, so that a new acquisition can be processed.
+        :return: None
+        """
+
+        # samples before and after the center of the median filter window
+        self._half_length = self.medfilt_window_length // 2
+
+        # last raw samples that were output (zeros at the start - same as the zero padding of the median filter)
+        self._history = np.zeros((self._half_length, len(self._filtered_cols)))
+
+        # raw samples that were received but not output yet
+        self._pending = np.zeros((0, len(self.sensor_names)))
+
+        # sosfilt(...) states (all zero at the start - same as filtering the whole signal at once)
+        self._lowpass_zi = np.zeros((self._lowpass_sos.shape[0], 2, len(self._filtered_cols)))
+        self._gravity_zi = np.zeros((self._gravity_sos.shape[0], 2, len(self._acc_positions)))
+
+        # last smoothed quaternion
+        self._last_quaternion = None
+
+        # number of samples that still have to be discarded and number of samples that were output
+        self._n_to_discard = self.n_discard
+        self._n_output = 0
+
+    def process(self, chunk: Union[pd.DataFrame, np.ndarray]) -> pd.DataFrame:
+        """
+        Pre-processes the next chunk of the acquisition.
+        :param chunk: (MxN) pandas.DataFrame or numpy.array with the next M samples of the N columns in sensor_names
+        :return: pandas.DataFrame containing the pre-processed samples that are ready. Due to the centered median filter,
+                 the last medfilt_window_length // 2 samples are only output with the next chunk (or by flush(...)).
+        """
+
+        # cast to numpy.array
+        chunk = np.asarray(chunk, dtype=np.float64)
+
+        # check the number of columns
+        if chunk.ndim != 2 or chunk.shape[1] != len(self.sensor_names):
+            raise ValueError(f"The chunk has to be a 2D array with {len(self.sensor_names)} columns "
+                             f"({self.sensor_names}). Provided chunk shape: {chunk.shape}")
+
+        # add the chunk to the pending samples
+        self._pending = np.concatenate((self._pending, chunk))
+
+        # the last samples still need the next chunk for the median filter
+        n_ready = len(self._pending) - self._half_length
+
+        return self._process_pending(max(n_ready, 0), end_of_acquisition=False)
+
+    def flush(self) -> pd.DataFrame:
+        """
+        Outputs the remaining samples at the end of the acquisition. The median filter is zero-padded at the end, as
+        done by scipy.signal.medfilt(...). After flushing, the pre-processor is reset.
+        :return: pandas.DataFrame containing the remaining pre-processed samples
+        """
+
+        # process all pending samples
+        processed_df = self._process_pending(len(self._pending), end_of_acquisition=True)
+
+        # reset the state for the next acquisition
+        self.reset()
+
+        return processed_df
+
+    def _process_pending(self, n_ready: int, end_of_acquisition: bool) -> pd.DataFrame:
+        """
+        Pre-processes the first n_ready pending samples and updates the state.
+        :param n_ready: the number of pending samples that can be processed
+        :param end_of_acquisition: boolean indicating whether the acquisition ended (zero padding of the median filter)
+        :return: pandas.DataFrame containing the pre-processed samples (without the discarded samples)
+        """
+
+        if n_ready == 0:
+            return self._to_dataframe(np.zeros((0, len(self.sensor_names))))
+
+        # get the raw samples that are going to be output (the remaining columns are kept as they are)
+        processed_data = self._pending[:n_ready].copy()
+
+        if self._filtered_cols:
+
+            processed_data[:, self._filtered_cols] = self._filter_imu(n_ready, end_of_acquisition)
+
+        if self._rot_cols:
+
+            processed_data[:, self._rot_cols] = self._smooth_rotation_vector(n_ready)
+
+        # remove the processed samples from the pending samples
+        self._pending = self._pending[n_ready:]
+
+        # remove impulse response
+        n_discarded = min(self._n_to_discard, n_ready)
+        self._n_to_discard -= n_discarded
+
+        return self._to_dataframe(processed_data[n_discarded:])
+
+    def _filter_imu(self, n_ready: int, end_of_acquisition: bool) -> np.ndarray:
+        """
+        Applies the median filter, the 20 Hz low-pass filter and (for ACC) the gravitational filter to the first
+        n_ready pending samples of the ACC, GYR and MAG columns.
+        :param n_ready: the number of pending samples that can be processed
+        :param end_of_acquisition: boolean indicating whether the acquisition ended (zero padding of the median filter)
+        :return: numpy.array containing the filtered samples
+        """
+
+        # get the pending samples of the filtered columns
+        raw_data = self._pending[:, self._filtered_cols]
+
+        # the median filter window of the first (last) sample needs the previous (next) half window
+        right_padding = np.zeros((self._half_length if end_of_acquisition else 0, raw_data.shape[1]))
+        median_input = np.concatenate((self._history, raw_data, right_padding))
+
+        # apply the median filter and keep the samples for which the full window is available
+        med_filt = median_filter(median_input, self.medfilt_window_length, backend=self.medfilt_backend)
+        med_filt = med_filt[self._half_length:self._half_length + n_ready]
+
+        # keep the last raw samples for the median filter of the next chunk
+        self._history = np.concatenate((self._history, raw_data[:n_ready]))[len(self._history) + n_ready -
+                                                                             self._half_length:]
+
+        # apply the low-pass filter
+        filtered_data, self._lowpass_zi = signal.sosfilt(self._lowpass_sos, med_filt, axis=0, zi=self._lowpass_zi)
+
+        if self._acc_positions:
+
+            # get and subtract the gravitational component
+            gravity_data, self._gravity_zi = signal.sosfilt(self._gravity_sos, filtered_data[:, self._acc_positions],
+                                                            axis=0, zi=self._gravity_zi)
+            filtered_data[:, self._acc_positions] -= gravity_data
+
+        return filtered_data
+
+    def _smooth_rotation_vector(self, n_ready: int) -> np.ndarray:
+        """
+        Applies SLERP smoothing to the first n_ready pending samples of the rotation vector, starting from the last
+        smoothed quaternion of the previous chunk. SLERP may flip the sign of the previous smoothed quaternion (to take
+        the shorter path), thus one extra sample (when available) is smoothed and discarded, so that the output samples
+        are identical to the one-shot smoothing.
+        :param n_ready: the number of pending samples that can be processed
+        :return: numpy.array containing the smoothed quaternions in scalar last notation (x, y, z, w)
+        """
+
+        # smooth the quaternions (plus one look-ahead sample), starting from the last smoothed quaternion
+        smoothed = slerp_smoothing(self._pending[:n_ready + 1, self._rot_cols], ROT_SMOOTH_FACTOR, scalar_first=False,
+                                   return_scalar_first=False, initial_quaternion=self._last_quaternion)[:n_ready]
+
+        # keep the last smoothed quaternion for the next chunk
+        self._last_quaternion = smoothed[-1]
+
+        return smoothed
+
+    def _to_dataframe(self, processed_data: np.ndarray) -> pd.DataFrame:
+        """
+        Transforms the processed samples into a DataFrame. The index continues the index of the previous chunks.
+        :param processed_data: numpy.array containing the processed samples
+        :return: pandas.DataFrame containing the processed samples
+        """
+
+        # create the continuous index
+        index = pd.RangeIndex(self._n_output, self._n_output + len(processed_data))
+        self._n_output += len(processed_data)
+
+        return pd.DataFrame(processed_data, columns=self.sensor_names, index=index)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_sensor_columns(sensor_names: List[str], sensors: List[str]) -> List[int]:
+    """
+    Gets the positions of the columns belonging to each of the given sensors.
+    :param sensor_names: the names of the columns
+    :param sensors: the sensors (e.g., [GYR, MAG])
+    :return: list containing the column positions, ordered by sensor
+    """
+
+    return [col for sensor in sensors for col, sensor_name in enumerate(sensor_names) if sensor in sensor_name]
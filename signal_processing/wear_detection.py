@@ -0,0 +1,231 @@
+"""
+Functions to detect non-wear periods (e.g., watch on the desk, phone in a drawer) and invalid signal segments of the
+smartphone, smartwatch, and muscleBAN, so that these can be skipped by the human activity recognition.
+
+Available Functions
+-------------------
+[Public]
+get_wear_masks(...): Gets the validity mask of each acquisition of all devices.
+get_wear_mask(...): Gets the validity mask of one acquisition from its ACC and GYR channels.
+get_window_mask(...): Converts a sample validity mask into a mask of consecutive windows.
+rolling_variance(...): Computes the variance of all sliding windows in O(n) using cumulative sums.
+rolling_range(...): Computes the range (max - min) of all sliding windows in O(n).
+------------------
+[Private]
+_expand_window_mask(...): Marks all samples that are covered by at least one flagged sliding window.
+------------------
+"""
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+from scipy import ndimage
+from typing import Dict
+
+# internal imports
+from constants import ACC, GYR, GRAV
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+# non-wear detection (adapted from van Hees et al., 2013): window length (seconds), ACC standard deviation and range
+# (m/s^2, i.e., 13 mg and 50 mg), minimum number of still ACC axes, and GYR standard deviation (rad/s)
+NON_WEAR_WINDOW = 30 * 60
+ACC_STD_THRESHOLD = 0.13
+ACC_RANGE_THRESHOLD = 0.5
+MIN_STILL_ACC_AXES = 2
+GYR_STD_THRESHOLD = 0.05
+
+# signal quality: window length (seconds) in which all channels being constant indicates a sensor dropout, and the range
+# below which a channel is considered constant (held samples are not exactly constant after the filtering)
+FLATLINE_WINDOW = 5.0
+FLATLINE_TOLERANCE = 1e-6
+
+# minimum fraction of valid samples of a (HAR) window
+MIN_VALID_FRACTION = 0.5
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# public functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def get_wear_masks(daily_data_dict: Dict[str, Dict[str, pd.DataFrame]],
+                   fs: int = 100) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Gets the validity mask of each acquisition of all devices (see get_wear_mask(...)). Devices without ACC data (e.g.,
+    the heart rate only) are considered valid.
+
+    :param daily_data_dict: nested dictionary {device: {acquisition_time: pd.DataFrame}} containing the (pre-processed)
+                            data of all devices at the same sampling rate
+    :param fs: the sampling frequency (Hz). Default: 100
+    :return: nested dictionary {device: {acquisition_time: numpy.array}} containing a boolean per sample (True: valid)
+    """
+
+    return {device_name: {acquisition_time: get_wear_mask(df, fs=fs) for acquisition_time, df in acquisitions.items()}
+            for device_name, acquisitions in daily_data_dict.items()}
+
+
+def get_wear_mask(sensor_df: pd.DataFrame, fs: int = 100, non_wear_window: float = NON_WEAR_WINDOW) -> np.ndarray:
+    """
+    Gets the validity mask of one acquisition. A sample is invalid if it is
+
+    (1) part of a non-wear period: a sliding window of non_wear_window seconds in which at least MIN_STILL_ACC_AXES ACC
+        axes have a standard deviation below ACC_STD_THRESHOLD and a range below ACC_RANGE_THRESHOLD and (if available)
+        all GYR axes have a standard deviation below GYR_STD_THRESHOLD
+    (2) part of a flatline: a sliding window of FLATLINE_WINDOW seconds in which all ACC and GYR channels are constant,
+        i.e., their range is below FLATLINE_TOLERANCE (e.g., padded or held samples of a sensor that stopped sending
+        data, which are only approximately constant after the pre-processing filters)
+    (3) missing (NaN)
+
+    All samples covered by a flagged window are invalid, so that the whole non-wear period is masked. The rolling
+    statistics are computed in O(n) (see rolling_variance(...) and rolling_range(...)) for all channels at once.
+
+    :param sensor_df: pd.DataFrame containing the ACC (and GYR) channels of one acquisition. The gravity columns are
+                      ignored.
+    :param fs: the sampling frequency (Hz). Default: 100
+    :param non_wear_window: the length of the non-wear windows in seconds. Default: 1800 (30 min)
+    :return: numpy.array containing a boolean per sample (True: valid)
+    """
+
+    # get the ACC and GYR columns
+    acc_columns = [column for column in sensor_df.columns if ACC in column and GRAV not in column]
+    gyr_columns = [column for column in sensor_df.columns if GYR in column]
+
+    # mask for holding the valid samples
+    n_samples = len(sensor_df)
+    valid_mask = np.ones(n_samples, dtype=bool)
+
+    # no ACC data to check
+    if not acc_columns:
+        return valid_mask
+
+    # get the data of all channels at once
+    sensor_data = sensor_df[acc_columns + gyr_columns].to_numpy(dtype=np.float64)
+    n_acc = len(acc_columns)
+
+    # missing samples
+    is_missing = np.isnan(sensor_data)
+    valid_mask &= ~is_missing.any(axis=1)
+    sensor_data[is_missing] = 0
+
+    # (1) non-wear periods
+    window_length = int(round(non_wear_window * fs))
+
+    if n_samples >= window_length:
+
+        # rolling statistics of all channels
+        window_std = np.sqrt(rolling_variance(sensor_data, window_length))
+        window_range = rolling_range(sensor_data[:, :n_acc], window_length)
+
+        # still ACC axes and GYR channels
+        is_still_acc = (window_std[:, :n_acc] < ACC_STD_THRESHOLD) & (window_range < ACC_RANGE_THRESHOLD)
+        is_non_wear = is_still_acc.sum(axis=1) >= min(MIN_STILL_ACC_AXES, n_acc)
+        is_non_wear &= (window_std[:, n_acc:] < GYR_STD_THRESHOLD).all(axis=1)
+
+        valid_mask &= ~_expand_window_mask(is_non_wear, window_length, n_samples)
+
+    # (2) flatlines
+    window_length = int(round(FLATLINE_WINDOW * fs))
+
+    if n_samples >= window_length:
+
+        is_flatline = (rolling_range(sensor_data, window_length) < FLATLINE_TOLERANCE).all(axis=1)
+        valid_mask &= ~_expand_window_mask(is_flatline, window_length, n_samples)
+
+    return valid_mask
+
+
+def get_window_mask(valid_mask: np.ndarray, w_size: float = 5.0, fs: int = 100) -> np.ndarray:
+    """
+    Converts a sample validity mask into a mask of consecutive windows of w_size seconds starting at the first sample.
+    As for the human activity recognition, only full windows are considered (see trim_data(...)). A window is valid if
+    at least MIN_VALID_FRACTION of its samples are valid.
+
+    :param valid_mask: numpy.array containing a boolean per sample (True: valid)
+    :param w_size: the window size in seconds. Default: 5.0
+    :param fs: the sampling frequency (Hz). Default: 100
+    :return: numpy.array containing a boolean per window (True: valid)
+    """
+
+    # get the number of full windows
+    window_length = int(w_size * fs)
+    n_windows = len(valid_mask) // window_length
+
+    # fraction of valid samples of each window
+    valid_fraction = valid_mask[:n_windows * window_length].reshape(n_windows, window_length).mean(axis=1)
+
+    return valid_fraction >= MIN_VALID_FRACTION
+
+
+def rolling_variance(signal_array: np.ndarray, window_length: int) -> np.ndarray:
+    """
+    Computes the (population) variance of all sliding windows along axis 0 using cumulative sums of the signal and of
+    the squared signal, thus the cost does not depend on the window length. Each channel is centered by its mean before,
+    so that the difference of the sums does not lose precision.
+
+    :param signal_array: a 1-D or (MxN) array, where M is the signal length in samples and N is the number of channels
+    :param window_length: the window length in samples
+    :return: numpy.array of shape (M - window_length + 1, ...) containing the variance of the window starting at each
+             sample
+    """
+
+    # center the channels
+    signal_array = np.asarray(signal_array, dtype=np.float64)
+    signal_array = signal_array - signal_array.mean(axis=0)
+
+    # cumulative sums with a leading zero
+    padding = np.zeros((1,) + signal_array.shape[1:])
+    cumulative_sum = np.concatenate((padding, np.cumsum(signal_array, axis=0)))
+    cumulative_square = np.concatenate((padding, np.cumsum(np.square(signal_array), axis=0)))
+
+    # window means of the signal and of the squared signal
+    window_mean = (cumulative_sum[window_length:] - cumulative_sum[:-window_length]) / window_length
+    window_square = (cumulative_square[window_length:] - cumulative_square[:-window_length]) / window_length
+
+    # variance (clipped at zero due to rounding errors)
+    return np.maximum(window_square - np.square(window_mean), 0)
+
+
+def rolling_range(signal_array: np.ndarray, window_length: int) -> np.ndarray:
+    """
+    Computes the range (max - min) of all sliding windows along axis 0. scipy.ndimage.maximum_filter1d(...) and
+    minimum_filter1d(...) keep a monotonic deque of the window candidates, thus the cost does not depend on the window
+    length.
+
+    :param signal_array: a 1-D or (MxN) array, where M is the signal length in samples and N is the number of channels
+    :param window_length: the window length in samples
+    :return: numpy.array of shape (M - window_length + 1, ...) containing the range of the window starting at each sample
+    """
+
+    # the (centered) filter output at sample i + window_length // 2 covers the window starting at sample i
+    signal_array = np.asarray(signal_array, dtype=np.float64)
+    valid = slice(window_length // 2, window_length // 2 + signal_array.shape[0] - window_length + 1)
+
+    window_max = ndimage.maximum_filter1d(signal_array, window_length, axis=0)[valid]
+    window_min = ndimage.minimum_filter1d(signal_array, window_length, axis=0)[valid]
+
+    return window_max - window_min
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# private functions
+# ------------------------------------------------------------------------------------------------------------------- #
+def _expand_window_mask(window_mask: np.ndarray, window_length: int, n_samples: int) -> np.ndarray:
+    """
+    Marks all samples that are covered by at least one flagged sliding window.
+    :param window_mask: boolean per sliding window (window i covers the samples i to i + window_length - 1)
+    :param window_length: the window length in samples
+    :param n_samples: the number of samples of the signal
+    :return: numpy.array containing a boolean per sample
+    """
+
+    # number of flagged windows that start before each sample
+    cumulative_count = np.concatenate(([0], np.cumsum(window_mask)))
+
+    # sample j is covered by the windows max(j - window_length + 1, 0) to min(j, number of windows - 1)
+    samples = np.arange(n_samples)
+    last_window = np.minimum(samples, len(window_mask) - 1) + 1
+    first_window = np.maximum(samples - window_length + 1, 0)
+
+    return cumulative_count[last_window] - cumulative_count[first_window] > 0
@@ -0,0 +1,96 @@
+"""
+Tests for the batched inference of the HAR classifier (HAR.classifier.predict_activities): the results have to be the
+same as the ones of the model, and the number of jobs must not be set on the (shared) model.
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.ensemble import RandomForestClassifier
+
+# internal imports
+from HAR.classifier import predict_activities
+from HAR.flat_forest import compile_random_forest
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+N_FEATURES = 6
+ACQUISITION_LENGTHS = [50, 1, 300]
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# helpers
+# ------------------------------------------------------------------------------------------------------------------- #
+class _SharedModelSpy(RandomForestClassifier):
+    """
+    Random Forest that records the number of jobs of the model on which predict_proba(...) is called and the number of
+    jobs of the shared model at that time.
+    """
+
+    def predict_proba(self, X):
+
+        self.spy_n_jobs.append((self.n_jobs, self.shared_model.n_jobs))
+
+        return super().predict_proba(X)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# fixtures
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.fixture(scope='module')
+def model():
+
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(1000, N_FEATURES))
+    labels = np.digitize(features[:, 0] + features[:, 1] * features[:, 2], [-1, 1])
+
+    return RandomForestClassifier(n_estimators=20, random_state=0).fit(features, labels)
+
+
+@pytest.fixture(scope='module')
+def features_list():
+
+    rng = np.random.default_rng(1)
+
+    return [pd.DataFrame(rng.normal(size=(length, N_FEATURES))) for length in ACQUISITION_LENGTHS]
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# tests
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize('n_jobs', [None, 1, 2])
+@pytest.mark.parametrize('flat', [False, True])
+def test_predictions_per_acquisition(model, features_list, n_jobs, flat):
+
+    har_model = compile_random_forest(model) if flat else model
+    predictions = predict_activities(features_list, har_model, n_jobs=n_jobs)
+
+    assert len(predictions) == len(features_list)
+
+    for (y_pred, y_pred_proba), features_df in zip(predictions, features_list):
+
+        np.testing.assert_array_equal(y_pred_proba, model.predict_proba(features_df.to_numpy()))
+        np.testing.assert_array_equal(y_pred, model.predict(features_df.to_numpy()))
+
+    assert har_model.n_jobs is None
+
+
+def test_shared_model_is_not_modified(features_list):
+
+    # concurrent callers with different numbers of jobs
+    rng = np.random.default_rng(2)
+    shared_model = _SharedModelSpy(n_estimators=5, random_state=0).fit(rng.normal(size=(100, N_FEATURES)),
+                                                                       rng.integers(0, 3, size=100))
+    shared_model.spy_n_jobs = []
+    shared_model.shared_model = shared_model
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda n_jobs: predict_activities(features_list, shared_model, n_jobs=n_jobs), [1, 2] * 8))
+
+    # each call used its own number of jobs, while the shared model kept its own
+    assert sorted(shared_model.spy_n_jobs) == [(1, None)] * 8 + [(2, None)] * 8
+    assert shared_model.n_jobs is None
@@ -0,0 +1,160 @@
+"""
+Tests for signal_processing.filters:
+
+(1) median filter backends: all backends have to give the same result as scipy.signal.medfilt(...) with a
+    (window_length, 1) kernel, i.e., a 1-D median filter along the time axis with zero padding at both ends
+(2) SLERP smoothing: the array-based smoothing has to give the same result as chaining pyquaternion.Quaternion.slerp(...)
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pytest
+from pyquaternion import Quaternion
+from scipy import signal
+from scipy.spatial.transform import Rotation
+
+# internal imports
+from signal_processing import filters
+from signal_processing.filters import median_filter, slerp_smoothing, MEDFILT_BACKENDS
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+WINDOW_LENGTH = 11
+
+# scipy.signal.medfilt(...) warns when the signal is shorter than the window (the expected zero padding is applied)
+pytestmark = pytest.mark.filterwarnings('ignore:kernel_size exceeds volume extent')
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# median filter
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize('backend', MEDFILT_BACKENDS)
+@pytest.mark.parametrize('n_samples', [1, WINDOW_LENGTH // 2, WINDOW_LENGTH - 1, WINDOW_LENGTH, WINDOW_LENGTH + 1, 1000])
+def test_median_filter_1d(backend, n_samples):
+
+    x = np.random.default_rng(n_samples).normal(size=n_samples)
+
+    np.testing.assert_array_equal(median_filter(x, WINDOW_LENGTH, backend=backend), signal.medfilt(x, WINDOW_LENGTH))
+
+
+@pytest.mark.parametrize('backend', MEDFILT_BACKENDS)
+@pytest.mark.parametrize('n_samples', [1, WINDOW_LENGTH - 1, WINDOW_LENGTH, WINDOW_LENGTH + 1, 1000])
+@pytest.mark.parametrize('n_channels', [1, 3, 9])
+def test_median_filter_channels(backend, n_samples, n_channels):
+
+    x = np.random.default_rng(n_samples * n_channels).normal(size=(n_samples, n_channels))
+
+    np.testing.assert_array_equal(median_filter(x, WINDOW_LENGTH, backend=backend),
+                                  signal.medfilt(x, [WINDOW_LENGTH, 1]))
+
+
+@pytest.mark.parametrize('backend', MEDFILT_BACKENDS)
+def test_median_filter_ties_and_out(backend):
+
+    # repeated values (ties in the windows) and integer input written to a preallocated output
+    x = np.random.default_rng(0).integers(-3, 4, size=(500, 4))
+    out = np.empty(x.shape)
+
+    result = median_filter(x, WINDOW_LENGTH, backend=backend, out=out)
+
+    assert result is out
+    np.testing.assert_array_equal(out, signal.medfilt(x.astype(np.float64), [WINDOW_LENGTH, 1]))
+
+
+def test_sliding_window_median_blocks(monkeypatch):
+
+    # several blocks, with a partial last block
+    monkeypatch.setattr(filters, 'SLIDING_WINDOW_BLOCK_SIZE', 64)
+    x = np.random.default_rng(1).normal(size=(1000, 3))
+
+    np.testing.assert_array_equal(median_filter(x, WINDOW_LENGTH, backend=filters.SLIDING_WINDOW),
+                                  signal.medfilt(x, [WINDOW_LENGTH, 1]))
+
+
+def test_median_filter_invalid_arguments():
+
+    x = np.zeros((100, 3))
+
+    with pytest.raises(ValueError):
+        median_filter(x, WINDOW_LENGTH, backend='unknown')
+
+    with pytest.raises(ValueError):
+        median_filter(x, WINDOW_LENGTH + 1)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# SLERP smoothing
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_random_quaternions(n_samples, seed=0):
+
+    # random walk of rotations (scalar last) with random sign flips
+    rng = np.random.default_rng(seed)
+    quaternions = Rotation.from_rotvec(np.cumsum(rng.normal(scale=0.05, size=(n_samples, 3)), axis=0)).as_quat()
+    quaternions[rng.random(n_samples) < 0.3] *= -1
+
+    # not normalized quaternions
+    return quaternions * rng.uniform(0.9, 1.1, size=(n_samples, 1))
+
+
+def _pyquaternion_slerp_smoothing(quaternions, smooth_factor):
+
+    # reference: chained pyquaternion.Quaternion.slerp(...) in scalar first notation
+    quaternions = quaternions[:, [3, 0, 1, 2]]
+    smoothed = [Quaternion(quaternions[0])]
+    for quaternion in quaternions[1:]:
+        smoothed.append(Quaternion.slerp(smoothed[-1], Quaternion(quaternion), smooth_factor))
+
+    return np.array([quaternion.elements for quaternion in smoothed])[:, [1, 2, 3, 0]]
+
+
+@pytest.mark.parametrize('smooth_factor', [0.0, 0.1, 0.5, 0.9, 1.0])
+def test_slerp_smoothing_matches_pyquaternion(smooth_factor):
+
+    quaternions = _get_random_quaternions(2000)
+
+    np.testing.assert_allclose(slerp_smoothing(quaternions, smooth_factor),
+                               _pyquaternion_slerp_smoothing(quaternions, smooth_factor), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('scalar_first', [False, True])
+@pytest.mark.parametrize('return_scalar_first', [False, True])
+def test_slerp_smoothing_notation(scalar_first, return_scalar_first):
+
+    quaternions = _get_random_quaternions(500, seed=1)
+    expected = slerp_smoothing(quaternions, 0.5)
+
+    input_quaternions = quaternions[:, [3, 0, 1, 2]] if scalar_first else quaternions
+    expected = expected[:, [3, 0, 1, 2]] if return_scalar_first else expected
+
+    np.testing.assert_array_equal(slerp_smoothing(input_quaternions, 0.5, scalar_first=scalar_first,
+                                                  return_scalar_first=return_scalar_first), expected)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 250])
+def test_slerp_smoothing_chunks(chunk_size):
+
+    # chaining the chunks through initial_quaternion gives the same result as smoothing the whole series (one
+    # look-ahead sample is smoothed and discarded, as SLERP may flip the sign of the previous smoothed quaternion)
+    quaternions = _get_random_quaternions(1000, seed=2)
+    expected = slerp_smoothing(quaternions, 0.5)
+
+    smoothed_chunks = []
+    last_quaternion = None
+    for start in range(0, len(quaternions), chunk_size):
+        smoothed = slerp_smoothing(quaternions[start:start + chunk_size + 1], 0.5,
+                                   initial_quaternion=last_quaternion)[:chunk_size]
+        last_quaternion = smoothed[-1]
+        smoothed_chunks.append(smoothed)
+
+    np.testing.assert_array_equal(np.concatenate(smoothed_chunks), expected)
+
+
+def test_slerp_smoothing_invalid_arguments():
+
+    with pytest.raises(ValueError):
+        slerp_smoothing(_get_random_quaternions(10), 1.5)
+
+    with pytest.raises(ValueError):
+        slerp_smoothing(np.zeros((10, 3)), 0.5)
@@ -0,0 +1,119 @@
+"""
+Tests for the flattened Random Forest evaluator (HAR.flat_forest): the probabilities of FlatRandomForest have to be
+identical (bit by bit) to RandomForestClassifier.predict_proba(...) for any batch size, for inputs equal to the split
+thresholds, and for missing values (NaN).
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# internal imports
+from HAR.flat_forest import compile_random_forest, SAMPLES_PER_BATCH
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+N_TRAIN_WINDOWS = 2000
+N_FEATURES = 8
+N_TREES = 25
+BATCH_SIZES = [1, 7, 1000, 2 * SAMPLES_PER_BATCH + 3]
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# helpers
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_training_data(rng, missing_fraction=0.0):
+
+    features = rng.normal(size=(N_TRAIN_WINDOWS, N_FEATURES))
+    labels = np.digitize(features[:, 0] + features[:, 1] * features[:, 2] + rng.normal(size=N_TRAIN_WINDOWS), [-1, 1])
+
+    # missing values (the trees learn to which side they are sent)
+    features[rng.random(features.shape) < missing_fraction] = np.nan
+
+    return features, labels
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# fixtures
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.fixture(scope='module')
+def model():
+
+    features, labels = _get_training_data(np.random.default_rng(0))
+
+    return RandomForestClassifier(n_estimators=N_TREES, random_state=0).fit(features, labels)
+
+
+@pytest.fixture(scope='module')
+def model_with_missing_values():
+
+    features, labels = _get_training_data(np.random.default_rng(1), missing_fraction=0.1)
+
+    return RandomForestClassifier(n_estimators=N_TREES, random_state=0).fit(features, labels)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# tests
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize('batch_size', BATCH_SIZES)
+def test_predict_proba_identical(model, batch_size):
+
+    flat_model = compile_random_forest(model)
+    batch = np.random.default_rng(batch_size).normal(size=(batch_size, N_FEATURES))
+
+    np.testing.assert_array_equal(flat_model.predict_proba(batch), model.predict_proba(batch))
+    np.testing.assert_array_equal(flat_model.predict(batch), model.predict(batch))
+
+
+def test_threshold_valued_inputs(model):
+
+    # inputs equal to the split thresholds (and to the next float32 values around them)
+    flat_model = compile_random_forest(model)
+    thresholds = np.concatenate([estimator.tree_.threshold[estimator.tree_.feature >= 0]
+                                 for estimator in model.estimators_])
+
+    values = np.concatenate((thresholds, thresholds.astype(np.float32),
+                             np.nextafter(thresholds.astype(np.float32), np.float32(np.inf)),
+                             np.nextafter(thresholds.astype(np.float32), np.float32(-np.inf))))
+    batch = np.tile(values[:, np.newaxis], (1, N_FEATURES))
+
+    np.testing.assert_array_equal(flat_model.predict_proba(batch), model.predict_proba(batch))
+
+
+def test_missing_values(model_with_missing_values):
+
+    flat_model = compile_random_forest(model_with_missing_values)
+
+    rng = np.random.default_rng(2)
+    batch = rng.normal(size=(1000, N_FEATURES))
+    batch[rng.random(batch.shape) < 0.2] = np.nan
+
+    np.testing.assert_array_equal(flat_model.predict_proba(batch), model_with_missing_values.predict_proba(batch))
+
+
+def test_dataframe_columns_by_name():
+
+    # the columns of a dataframe are selected by name (feature_names_in_)
+    rng = np.random.default_rng(3)
+    features, labels = _get_training_data(rng)
+    columns = [f"feature_{i}" for i in range(N_FEATURES)]
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(pd.DataFrame(features, columns=columns), labels)
+    flat_model = compile_random_forest(model)
+
+    batch = pd.DataFrame(rng.normal(size=(100, N_FEATURES)), columns=columns)
+
+    np.testing.assert_array_equal(flat_model.predict_proba(batch[columns[::-1]]), model.predict_proba(batch))
+
+
+def test_invalid_inputs(model):
+
+    flat_model = compile_random_forest(model)
+
+    assert flat_model.predict_proba(np.zeros((0, N_FEATURES))).shape == (0, model.n_classes_)
+
+    with pytest.raises(ValueError):
+        flat_model.predict_proba(np.zeros((10, N_FEATURES + 1)))
@@ -0,0 +1,92 @@
+"""
+Tests for the conversion of the muscleBAN ADC values in the pre-processing (signal_processing.pre_process_android and
+signal_processing.emg_spectral): whether the ADC values are converted is set explicitly (convert_muscleban), it is
+never decided from the data types. Raw ADC values stored as floats have to be converted, and integer ADC values that
+are not converted raise an error.
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+import pytest
+
+# internal imports
+from constants import VALID_MBAN_DATA, NSEQ, MBAN_LEFT, FS_MBAN
+from signal_processing.pre_process_android import apply_pre_processing_pipeline
+from signal_processing.pre_process_muscleban import apply_transfer_functions
+from signal_processing.emg_spectral import get_emg_spectral_indices
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+N_SAMPLES = 2 * FS_MBAN
+ACQUISITION_TIME = '10-00-00'
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# fixtures
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.fixture(scope='module')
+def raw_df():
+
+    # raw muscleBAN data as returned by load_daily_acquisitions(..., convert_muscleban=False)
+    rng = np.random.default_rng(0)
+    raw_df = pd.DataFrame(rng.integers(0, 2 ** 16, size=(N_SAMPLES, len(VALID_MBAN_DATA))).astype(np.uint16),
+                          columns=VALID_MBAN_DATA)
+    raw_df[NSEQ] = np.arange(N_SAMPLES, dtype=np.int64) % 16
+
+    return raw_df
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# helpers
+# ------------------------------------------------------------------------------------------------------------------- #
+def _pre_process(df, **kwargs):
+
+    return apply_pre_processing_pipeline({MBAN_LEFT: {ACQUISITION_TIME: df}}, downsample_muscleban=False,
+                                         **kwargs)[MBAN_LEFT][ACQUISITION_TIME]
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# tests
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize('workers', [1, 2])
+def test_float_adc_values_are_converted(raw_df, workers):
+
+    # raw ADC values stored as floats are converted as well
+    expected = apply_transfer_functions(raw_df)
+
+    for df in (raw_df, raw_df.astype(np.float64)):
+        pd.testing.assert_frame_equal(_pre_process(df, convert_muscleban=True, workers=workers), expected,
+                                      check_dtype=False)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_converted_data_is_kept(raw_df, workers):
+
+    converted_df = apply_transfer_functions(raw_df)
+
+    pd.testing.assert_frame_equal(_pre_process(converted_df, workers=workers), converted_df, check_dtype=False)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_unconverted_integer_data_raises(raw_df, workers):
+
+    with pytest.raises(ValueError, match='convert_muscleban'):
+        _pre_process(raw_df, workers=workers)
+
+
+def test_spectral_indices_conversion(raw_df):
+
+    daily_data_dict = {MBAN_LEFT: {ACQUISITION_TIME: raw_df}}
+    converted_dict = {MBAN_LEFT: {ACQUISITION_TIME: apply_transfer_functions(raw_df)}}
+    float_dict = {MBAN_LEFT: {ACQUISITION_TIME: raw_df.astype(np.float64)}}
+
+    expected = get_emg_spectral_indices(converted_dict)[MBAN_LEFT][ACQUISITION_TIME]
+    indices = get_emg_spectral_indices(float_dict, convert_muscleban=True)[MBAN_LEFT][ACQUISITION_TIME]
+
+    pd.testing.assert_frame_equal(indices, expected)
+
+    with pytest.raises(ValueError, match='convert_muscleban'):
+        get_emg_spectral_indices(daily_data_dict)
@@ -0,0 +1,103 @@
+"""
+Tests for the native feature extraction engine of HAR.native_features: the features computed by
+extract_features(..., engine='native') have to match the ones computed by TSFEL (column names, column order, and
+values), also when only a subset of the features is requested (feature_names).
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+import pytest
+
+# internal imports
+from constants import ACC, GYR, MAG
+from HAR.feature_extractor import extract_features, NATIVE, TSFEL
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+SENSORS_TO_LOAD = [ACC, GYR, MAG]
+FS = 100
+W_SIZE = 5.0
+WINDOW_LENGTH = int(W_SIZE * FS)
+N_WINDOWS = 6
+PARTIAL_WINDOW_LENGTH = 137 # samples after the last full window (dropped by both engines)
+CONSTANT_WINDOW = 2
+
+# tolerances for the comparison (the engines sum the samples in a different order)
+RTOL = 1e-7
+ATOL = 1e-9
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# fixtures
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.fixture(scope='module')
+def sensor_df():
+
+    # random 9-channel data with a partial last window
+    rng = np.random.default_rng(42)
+    data = rng.normal(size=(N_WINDOWS * WINDOW_LENGTH + PARTIAL_WINDOW_LENGTH, 9))
+
+    # constant window (all channels)
+    data[CONSTANT_WINDOW * WINDOW_LENGTH:(CONSTANT_WINDOW + 1) * WINDOW_LENGTH] = 1.5
+
+    columns = [f"{axis}_{sensor}" for sensor in SENSORS_TO_LOAD for axis in 'xyz']
+
+    return pd.DataFrame(data, columns=columns)
+
+
+@pytest.fixture(scope='module')
+def tsfel_features(sensor_df):
+
+    return extract_features(sensor_df, SENSORS_TO_LOAD, w_size=W_SIZE, fs=FS, engine=TSFEL)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# tests
+# ------------------------------------------------------------------------------------------------------------------- #
+def test_native_features_match_tsfel(sensor_df, tsfel_features):
+
+    native_features = extract_features(sensor_df, SENSORS_TO_LOAD, w_size=W_SIZE, fs=FS, engine=NATIVE)
+
+    # same columns in the same order
+    assert list(native_features.columns) == list(tsfel_features.columns)
+
+    # one row per full window (the partial last window is dropped)
+    assert native_features.shape[0] == tsfel_features.shape[0] == N_WINDOWS
+
+    np.testing.assert_allclose(native_features.to_numpy(dtype=np.float64), tsfel_features.to_numpy(dtype=np.float64),
+                               rtol=RTOL, atol=ATOL, equal_nan=True)
+
+
+def test_native_features_window_mask(sensor_df, tsfel_features):
+
+    window_mask = np.zeros(N_WINDOWS, dtype=bool)
+    window_mask[[0, CONSTANT_WINDOW, N_WINDOWS - 1]] = True
+
+    native_features = extract_features(sensor_df, SENSORS_TO_LOAD, w_size=W_SIZE, fs=FS, window_mask=window_mask,
+                                       engine=NATIVE)
+
+    assert list(native_features.columns) == list(tsfel_features.columns)
+    np.testing.assert_allclose(native_features.to_numpy(dtype=np.float64),
+                               tsfel_features[window_mask].to_numpy(dtype=np.float64),
+                               rtol=RTOL, atol=ATOL, equal_nan=True)
+
+
+@pytest.mark.parametrize('engine', [NATIVE, TSFEL])
+def test_feature_names_subset(sensor_df, tsfel_features, engine):
+
+    # subset of the features (of several channels) in a shuffled order
+    rng = np.random.default_rng(0)
+    feature_names = list(rng.permutation(tsfel_features.columns)[:25])
+
+    features = extract_features(sensor_df, SENSORS_TO_LOAD, w_size=W_SIZE, fs=FS, engine=engine,
+                                feature_names=feature_names)
+
+    # the requested features in the requested order
+    assert list(features.columns) == feature_names
+
+    np.testing.assert_allclose(features.to_numpy(dtype=np.float64),
+                               tsfel_features[feature_names].to_numpy(dtype=np.float64),
+                               rtol=RTOL, atol=ATOL, equal_nan=True)
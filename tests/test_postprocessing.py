@@ -0,0 +1,211 @@
+"""
+Tests for the post-processing of the HAR predictions (HAR.postprocessing): the vectorized threshold tuning, the
+run-length encoded heuristics-based label correction, and the expansion of the window labels have to give exactly the
+same labels as the original (loop-based) implementation, which is kept below as reference.
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pytest
+from collections import Counter
+
+# internal imports
+from HAR.postprocessing import (threshold_tuning, heuristics_correction, expand_classification, get_worn_periods,
+                                postprocess_worn_windows, NON_WEAR_LABEL)
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+MIN_DURATIONS = {0: 20, 1: 30, 2: 5}
+N_FUZZ_CASES = 2000
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# reference implementation (original loop-based post-processing)
+# ------------------------------------------------------------------------------------------------------------------- #
+def _reference_threshold_tuning(probabilities, y_pred, sit_label=0, stand_label=1, threshold=0.1):
+
+    adjusted = []
+    for i, probs in enumerate(probabilities):
+        pred = y_pred[i]
+
+        if pred == stand_label and (probs[stand_label] - probs[sit_label]) < threshold:
+            pred = sit_label
+
+        adjusted.append(pred)
+
+    return np.array(adjusted)
+
+
+def _reference_heuristics_correction(predictions, window_size, min_durations):
+
+    corrected = predictions.copy()
+
+    for class_id, min_duration in min_durations.items():
+        corrected = _reference_correct_short_segments(corrected, class_id, min_duration, window_size)
+
+    return corrected
+
+
+def _reference_correct_short_segments(predictions, class_id, min_duration, window_size):
+
+    corrected = predictions.copy()
+
+    for start, end in _reference_find_class_segments(predictions, class_id):
+
+        if (end - start + 1) * window_size < min_duration:
+            left = predictions[start - 1] if start > 0 else None
+            right = predictions[end + 1] if end < len(predictions) - 1 else None
+
+            neighbors = [c for c in (left, right) if c is not None]
+            if neighbors:
+                corrected[start:end + 1] = Counter(neighbors).most_common(1)[0][0]
+
+    return corrected
+
+
+def _reference_find_class_segments(predictions, target_class):
+
+    segments = []
+    in_segment = False
+    start = 0
+
+    for i, pred in enumerate(predictions):
+        if pred == target_class:
+            if not in_segment:
+                in_segment = True
+                start = i
+        elif in_segment:
+            segments.append((start, i - 1))
+            in_segment = False
+
+    if in_segment:
+        segments.append((start, len(predictions) - 1))
+
+    return segments
+
+
+def _reference_expand_classification(clf_result, w_size, fs):
+
+    expanded_clf_result = []
+    for p in clf_result:
+        expanded_clf_result += [p] * int(w_size * fs)
+
+    return expanded_clf_result
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# helpers
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_random_predictions(rng, n_windows, n_classes=3):
+
+    # segments of random classes and lengths (many short segments)
+    lengths = rng.integers(1, 12, size=n_windows)
+    classes = rng.integers(0, n_classes, size=n_windows)
+
+    return np.repeat(classes, lengths)[:n_windows]
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# tests
+# ------------------------------------------------------------------------------------------------------------------- #
+def test_threshold_tuning_fuzz():
+
+    rng = np.random.default_rng(0)
+
+    for _ in range(N_FUZZ_CASES // 10):
+        n_windows = rng.integers(0, 200)
+        probabilities = rng.dirichlet(np.ones(3), size=n_windows)
+
+        # quantized probabilities, so that margins equal to the threshold occur
+        probabilities = np.round(probabilities * 20) / 20
+        y_pred = rng.integers(0, 3, size=n_windows)
+        threshold = rng.choice([0.0, 0.05, 0.1, 0.5, 0.85, 1.0])
+
+        np.testing.assert_array_equal(threshold_tuning(probabilities, y_pred, 0, 1, threshold),
+                                      _reference_threshold_tuning(probabilities, y_pred, 0, 1, threshold))
+
+
+def test_heuristics_correction_fuzz():
+
+    rng = np.random.default_rng(1)
+
+    for _ in range(N_FUZZ_CASES):
+        predictions = _get_random_predictions(rng, rng.integers(0, 120))
+        window_size = rng.choice([1.0, 2.5, 5.0])
+
+        # random minimum durations in a random class order
+        class_order = rng.permutation(3)
+        min_durations = {int(class_id): float(rng.choice([0, 5, 10, 20, 30, 60])) for class_id in class_order}
+
+        np.testing.assert_array_equal(heuristics_correction(predictions, window_size, min_durations),
+                                      _reference_heuristics_correction(predictions, window_size, min_durations))
+
+
+@pytest.mark.parametrize('predictions, expected', [
+    # short segment at the start (replaced by the right neighbor)
+    ([2, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0]),
+    # short segment at the end (replaced by the left neighbor)
+    ([0, 0, 0, 0, 0, 0, 0, 1], [0, 0, 0, 0, 0, 0, 0, 0]),
+    # different neighbors (the left neighbor is chosen)
+    ([0, 0, 0, 0, 0, 2, 1, 1, 1, 1, 1, 1, 1, 1], [0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1]),
+    # a single segment covering all predictions is not replaced
+    ([1, 1], [1, 1]),
+    # single window
+    ([2], [2]),
+    # empty predictions
+    ([], []),
+])
+def test_heuristics_correction_edge_runs(predictions, expected):
+
+    predictions = np.array(predictions, dtype=int)
+
+    # window size of 4 s (the segments of a single window are short for all classes)
+    corrected = heuristics_correction(predictions, 4.0, MIN_DURATIONS)
+
+    np.testing.assert_array_equal(corrected, expected)
+    np.testing.assert_array_equal(corrected, _reference_heuristics_correction(predictions, 4.0, MIN_DURATIONS))
+
+
+def test_heuristics_correction_uses_uncorrected_neighbors():
+
+    # the corrections of a class use the neighbors before the correction of that class (short 0 segments next to each
+    # other are not merged before being replaced)
+    predictions = np.array([1, 1, 1, 1, 1, 1, 1, 1, 0, 2, 0, 2, 2, 2, 2, 2, 2, 2])
+    min_durations = {0: 10, 2: 10, 1: 10}
+
+    np.testing.assert_array_equal(heuristics_correction(predictions, 5.0, min_durations),
+                                  _reference_heuristics_correction(predictions, 5.0, min_durations))
+
+
+@pytest.mark.parametrize('w_size, fs', [(5.0, 100), (2.5, 50), (1.0, 1)])
+def test_expand_classification(w_size, fs):
+
+    labels = np.array([0, 1, 2, NON_WEAR_LABEL, 1])
+    expanded = expand_classification(labels, w_size, fs)
+
+    assert expanded.dtype == np.int8
+    np.testing.assert_array_equal(expanded, _reference_expand_classification(labels, w_size, fs))
+
+
+def test_postprocess_worn_windows():
+
+    rng = np.random.default_rng(2)
+
+    for _ in range(N_FUZZ_CASES // 10):
+        window_mask = _get_random_predictions(rng, rng.integers(1, 150), n_classes=2).astype(bool)
+        n_classified = int(window_mask.sum())
+        y_pred = _get_random_predictions(rng, n_classified)
+        probabilities = rng.dirichlet(np.ones(3), size=n_classified)
+
+        labels = postprocess_worn_windows(y_pred, probabilities, window_mask, 5.0, 0.85, MIN_DURATIONS)
+
+        # non-worn windows are labeled as non-wear and each worn period is post-processed separately
+        assert np.all(labels[~window_mask] == NON_WEAR_LABEL)
+
+        for windows, classified_windows in get_worn_periods(window_mask):
+            y_pred_tt = _reference_threshold_tuning(probabilities[classified_windows], y_pred[classified_windows],
+                                                    0, 1, 0.85)
+            np.testing.assert_array_equal(labels[windows],
+                                          _reference_heuristics_correction(y_pred_tt, 5.0, MIN_DURATIONS))
@@ -0,0 +1,66 @@
+"""
+Tests for signal_processing.resampling: the resampling factors (exact ratios and approximation error), the equality
+with scipy.signal.resample_poly(...), and the equality of the chunked and the one-shot resampling.
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pytest
+from scipy.signal import resample_poly
+
+# internal imports
+from signal_processing.resampling import (get_resampling_factors, get_resampling_filter, resample_array,
+                                          resample_chunks, _get_polyphase_filter)
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+SAMPLING_FREQUENCIES = [(1000, 100), (100, 50), (100, 99.97), (99.97, 100), (1000, 99.97), (44100, 1000)]
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# tests
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize('fs, fs_new, expected', [(1000, 100, (1, 10)), (100, 99.97, (9997, 10000)),
+                                                  (99.97, 100, (10000, 9997)), (100, 100, (1, 1))])
+def test_resampling_factors(fs, fs_new, expected):
+
+    assert get_resampling_factors(fs, fs_new) == expected
+
+
+def test_resampling_factors_drift():
+
+    # approximated ratio close to the real one (relative error below 1e-6)
+    up, down = get_resampling_factors(1000, 99.97)
+    assert abs(up / down / (99.97 / 1000) - 1) < 1e-6
+
+    # the ratio can not be approximated with small factors
+    with pytest.raises(ValueError):
+        get_resampling_factors(100, 100.005)
+
+
+@pytest.mark.parametrize('fs, fs_new', SAMPLING_FREQUENCIES)
+def test_resample_array(fs, fs_new):
+
+    x = np.random.default_rng(0).normal(size=(5000, 3))
+    up, down = get_resampling_factors(fs, fs_new)
+
+    np.testing.assert_array_equal(resample_array(x, fs, fs_new), resample_poly(x, up, down, axis=0))
+
+
+@pytest.mark.parametrize('fs, fs_new', SAMPLING_FREQUENCIES)
+@pytest.mark.parametrize('chunk_size', [7, 333, 5000])
+def test_resample_chunks(fs, fs_new, chunk_size):
+
+    x = np.random.default_rng(1).normal(size=(5000, 3))
+    chunks = (x[start:start + chunk_size] for start in range(0, len(x), chunk_size))
+
+    np.testing.assert_array_equal(np.concatenate(list(resample_chunks(chunks, fs, fs_new))),
+                                  resample_array(x, fs, fs_new))
+
+
+def test_memoized_filters_are_read_only():
+
+    assert not get_resampling_filter(1, 10).flags.writeable
+    assert not _get_polyphase_filter(1, 10)[0].flags.writeable
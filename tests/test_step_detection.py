@@ -0,0 +1,86 @@
+"""
+Tests for the step detection of signal_processing.step_detection: the steps of synthetic gait (vertical oscillation of
+the ACC, one period per step) have to be counted exactly for several cadences, and the chunked detection has to give
+the same steps as the detection on the whole signal.
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+import pytest
+
+# internal imports
+from constants import PHONE
+from signal_processing.step_detection import detect_steps, detect_steps_chunks, get_steps, STEPS
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+FS = 100
+DURATION = 60 # seconds
+STEP_AMPLITUDE = 3.0 # amplitude of the vertical oscillation (m/s^2)
+NOISE_STD = 0.2 # standard deviation of the noise (m/s^2)
+CADENCES = [1.0, 1.4, 1.8, 2.0, 2.2, 2.6] # steps per second
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# helpers
+# ------------------------------------------------------------------------------------------------------------------- #
+def _get_synthetic_gait(cadence, seed=0):
+
+    rng = np.random.default_rng(seed)
+    time = np.arange(DURATION * FS) / FS
+
+    # gravity along a tilted direction of the phone (constant orientation)
+    gravity_direction = np.array([0.3, 0.9, 0.3])
+    gravity_direction /= np.linalg.norm(gravity_direction)
+    gravity_data = np.tile(9.81 * gravity_direction, (len(time), 1))
+
+    # vertical oscillation (one period per step) plus noise on all axes
+    acc_data = STEP_AMPLITUDE * np.sin(2 * np.pi * cadence * time)[:, np.newaxis] * gravity_direction
+    acc_data += NOISE_STD * rng.normal(size=acc_data.shape)
+
+    return acc_data, gravity_data
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# tests
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize('cadence', CADENCES)
+def test_step_count(cadence):
+
+    acc_data, gravity_data = _get_synthetic_gait(cadence)
+
+    step_indices = detect_steps(acc_data, gravity_data, fs=FS)
+
+    assert len(step_indices) == round(cadence * DURATION)
+
+    # one step per oscillation period
+    np.testing.assert_allclose(np.diff(step_indices) / FS, 1 / cadence, atol=0.1)
+
+
+@pytest.mark.parametrize('cadence', [1.4, 2.2])
+@pytest.mark.parametrize('chunk_size', [1, 7, 100, 777, DURATION * FS])
+def test_chunked_detection(cadence, chunk_size):
+
+    acc_data, gravity_data = _get_synthetic_gait(cadence, seed=1)
+
+    chunks = ((acc_data[start:start + chunk_size], gravity_data[start:start + chunk_size])
+              for start in range(0, len(acc_data), chunk_size))
+
+    np.testing.assert_array_equal(np.concatenate(list(detect_steps_chunks(chunks, fs=FS))),
+                                  detect_steps(acc_data, gravity_data, fs=FS))
+
+
+def test_get_steps_requires_gravity():
+
+    acc_data, gravity_data = _get_synthetic_gait(1.8)
+    df = pd.DataFrame(np.hstack((acc_data, gravity_data)),
+                      columns=['x_ACC', 'y_ACC', 'z_ACC', 'x_GRAV', 'y_GRAV', 'z_GRAV'])
+
+    steps = get_steps({PHONE: {'10-00-00': df}}, fs=FS)
+    assert len(steps['10-00-00'][STEPS]) == round(1.8 * DURATION)
+
+    with pytest.raises(ValueError):
+        get_steps({PHONE: {'10-00-00': df[['x_ACC', 'y_ACC', 'z_ACC']]}}, fs=FS)
@@ -0,0 +1,82 @@
+"""
+Tests for the StreamingPreProcessor of signal_processing.streaming: concatenating the outputs of the chunks has to give
+exactly the same result as the one-shot pre-processing of the whole acquisition, independently of how the acquisition
+is chunked.
+"""
+# ------------------------------------------------------------------------------------------------------------------- #
+# imports
+# ------------------------------------------------------------------------------------------------------------------- #
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.spatial.transform import Rotation
+
+# internal imports
+from constants import ACC, GYR, MAG, ROT
+from signal_processing.pre_process_android import _pre_process_signals, IMPULSE_RESPONSE_SAMPLES
+from signal_processing.streaming import StreamingPreProcessor
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# constants
+# ------------------------------------------------------------------------------------------------------------------- #
+FS = 100
+N_SAMPLES = 3000
+CHUNK_SIZES = [1, 2, 5, 11, 64, 250, 777, N_SAMPLES]
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# fixtures
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.fixture(scope='module')
+def sensor_df():
+
+    rng = np.random.default_rng(0)
+
+    # time column (kept as it is), IMU signals, and a random walk of rotations with random sign flips
+    time = np.arange(N_SAMPLES) / FS
+    imu_data = rng.normal(size=(N_SAMPLES, 9)) + np.array([0.0, 0.0, 9.81, 0.0, 0.0, 0.0, 20.0, -5.0, 30.0])
+    quaternions = Rotation.from_rotvec(np.cumsum(rng.normal(scale=0.05, size=(N_SAMPLES, 3)), axis=0)).as_quat()
+    quaternions[rng.random(N_SAMPLES) < 0.2] *= -1
+
+    columns = (['sec'] + [f"{axis}_{sensor}" for sensor in (ACC, GYR, MAG) for axis in 'xyz']
+               + [f"{axis}_{ROT}" for axis in 'xyzw'])
+
+    return pd.DataFrame(np.column_stack((time, imu_data, quaternions)), columns=columns)
+
+
+@pytest.fixture(scope='module')
+def one_shot_df(sensor_df):
+
+    return _pre_process_signals(sensor_df, FS)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# tests
+# ------------------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_streaming_equals_one_shot(sensor_df, one_shot_df, chunk_size):
+
+    pre_processor = StreamingPreProcessor(sensor_df.columns, fs=FS)
+
+    processed_chunks = [pre_processor.process(sensor_df.iloc[start:start + chunk_size])
+                        for start in range(0, N_SAMPLES, chunk_size)] + [pre_processor.flush()]
+    streamed_df = pd.concat(processed_chunks)
+
+    assert streamed_df.shape == (N_SAMPLES - IMPULSE_RESPONSE_SAMPLES, sensor_df.shape[1])
+    assert list(streamed_df.columns) == list(one_shot_df.columns)
+    np.testing.assert_array_equal(streamed_df.to_numpy(), one_shot_df.to_numpy())
+
+
+def test_streaming_irregular_chunks_and_reset(sensor_df, one_shot_df):
+
+    rng = np.random.default_rng(1)
+    pre_processor = StreamingPreProcessor(sensor_df.columns, fs=FS)
+
+    # the pre-processor is reset by flush(...), thus the same object can process several acquisitions
+    for _ in range(2):
+        boundaries = np.unique(np.concatenate(([0, N_SAMPLES], rng.integers(0, N_SAMPLES, size=40))))
+
+        processed_chunks = [pre_processor.process(sensor_df.iloc[start:stop])
+                            for start, stop in zip(boundaries[:-1], boundaries[1:])] + [pre_processor.flush()]
+
+        np.testing.assert_array_equal(pd.concat(processed_chunks).to_numpy(), one_shot_df.to_numpy())